@@ -0,0 +1,55 @@
+import gzip
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAME_PATH = os.path.join(HERE, os.pardir, "timekeeper-chronicles.py")
+
+def _load_game_module():
+    """Import timekeeper-chronicles.py, whose name isn't a valid module name."""
+    spec = importlib.util.spec_from_file_location("timekeeper_chronicles", GAME_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope="session")
+def tk():
+    """The game module, with no hint index unless a test builds one."""
+    module = _load_game_module()
+    module.HINTS = module.ReachabilityIndex(os.path.join(HERE, "no-such-index"))
+    return module
+
+@pytest.fixture(scope="session")
+def baseline_games():
+    """Scripted games recorded from the original (pre-engine) game.
+    
+    Each has the choices fed to it, the final stats, inventory, flags,
+    chapter and ending, and for some the whole transcript.
+    """
+    with gzip.open(os.path.join(HERE, "data", "baseline_games.json.gz"), "rt",
+                   encoding="utf-8") as file:
+        return json.load(file)
+
+@pytest.fixture(scope="session")
+def graph(tk):
+    """The story's state graph, built once for the whole run."""
+    return tk.StateGraph.build()
+
+@pytest.fixture(scope="session")
+def solver(tk, graph):
+    """A Solver answering from the session's state graph."""
+    solver = tk.Solver()
+    solver.graph = graph
+    return solver
+
+@pytest.fixture(scope="session")
+def index(tk, graph, tmp_path_factory):
+    """A reachability index of the story, built once for the whole run."""
+    path = str(tmp_path_factory.mktemp("index") / "index")
+    tk.build_index(path, graph=graph)
+    return tk.ReachabilityIndex(path)
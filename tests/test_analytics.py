@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import pytest
+
+SCRIPTS = ("GAME OVER: Heat Exhaustion", "PERFECT ENDING: Master of Balance")
+
+@pytest.fixture
+def log(tk, tmp_path, monkeypatch):
+    """An events log of one game along each of SCRIPTS."""
+    path = tmp_path / "events.jsonl"
+    metrics = tk.Metrics(tk.EventLog(str(path)))
+    monkeypatch.setattr(tk, "METRICS", metrics)
+    for ending in SCRIPTS:
+        tk.play_headless(tk.BENCH_SCRIPTS[ending].split())
+    metrics.close()
+    return path
+
+def counts(summary):
+    """Everything a summary counted, for comparing two."""
+    return (summary.events, summary.bad_lines, summary.games,
+            *(getattr(summary, name) for name in summary.COUNTERS))
+
+def test_summary_counts_games_and_endings(tk, log):
+    summary = tk.summarize_log(str(log))
+    assert summary.games == len(SCRIPTS)
+    assert summary.endings == {ending: 1 for ending in SCRIPTS}
+    assert summary.bad_lines == 0
+    assert summary.chapters == {2: 1, 3: 1}
+    assert sum(summary.choices.values()) == sum(len(tk.BENCH_SCRIPTS[ending].split())
+                                                for ending in SCRIPTS)
+
+def test_gzipped_logs_read_the_same(tk, log, tmp_path):
+    zipped = tmp_path / "events.jsonl.gz"
+    zipped.write_bytes(gzip.compress(log.read_bytes()))
+    assert counts(tk.summarize_log(str(zipped))) == counts(tk.summarize_log(str(log)))
+
+def test_bad_lines_are_counted_and_skipped(tk, log, tmp_path):
+    broken = tmp_path / "broken.jsonl"
+    lines = log.read_text(encoding="utf-8").splitlines()
+    bad = [
+        "not json",
+        "[1, 2]",
+        json.dumps({"event": "scene", "scene": "entrance", "to": "forge"}),
+        json.dumps({"event": "choice", "choice": "1"}),
+        json.dumps({"event": "chapter", "chapter": 2, "knowledge": 10}),
+        json.dumps({"event": "scene", "scene": "entrance", "to": "forge", "choice": "1",
+                    "seconds": "slow"}),
+        '{"event": "ending", "ending": "cut sho',
+    ]
+    broken.write_text("\n".join(lines[:5] + bad + lines[5:]) + "\n", encoding="utf-8")
+    summary = tk.summarize_log(str(broken))
+    expected = tk.summarize_log(str(log))
+    assert summary.bad_lines == len(bad)
+    assert summary.events == expected.events + len(bad)
+    assert counts(summary)[2:] == counts(expected)[2:]
+
+def test_merged_summaries_match_one_pass(tk, log, tmp_path):
+    lines = log.read_text(encoding="utf-8").splitlines(keepends=True)
+    first, second = tmp_path / "events.jsonl.1", tmp_path / "events.jsonl.2"
+    first.write_text("".join(lines[:len(lines) // 2]), encoding="utf-8")
+    second.write_text("".join(lines[len(lines) // 2:]), encoding="utf-8")
+    whole = counts(tk.summarize_log(str(log)))
+    merged = tk.summarize_log(str(first)).merge(tk.summarize_log(str(second)))
+    assert counts(merged) == whole
+    assert counts(tk.summarize_logs([str(first), str(second)], workers=1)) == whole
+    assert counts(tk.summarize_logs([str(first), str(second)], workers=2)) == whole
+
+def test_report_runs_on_a_summary(tk, log):
+    lines = tk.report_events(tk.summarize_log(str(log)))
+    assert "\nCHAPTER FUNNEL:" in lines
+    assert any(line.strip().startswith(SCRIPTS[0]) for line in lines)
@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+def replayed(tk, keys):
+    """A game's state after the keys a batch game took, played on the scalar engine."""
+    state = tk.STORY.new_game()
+    for key in keys:
+        if key:
+            tk.STORY.advance(state, str(key))
+    return state
+
+def test_graph_matches_explore_counts(tk, graph):
+    assert len(graph.keys) == 638164
+    assert len(graph.targets) == 2584171
+    assert graph.find(tk.STORY.new_game()) is not None
+
+def test_graph_round_trip(tk, graph, tmp_path):
+    path = str(tmp_path / "graph")
+    graph.save(path)
+    loaded = tk.StateGraph.load(path)
+    for name in ("offsets", "targets", "choices", "rows", "keys", "row_outcomes", "finished"):
+        assert getattr(loaded, name) == getattr(graph, name)
+    state = tk.STORY.new_game()
+    tk.STORY.advance(state, "1")
+    assert loaded.find(state) == graph.find(state)
+
+def test_stale_graph_is_rejected(tk, graph, tmp_path):
+    path = tmp_path / "graph"
+    graph.save(str(path))
+    data = bytearray(path.read_bytes())
+    data[5] ^= 1
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="another version"):
+        tk.StateGraph.load(str(path))
+    path.write_bytes(bytes(data[:-1]))
+    with pytest.raises(ValueError):
+        tk.StateGraph.load(str(path))
+
+def test_random_games_match_the_scalar_engine(tk, graph):
+    engine = tk.BatchEngine(3000, graph)
+    recorded = engine.play_random(np.random.default_rng(7), record=3000)
+    for game, keys in enumerate(recorded.T):
+        assert engine.state(game).astuple() == replayed(tk, keys).astuple()
+    assert sum(engine.ending_counts().values()) == 3000
+
+def test_scripted_steps_match_the_scalar_engine(tk, graph):
+    scripts = [script.split() for script in tk.BENCH_SCRIPTS.values()]
+    engine = tk.BatchEngine(len(scripts), graph)
+    for step in range(max(map(len, scripts))):
+        keys = [int(script[step]) if step < len(script) else 0 for script in scripts]
+        engine.step(keys)
+    for game, (ending, script) in enumerate(tk.BENCH_SCRIPTS.items()):
+        state = replayed(tk, map(int, script.split()))
+        assert engine.state(game).astuple() == state.astuple()
+        assert state.ending == ending
+
+def test_refused_keys_leave_games_where_they_are(tk, graph):
+    engine = tk.BatchEngine(2, graph)
+    before = engine.state(0).astuple()
+    assert engine.step([9, 1]) == 1
+    assert engine.state(0).astuple() == before
+    assert engine.state(1).astuple() != before
+    assert engine.choices == 1
@@ -0,0 +1,19 @@
+import json
+
+def test_suite_runs_without_hints_or_metrics(tk, index, tmp_path, monkeypatch):
+    monkeypatch.setattr(tk, "HINTS", index)
+    monkeypatch.setattr(tk, "METRICS", tk.Metrics())
+    seen = {}
+    
+    def time_suite(suite, progress=None):
+        seen["hints"] = tk.HINTS.endings(tk.STORY.new_game())
+        seen["metrics"] = tk.METRICS
+        return {tk.REFERENCE_BENCHMARK: 1e-6}
+    
+    monkeypatch.setattr(tk, "time_suite", time_suite)
+    path = tmp_path / "bench.json"
+    tk.run_benchmarks(str(path))
+    assert seen == {"hints": None, "metrics": None}
+    assert json.loads(path.read_text())["settings"] == {"hints": False, "metrics": False}
+    assert tk.HINTS is index
+    assert tk.METRICS is not None
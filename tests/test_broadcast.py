@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+def test_reads_what_was_written(tk):
+    broadcast = tk.Broadcast(size=16)
+    broadcast.write(b"hello ")
+    broadcast.write(b"world")
+    assert broadcast.read(0) == (b"hello world", 11, False)
+    assert broadcast.read(6) == (b"world", 11, False)
+
+def test_reads_across_the_wrap(tk):
+    broadcast = tk.Broadcast(size=16)
+    broadcast.write(b"x" * 12)
+    broadcast.write(b"abcdefgh")
+    assert broadcast.read(12) == (b"abcdefgh", 20, False)
+
+def test_reads_are_copies(tk):
+    broadcast = tk.Broadcast(size=8)
+    broadcast.write(b"abcd")
+    data, offset, _ = broadcast.read(0)
+    broadcast.write(b"efghijkl")
+    assert data == b"abcd"
+    assert offset == 4
+
+def test_lagging_reader_skips_to_keyframe(tk):
+    broadcast = tk.Broadcast(size=16)
+    broadcast.write(b"old frame ")
+    broadcast.mark()
+    broadcast.write(b"new frame")
+    assert broadcast.read(0) == (b"new frame", 19, True)
+    assert broadcast.start() == 10
+
+def test_lagging_reader_without_keyframe_keeps_the_newest(tk):
+    broadcast = tk.Broadcast(size=8)
+    broadcast.write(b"0123456789")
+    assert broadcast.read(0) == (b"23456789", 10, True)
+
+def test_oversized_write_keeps_its_tail(tk):
+    broadcast = tk.Broadcast(size=8)
+    broadcast.write(b"abc")
+    broadcast.write(b"0123456789ABCDEF!")
+    assert broadcast.written == 20
+    assert broadcast.start() == 12
+    assert broadcast.read(12) == (b"9ABCDEF!", 20, False)
+
+def test_concurrent_reads_are_never_torn(tk):
+    broadcast = tk.Broadcast(size=64)
+    frames = [bytes([65 + n % 26]) * 16 for n in range(20000)]
+    done = threading.Event()
+    
+    def play():
+        for frame in frames:
+            broadcast.mark()
+            broadcast.write(frame)
+        done.set()
+    
+    player = threading.Thread(target=play)
+    player.start()
+    offset = 0
+    while not done.is_set() or offset < broadcast.written:
+        data, end, skipped = broadcast.read(offset)
+        if skipped:
+            assert (end - len(data)) % 16 == 0
+        # Every frame is one repeated letter, so a torn read shows as a mix.
+        start = offset if not skipped else end - len(data)
+        for at in range(0, len(data), 16):
+            frame = data[at:at + 16]
+            assert frame == frames[(start + at) // 16][:len(frame)]
+        offset = end
+    player.join()
+
+class Spectator:
+    """A stream writer for SpectatorServer.watch that falls a lap behind once."""
+    
+    def __init__(self, broadcast):
+        self.broadcast = broadcast
+        self.sent = []
+        self.lapped = False
+        self.transport = self
+    
+    def write(self, data):
+        self.sent.append(data)
+    
+    async def drain(self):
+        if not self.lapped:
+            # The player writes a whole ring and more while this one waits.
+            self.lapped = True
+            self.broadcast.write(b"." * self.broadcast.size * 2)
+            self.broadcast.mark()
+            self.broadcast.write(b"FRAME")
+        elif self.sent[-1].endswith(b"FRAME"):
+            raise ConnectionResetError
+    
+    def abort(self):
+        pass
+
+def test_spectator_that_lags_is_skipped_ahead(tk):
+    broadcast = tk.Broadcast(size=64)
+    broadcast.write(b"start")
+    server = tk.SpectatorServer(broadcast)
+    spectator = Spectator(broadcast)
+    
+    async def watch():
+        server.loop = asyncio.get_running_loop()
+        server.changed = server.loop.create_future()
+        await server.watch(None, spectator)
+    
+    asyncio.run(watch())
+    assert spectator.sent == [b"start", b"FRAME"]
+    assert all(type(data) is bytes for data in spectator.sent)
+    assert server.skips == 1
+    assert server.watching == 0
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+def test_a_line_of_words_answers_the_prompts_after_it(tk):
+    chain = tk.InputChain()
+    assert chain.split("4 2 ENTER 1") == "4"
+    assert [chain.take(), chain.take(pause=True), chain.take()] == ["2", "", "1"]
+    assert not chain
+
+def test_pauses_let_other_answers_through(tk):
+    chain = tk.InputChain()
+    assert chain.split("1 2") == "1"
+    assert chain.take(pause=True) == ""
+    assert chain.take() == "2"
+
+def test_single_words_and_names_are_not_chained(tk):
+    chain = tk.InputChain()
+    assert chain.split("3") == "3"
+    assert chain.split("r 3") == "r 3"
+    assert not chain
+    assert chain.stop() is None
+
+def test_rewinds_are_one_word(tk):
+    chain = tk.InputChain()
+    assert chain.split("1 r 2 rewind 3 R4 2") == "1"
+    assert [chain.take() for _ in range(4)] == ["r 2", "rewind 3", "R4", "2"]
+
+def test_stop_says_where_the_line_stopped(tk):
+    chain = tk.InputChain()
+    chain.split("1 9 2 3")
+    chain.take()
+    assert chain.stop() == "⛓️  Stopped at '9' (answer 2 of 4); not used: 2 3"
+    assert not chain
+    assert chain.stop() is None
+
+def play(tk, lines, tmp_path):
+    """Play a terminal game that can rewind from typed lines; returns it and what it drew."""
+    class Console(tk.Console):
+        def sleep(self, seconds):
+            pass
+    
+    read, write = os.pipe()
+    os.write(write, "".join(line + "\n" for line in lines).encode())
+    os.close(write)
+    reader = tk.InputReader(read)
+    drawn = tmp_path / "drawn.txt"
+    fd = os.open(drawn, os.O_WRONLY | os.O_CREAT)
+    try:
+        renderer = tk.Renderer(fd, instant=True, reader=reader)
+        game = tk.TimekeeperChronicles(Console(renderer, reader=reader), rewind=True)
+        with pytest.raises(tk.SessionEnded):
+            game.start_game()
+        renderer.flush()
+    finally:
+        os.close(fd)
+        os.close(read)
+    return game, drawn.read_text(encoding="utf-8")
+
+def test_rewind_inside_a_chain(tk, tmp_path):
+    game, drawn = play(tk, ["Ann", "ENTER 1 2 3 r 2 4"], tmp_path)
+    assert game.state == tk.play_headless(["1", "4"], name="Ann").state
+    assert "2 choices undone" in drawn
+
+def test_refused_answer_stops_the_chain(tk, tmp_path):
+    game, drawn = play(tk, ["Ann", "ENTER 1 9 2 3"], tmp_path)
+    assert game.state == tk.play_headless(["1"], name="Ann").state
+    assert "⛓️  Stopped at '9' (answer 3 of 5); not used: 2 3" in drawn
@@ -0,0 +1,76 @@
+import io
+import re
+
+def final(state):
+    """What the baseline recorded about a game's end state."""
+    return {
+        "health": state.health, "knowledge": state.knowledge, "courage": state.courage,
+        "compassion": state.compassion, "chapter": state.chapter, "ending": state.ending,
+        "inventory": sorted(state.inventory),
+        "flags": sorted(flag for flag in ("has_crystal_chronicle", "saved_owl", "has_time_sap",
+                                          "has_temporal_hammer", "has_lumina_blossom",
+                                          "mechanical_fixed", "organic_fixed", "elemental_fixed",
+                                          "helped_robot", "visited_volcanic",
+                                          "visited_mechanical", "visited_garden")
+                        if getattr(state, flag)),
+    }
+
+def as_baseline(transcript):
+    """A headless transcript without the answers it echoes, as the original printed it."""
+    transcript = re.sub(r"(\nYour choice: )[^\n]*\n", r"\1", transcript)
+    transcript = re.sub(r"(\nPress Enter[^\n]*)\n", r"\1", transcript)
+    transcript = re.sub(r"> [^\n]*\n", "> ", transcript)
+    return transcript.removesuffix("\nYour choice: ")
+
+def test_final_states_match_baseline(tk, baseline_games):
+    for game in baseline_games:
+        played = tk.play_headless(game["choices"].split(), name="Ann")
+        assert final(played.state) == game["final"], game["choices"]
+
+def test_transcripts_match_baseline(tk, baseline_games):
+    games = [game for game in baseline_games if "transcript" in game]
+    assert len(games) >= 15
+    for game in games:
+        sink = io.StringIO()
+        tk.play_headless(game["choices"].split(), name="Ann", sink=sink)
+        assert as_baseline(sink.getvalue()) == game["transcript"].removesuffix("\nYour choice: ")
+
+def test_every_bench_script_reaches_its_ending(tk):
+    for ending, script in tk.BENCH_SCRIPTS.items():
+        assert tk.play_headless(script.split()).state.ending == ending
+
+def test_choices_run_out_cleanly(tk):
+    game = tk.play_headless([])
+    assert game.state.scene == "entrance"
+    assert game.state.player_name == "Hero"
+
+def test_headless_from_a_file(tk, tmp_path, capsys):
+    path = tmp_path / "choices.txt"
+    path.write_text("\n".join(tk.BENCH_SCRIPTS["GAME OVER: Heat Exhaustion"].split()) + "\n")
+    tk.main(["--headless", str(path), "--quiet"])
+    assert capsys.readouterr().out == "ENDING: GAME OVER: Heat Exhaustion\n"
+
+def test_games_without_a_sink_format_nothing(tk, baseline_games, monkeypatch):
+    def drawn(*args):
+        raise AssertionError("an undrawn game drew something")
+    
+    for name in ("arrive", "narrate", "show", "show_menu", "redraw"):
+        monkeypatch.setattr(tk.TimekeeperChronicles, name, drawn)
+    monkeypatch.setattr(tk.HINTS, "endings", drawn)
+    for game in baseline_games:
+        played = tk.play_headless(game["choices"].split(), name="Ann")
+        assert final(played.state) == game["final"], game["choices"]
+
+def test_undrawn_games_play_again_and_exit(tk):
+    script = tk.BENCH_SCRIPTS["GAME OVER: Heat Exhaustion"].split()
+    game = tk.play_headless(script + ["1"] + script + ["2"])
+    assert game.state.scene == tk.EXIT
+    assert game.state.ending == "GAME OVER: Heat Exhaustion"
+
+def test_options_cant_change_the_shared_story(tk):
+    state = tk.STORY.new_game()
+    for choice in tk.BENCH_SCRIPTS["SECRET ENDING: The Enlightened"].split():
+        options = tk.STORY.options(state)
+        assert type(options) is tuple
+        assert options == tk.STORY.options(state)
+        tk.STORY.advance(state, choice)
@@ -0,0 +1,77 @@
+import io
+import random
+
+import pytest
+
+PANEL = "🔮 ENDINGS STILL POSSIBLE: "
+
+def aims(tk):
+    """Endings hints are given for: all but the game overs."""
+    return [ending for ending in tk.story_endings() if not ending.startswith("GAME OVER")]
+
+def random_states(tk, games, seed):
+    """Every state at a menu along some random games."""
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = tk.STORY.new_game()
+        for _ in range(60):
+            yield state.copy()
+            if state.scene == "ending":
+                break
+            tk.STORY.advance(state, rng.choice(tk.STORY.options(state)))
+
+def test_index_lookups_match_the_graph(tk, graph, index):
+    for state in random_states(tk, 150, 3):
+        number = graph.find(state)
+        reachable = tuple(ending for ending in aims(tk)
+                          if graph.distances[ending][number] != tk.UNREACHABLE)
+        assert index.endings(state) == reachable
+
+def test_index_misses_unknown_states(tk, index, tmp_path):
+    state = tk.STORY.new_game()
+    state.scene = "no-such-scene"
+    assert index.endings(state) is None
+    assert tk.ReachabilityIndex(str(tmp_path / "missing")).endings(tk.STORY.new_game()) is None
+
+@pytest.mark.parametrize("contents", [b"", b"TKIX", b"\x00" * 15, b"garbage" * 100])
+def test_index_ignores_broken_files(tk, tmp_path, contents):
+    path = tmp_path / "index"
+    path.write_bytes(contents)
+    assert tk.ReachabilityIndex(str(path)).endings(tk.STORY.new_game()) is None
+
+def menus_shown(tk, choices):
+    """The hints panel and the state at every menu of a headless game that shows one."""
+    sink = io.StringIO()
+    
+    class Recorder(tk.HeadlessConsole):
+        def read_line(self, prompt):
+            shown = sink.getvalue()[self.read:].splitlines()
+            panels = [line[len(PANEL):] for line in shown if line.startswith(PANEL)]
+            if panels:
+                menus.append((panels[-1], game.state.copy()))
+            choice = super().read_line(prompt)
+            self.read = sink.tell()
+            return choice
+    
+    menus = []
+    console = Recorder(choices, sink=sink)
+    console.read = 0
+    game = tk.TimekeeperChronicles(console)
+    try:
+        game.start_game()
+    except tk.SessionEnded:
+        pass
+    return menus
+
+def test_hint_panel_matches_the_solver(tk, solver, index, monkeypatch):
+    monkeypatch.setattr(tk, "HINTS", index)
+    chapters = set()
+    for script in ("PERFECT ENDING: Master of Balance", "GAME OVER: Heat Exhaustion",
+                   "CHAOTIC ENDING: Unchecked Evolution"):
+        for panel, state in menus_shown(tk, tk.BENCH_SCRIPTS[script].split()):
+            if state.chapter > 2:
+                continue
+            chapters.add(state.chapter)
+            reachable = [ending for ending in aims(tk) if solver.solve(ending, state) is not None]
+            assert panel == (", ".join(map(tk.short_ending, reachable)) or "none"), state.scene
+    assert chapters == {1, 2}
@@ -0,0 +1,77 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+SCRIPT = "GAME OVER: Heat Exhaustion"
+
+@pytest.fixture
+def api(tk):
+    """A function making requests of a play API served on a free port."""
+    server = tk.PlayAPIServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    
+    def request(method, path, body=None, raw=None):
+        """(status, JSON reply) for one request over a kept-alive connection."""
+        if body is not None:
+            raw = json.dumps(body).encode()
+        headers = {"Content-Type": "application/json"} if raw is not None else {}
+        connection.request(method, path, raw, headers)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    
+    yield request
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+def test_plays_a_game_to_its_end(tk, api):
+    status, view = api("POST", "/api/sessions", {"name": "Ann"})
+    assert status == 201
+    key = view["session"]
+    assert view["scene"] == "entrance"
+    assert view["player"]["name"] == "Ann"
+    for choice in tk.BENCH_SCRIPTS[SCRIPT].split():
+        assert choice in [option["key"] for option in view["options"]]
+        status, view = api("POST", f"/api/sessions/{key}/choice", {"choice": choice})
+        assert status == 200
+    assert view["player"]["ending"] == SCRIPT
+    status, view = api("POST", f"/api/sessions/{key}/choice", {"choice": "2"})
+    assert view["over"] is True
+    assert api("POST", f"/api/sessions/{key}/choice", {"choice": "1"})[0] == 409
+
+def test_name_prompt_and_view(tk, api):
+    status, view = api("POST", "/api/sessions")
+    key = view["session"]
+    assert view["asks_name"] is True
+    assert view["options"] == []
+    assert api("POST", f"/api/sessions/{key}/choice", {"choice": "1"})[0] == 400
+    status, view = api("POST", f"/api/sessions/{key}/name", {"name": "Bo"})
+    assert status == 200
+    assert view["player"]["name"] == "Bo"
+    assert api("POST", f"/api/sessions/{key}/name", {"name": "Bo"})[0] == 409
+    status, view = api("GET", f"/api/sessions/{key}")
+    assert status == 200
+    assert view["scene"] == "entrance"
+    assert view["pages"] == [""]
+
+def test_bad_requests(tk, api):
+    key = api("POST", "/api/sessions", {"name": "Ann"})[1]["session"]
+    status, reply = api("POST", f"/api/sessions/{key}/choice", {"choice": "9"})
+    assert status == 400
+    assert reply["error"].startswith("Choose one of: 1, ")
+    assert api("POST", f"/api/sessions/{key}/choice", {"choice": 1})[0] == 400
+    assert api("POST", f"/api/sessions/{key}/choice", raw=b"{not json")[0] == 400
+    assert api("POST", f"/api/sessions/{key}/choice", raw=b"[1]")[0] == 400
+    assert api("POST", f"/api/sessions/{key}/choice", raw=b" " * 5000)[0] == 413
+    assert api("GET", "/api/games")[0] == 404
+    assert api("GET", "/api/sessions/no-such-session")[0] == 404
+    assert api("GET", f"/api/sessions/{key}/choice")[0] == 405
+
+def test_delete_ends_a_session(tk, api):
+    key = api("POST", "/api/sessions", {"name": "Ann"})[1]["session"]
+    assert api("DELETE", f"/api/sessions/{key}") == (200, {"session": key, "over": True})
+    assert api("GET", f"/api/sessions/{key}")[0] == 404
+    assert api("DELETE", f"/api/sessions/{key}")[0] == 404
@@ -0,0 +1,95 @@
+import os
+import time
+
+import pytest
+
+@pytest.fixture
+def pipe(tk):
+    """An InputReader on a pipe, and the pipe's write end."""
+    read, write = os.pipe()
+    yield tk.InputReader(read), write
+    os.close(read)
+    try:
+        os.close(write)
+    except OSError:
+        pass
+
+def test_lines_arriving_together_are_all_read(tk, pipe):
+    reader, write = pipe
+    os.write(write, b"1\r\n2\n3\n")
+    assert [reader.read_line(1) for _ in range(3)] == ["1", "2", "3"]
+
+def test_end_of_input_ends_the_session(tk, pipe):
+    reader, write = pipe
+    os.write(write, b"1\nlast")
+    os.close(write)
+    assert reader.read_line() == "1"
+    assert reader.read_line() == "last"
+    with pytest.raises(tk.SessionEnded):
+        reader.read_line()
+    with pytest.raises(tk.SessionEnded):
+        reader.read_line()
+
+def test_timeout_raises_input_timeout(tk, pipe):
+    reader, write = pipe
+    os.write(write, b"half a li")
+    started = time.monotonic()
+    with pytest.raises(tk.InputTimeout):
+        reader.read_line(0.1)
+    assert 0.1 <= time.monotonic() - started < 2
+    os.write(write, b"ne\n")
+    assert reader.read_line(1) == "half a line"
+
+def test_type_ahead_answers_the_next_prompt(tk, pipe):
+    reader, _ = pipe
+    reader.feed(b"12\x7f3\n4")
+    assert reader.read_line(0.1) == "13"
+    with pytest.raises(tk.InputTimeout):
+        reader.read_line(0.05)
+
+def test_backspace_never_crosses_a_line(tk, pipe):
+    reader, _ = pipe
+    reader.feed(b"1\n\x7f\x7f2\n")
+    assert reader.read_line(0.1) == "1"
+    assert reader.read_line(0.1) == "2"
+
+def test_type_ahead_is_echoed_on_a_terminal(tk, pipe):
+    reader, _ = pipe
+    reader.feed(b"ab")
+    assert reader.echo() == ""
+    reader.tty = True
+    assert reader.echo() == "ab"
+    reader.feed(b"c\nd")
+    assert reader.echo() == "abc\n"
+
+def play(tk, reader, **options):
+    """Play a terminal game from reader, drawn into os.devnull; returns it as it stopped."""
+    class Console(tk.Console):
+        def sleep(self, seconds):
+            pass
+    
+    fd = os.open(os.devnull, os.O_WRONLY)
+    try:
+        renderer = tk.Renderer(fd, instant=True, reader=reader)
+        game = tk.TimekeeperChronicles(Console(renderer, reader=reader, **options))
+        with pytest.raises(tk.SessionEnded) as ended:
+            game.start_game()
+    finally:
+        os.close(fd)
+    return game, ended.value
+
+def test_game_ends_cleanly_at_end_of_input(tk, pipe):
+    reader, write = pipe
+    os.write(write, b"Ann\nENTER 1 2\n")
+    os.close(write)
+    game, ended = play(tk, reader)
+    assert type(ended) is tk.SessionEnded
+    assert game.state.player_name == "Ann"
+    assert game.state == tk.play_headless(["1", "2"], name="Ann").state
+
+def test_game_gives_up_on_a_silent_player(tk, pipe):
+    reader, write = pipe
+    os.write(write, b"Ann\nENTER\n")
+    game, ended = play(tk, reader, timeout=0.1)
+    assert type(ended) is tk.InputTimeout
+    assert game.state.scene == "entrance"
@@ -0,0 +1,96 @@
+import pytest
+
+SCRIPT = "SECRET ENDING: The Enlightened"
+
+def journaled(tk, path, choices, **options):
+    """Play a headless game into a journal at path and return it."""
+    journal = tk.Journal(path)
+    try:
+        game = tk.TimekeeperChronicles(tk.HeadlessConsole(choices, "Ann"), journal=journal,
+                                       **options)
+        try:
+            game.start_game()
+        except tk.SessionEnded:
+            pass
+    finally:
+        journal.close()
+    return game
+
+def test_replay_rebuilds_the_game(tk, tmp_path):
+    path = tmp_path / "game.journal"
+    game = journaled(tk, path, tk.BENCH_SCRIPTS[SCRIPT].split())
+    state, choices = tk.replay(tk.read_journal(path))
+    assert choices == len(tk.BENCH_SCRIPTS[SCRIPT].split())
+    assert state == game.state
+    assert state.ending == SCRIPT
+
+def test_replay_can_stop_part_way(tk, tmp_path):
+    path = tmp_path / "game.journal"
+    script = tk.BENCH_SCRIPTS[SCRIPT].split()
+    journaled(tk, path, script)
+    state, choices = tk.replay(tk.read_journal(path), stop=6)
+    assert choices == 6
+    assert state == tk.play_headless(script[:6], name="Ann").state
+
+def test_sessions_are_appended(tk, tmp_path):
+    path = tmp_path / "game.journal"
+    journaled(tk, path, ["1", "2"])
+    second = journaled(tk, path, ["4", "4", "4"])
+    entries = tk.read_journal(path)
+    assert [kind for kind, _ in entries].count("session") == 2
+    assert entries.count(("choice", "1")) == 1
+    state, choices = tk.replay(entries)
+    assert choices == 3
+    assert state == second.state
+
+def test_torn_last_line_is_dropped(tk, tmp_path):
+    path = tmp_path / "game.journal"
+    first = journaled(tk, path, ["1", "2"])
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("choi")
+    assert tk.replay(tk.read_journal(path))[0] == first.state
+    second = journaled(tk, path, ["3"])
+    assert "choi" not in path.read_text(encoding="utf-8").split("\n")
+    assert tk.replay(tk.read_journal(path))[0] == second.state
+
+def test_continued_game_starts_from_its_save(tk, tmp_path):
+    save = tmp_path / "game.sav"
+    path = tmp_path / "game.journal"
+    script = tk.BENCH_SCRIPTS[SCRIPT].split()
+    tk.play_headless(script[:8], save_path=str(save))
+    journal = tk.Journal(path)
+    game = tk.play_headless(script[8:], load_path=str(save), journal=journal)
+    journal.close()
+    assert tk.replay(tk.read_journal(path))[0] == game.state
+
+def test_rewinds_replay(tk, tmp_path):
+    path = tmp_path / "game.journal"
+    game = journaled(tk, path, ["1", "2", "3", "r 2", "4"], rewind=True)
+    assert tk.replay(tk.read_journal(path))[0] == game.state
+    assert game.state == tk.play_headless(["1", "4"], name="Ann").state
+
+def test_replay_refuses_a_choice_not_on_offer(tk):
+    entries = [("session", "now"), ("name", "Ann"), ("choice", "9")]
+    with pytest.raises(ValueError, match="not on offer"):
+        tk.replay(entries)
+
+def test_continue_without_autosave(tk, capsys):
+    assert tk.continue_game(save_path=None, journal_path=None) is False
+    assert "Autosave is off" in capsys.readouterr().out
+
+@pytest.mark.parametrize("torn", ["state " + "ab" * 5000, "x" * 4096, "x" * 4095])
+def test_long_torn_last_line_is_dropped(tk, tmp_path, torn):
+    path = tmp_path / "game.journal"
+    first = journaled(tk, path, ["1", "2"])
+    kept = path.read_bytes()
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(torn)
+    tk._drop_torn_line(path)
+    assert path.read_bytes() == kept
+    assert tk.replay(tk.read_journal(path))[0] == first.state
+
+def test_journal_that_is_all_torn_line_is_emptied(tk, tmp_path):
+    path = tmp_path / "game.journal"
+    path.write_text("session " + "x" * 10000, encoding="utf-8")
+    tk._drop_torn_line(path)
+    assert path.read_bytes() == b""
@@ -0,0 +1,69 @@
+import re
+
+SCRIPT = "PERFECT ENDING: Master of Balance"
+SAMPLE = re.compile(r'(timekeeper_[a-z_]+)(\{[a-z]+="(?:[^"\\]|\\.)*"(?:,[a-z]+="(?:[^"\\]|\\.)*")*\})? '
+                    r'(-?\d+(?:\.\d+)?)')
+
+def measured(tk, monkeypatch, choices):
+    """Metrics for one headless game where every answer takes two seconds."""
+    clock = [0.0]
+    
+    class Slow(tk.HeadlessConsole):
+        def read_line(self, prompt):
+            clock[0] += 2
+            return super().read_line(prompt)
+    
+    metrics = tk.Metrics(clock=lambda: clock[0])
+    monkeypatch.setattr(tk, "METRICS", metrics)
+    game = tk.TimekeeperChronicles(Slow(choices))
+    try:
+        game.start_game()
+    except tk.SessionEnded:
+        pass
+    return metrics
+
+def samples(text):
+    """{(name, labels): value} of every sample in Prometheus text."""
+    found = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = SAMPLE.fullmatch(line)
+        assert match, line
+        found[match.group(1), match.group(2) or ""] = float(match.group(3))
+    return found
+
+def test_prometheus_counts_a_game(tk, monkeypatch):
+    script = tk.BENCH_SCRIPTS[SCRIPT].split()
+    found = samples(measured(tk, monkeypatch, ["9"] + script).prometheus())
+    assert found["timekeeper_games_total", ""] == 1
+    assert found["timekeeper_endings_total", f'{{ending="{SCRIPT}"}}'] == 1
+    assert found["timekeeper_invalid_inputs_total", '{scene="entrance"}'] == 1
+    assert found["timekeeper_choices_total", f'{{scene="entrance",choice="{script[0]}"}}'] >= 1
+    assert sum(value for (name, _), value in found.items()
+               if name == "timekeeper_choices_total") == len(script)
+    # Every answer took two seconds, and the last was the ending's.
+    seconds = sum(value for (name, _), value in found.items()
+                  if name == "timekeeper_scene_seconds_total")
+    assert seconds == 2 * (len(script) + 1)
+    assert found["timekeeper_chapter_stat_count", '{chapter="2",stat="knowledge"}'] == 1
+    assert found["timekeeper_sessions_hibernated_total", ""] == 0
+
+def test_every_metric_has_help_and_type(tk, monkeypatch):
+    lines = measured(tk, monkeypatch, ["1", "2"]).prometheus().splitlines()
+    names = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    assert {line.split()[2] for line in lines if line.startswith("# HELP")} == names
+    for line in lines:
+        if not line.startswith("#"):
+            name = line.split("{")[0].split()[0]
+            assert name in names or name.rsplit("_", 1)[0] in names, line
+
+def test_labels_are_escaped(tk):
+    assert tk._label('a "b" \\ c\nd') == '"a \\"b\\" \\\\ c\\nd"'
+
+def test_save_writes_the_text(tk, monkeypatch, tmp_path):
+    metrics = measured(tk, monkeypatch, ["1"])
+    path = tmp_path / "timekeeper.prom"
+    metrics.save(str(path))
+    assert path.read_text(encoding="utf-8") == metrics.prometheus()
+    assert not (tmp_path / "timekeeper.prom.tmp").exists()
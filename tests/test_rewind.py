@@ -0,0 +1,33 @@
+SCRIPT = "GAME OVER: Heat Exhaustion"
+
+def played(tk, choices):
+    """A headless game that can rewind, after choices."""
+    game = tk.TimekeeperChronicles(tk.HeadlessConsole(choices, "Ann"), rewind=True)
+    try:
+        game.start_game()
+    except tk.SessionEnded:
+        pass
+    return game
+
+def test_rewind_takes_back_choices(tk):
+    game = played(tk, ["1", "2", "3", "r 2"])
+    assert game.state == tk.play_headless(["1"], name="Ann").state
+    assert len(game.history) == 1
+
+def test_rewind_stops_at_play_again(tk):
+    script = tk.BENCH_SCRIPTS[SCRIPT].split()
+    game = played(tk, script + ["1", "2", "r 5"])
+    assert len(game.history) == 0
+    assert game.state == tk.play_headless([], name="Ann").state
+    assert game.rewind(len(script)) == 0
+    assert game.state.scene == "entrance"
+
+def test_history_is_cut_back(tk, monkeypatch):
+    monkeypatch.setattr(tk, "REWIND_DEPTH", 3)
+    script = tk.BENCH_SCRIPTS[SCRIPT].split()
+    game = played(tk, script)
+    kept = len(game.history)
+    assert 3 <= kept <= 6
+    taken = game.rewind(len(script))
+    assert taken == kept
+    assert game.state == tk.play_headless(script[:len(script) - taken], name="Ann").state
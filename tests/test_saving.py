@@ -0,0 +1,65 @@
+import struct
+
+import pytest
+
+def played(tk, script, count):
+    """A game's state after the first count choices of a benchmark script."""
+    state = tk.STORY.new_game("Zoë")
+    for choice in tk.BENCH_SCRIPTS[script].split()[:count]:
+        tk.STORY.advance(state, choice)
+    return state
+
+def test_pack_round_trip(tk):
+    for script in tk.BENCH_SCRIPTS:
+        for count in (0, 5, 11):
+            state = played(tk, script, count)
+            assert tk.GameState.unpack(state.pack()) == state
+            assert tk.GameState.unpack(state.pack()).player_name == "Zoë"
+
+def test_save_is_small_and_tagged(tk):
+    data = played(tk, "SECRET ENDING: The Enlightened", 12).pack()
+    assert data[:4] == b"TKCS"
+    assert len(data) < 80
+
+def test_corrupt_save_is_rejected(tk):
+    data = bytearray(played(tk, "GOOD ENDING: Harmony Restored", 8).pack())
+    data[-1] ^= 1
+    with pytest.raises(ValueError, match="corrupt"):
+        tk.GameState.unpack(bytes(data))
+
+def test_bad_saves_are_rejected(tk):
+    data = played(tk, "GOOD ENDING: Harmony Restored", 8).pack()
+    with pytest.raises(ValueError, match="truncated"):
+        tk.GameState.unpack(data[:10])
+    with pytest.raises(ValueError, match="Not a Timekeeper"):
+        tk.GameState.unpack(b"XXXX" + data[4:])
+    with pytest.raises(ValueError, match="version"):
+        tk.GameState.unpack(data[:4] + bytes([99]) + data[5:])
+    # A body with a valid checksum but a string running past its end
+    body = data[9:] + b"!"
+    header = struct.pack("<4sBI", b"TKCS", 1, tk.zlib.crc32(body))
+    with pytest.raises(ValueError, match="length"):
+        tk.GameState.unpack(header + body)
+
+def test_save_and_load_game(tk, tmp_path):
+    path = tmp_path / "game.sav"
+    state = played(tk, "PERFECT ENDING: Master of Balance", 9)
+    tk.save_game(state, path)
+    assert tk.load_game(path) == state
+    assert not (tmp_path / "game.sav.tmp").exists()
+
+def test_load_rejects_a_save_not_at_a_menu(tk, tmp_path):
+    path = tmp_path / "game.sav"
+    state = played(tk, "GOOD ENDING: Harmony Restored", 3)
+    state.scene = "no_such_scene"
+    tk.save_game(state, path)
+    with pytest.raises(ValueError, match="menu"):
+        tk.load_game(path)
+
+def test_autosave_resumes_where_play_stopped(tk, tmp_path):
+    path = str(tmp_path / "auto.sav")
+    script = tk.BENCH_SCRIPTS["ORDER ENDING: The Perfect Clock"].split()
+    first = tk.play_headless(script[:7], save_path=path)
+    assert tk.load_game(path).scene == first.state.scene
+    rest = tk.play_headless(script[7:], load_path=path)
+    assert rest.state.ending == "ORDER ENDING: The Perfect Clock"
@@ -0,0 +1,112 @@
+import asyncio
+
+SCRIPT = "PERFECT ENDING: Master of Balance"
+
+async def play(port, choices, name="Ann"):
+    """Play a game over TCP, answering prompts from choices; returns all output.
+    
+    The player hangs up when the choices run out.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    choices = iter(choices)
+    shown = b""
+    try:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return shown.decode()
+            shown += chunk
+            # Every prompt leaves the cursor on its line.
+            if shown.endswith(b"\n"):
+                continue
+            if shown.endswith(b"Your choice: "):
+                answer = next(choices, None)
+                if answer is None:
+                    return shown.decode()
+            elif shown.endswith(b"> "):
+                answer = name
+            else:
+                answer = ""
+            writer.write(answer.encode() + b"\n")
+    finally:
+        writer.close()
+
+def serve(tk, test, **options):
+    """Run test(server, port) against a server on a free port, then shut it down."""
+    async def run():
+        server = tk.GameServer(port=0, **options)
+        port = await server.start()
+        try:
+            return await test(server, port)
+        finally:
+            await server.shutdown()
+    return asyncio.run(run())
+
+def test_plays_a_game_to_its_end(tk):
+    script = tk.BENCH_SCRIPTS[SCRIPT].split()
+    
+    async def test(server, port):
+        return await play(port, script + ["2"])
+    
+    shown = serve(tk, test)
+    assert f"ENDING: {SCRIPT}" in shown
+    assert "HERO: Ann" in shown
+    assert "THANK YOU FOR PLAYING!" in shown
+
+def test_many_players_at_once(tk):
+    scripts = list(tk.BENCH_SCRIPTS.items())
+    
+    async def test(server, port):
+        shown = await asyncio.gather(*(play(port, script.split() + ["2"])
+                                       for _, script in scripts * 5))
+        return shown, server.peak
+    
+    shown, peak = serve(tk, test)
+    for (ending, _), text in zip(scripts * 5, shown):
+        assert f"ENDING: {ending}" in text
+    assert peak > 1
+
+def test_refused_answers_and_rewinds(tk):
+    async def test(server, port):
+        return await play(port, ["9", "1", "r", "2", "4"])
+    
+    shown = serve(tk, test)
+    assert "Please enter one of: " in shown
+    assert "1 choice undone" in shown
+
+def test_idle_players_are_dropped(tk):
+    async def test(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            prompt = await tk._read_prompt(reader)
+            farewell = await reader.read()
+        finally:
+            writer.close()
+        return prompt, farewell
+    
+    prompt, farewell = serve(tk, test, idle_timeout=0.2)
+    assert prompt.endswith("> ")
+    assert b"Idle for too long" in farewell
+
+def test_overlong_lines_end_the_session(tk):
+    async def test(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            await tk._read_prompt(reader)
+            writer.write(b"x" * 300 + b"\n")
+            return await reader.read()
+        finally:
+            writer.close()
+    
+    assert serve(tk, test, line_limit=64) == b""
+
+def test_shutdown_says_goodbye(tk):
+    async def test(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await tk._read_prompt(reader)
+        await server.shutdown()
+        farewell = await reader.read()
+        writer.close()
+        return farewell
+    
+    assert b"The server is shutting down" in serve(tk, test)
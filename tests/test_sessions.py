@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+class Clock:
+    """A monotonic clock tests move by hand."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+def started(tk, moves=("1", "2")):
+    """A browser game named and a few moves in, as the API plays one."""
+    game = tk.TimekeeperChronicles(tk.SessionConsole())
+    game.enter("start")
+    game.give_name("Ann")
+    for move in moves:
+        game.choose(move)
+    game.console.take_pages()
+    return game
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def test_idle_sessions_expire(tk, clock):
+    store = tk.SessionStore(capacity=10, ttl=100, clock=clock)
+    key = store.add(started(tk))
+    clock.now += 60
+    assert store.get(key) is not None
+    clock.now += 60
+    assert store.get(key) is not None
+    clock.now += 101
+    assert store.get(key) is None
+    assert len(store) == 0
+
+def test_least_recently_used_goes_first(tk, clock):
+    store = tk.SessionStore(capacity=2, ttl=0, clock=clock)
+    first, second = store.add(started(tk)), store.add(started(tk))
+    store.get(first)
+    third = store.add(started(tk))
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+
+def test_idle_sessions_hibernate_and_wake(tk, clock, tmp_path):
+    store = tk.SessionStore(capacity=10, ttl=600, clock=clock, hibernate_after=30,
+                            hibernate_dir=str(tmp_path))
+    game = started(tk)
+    before = game.state.astuple()
+    key = store.add(game)
+    clock.now += 31
+    store.tidy()
+    assert len(store) == 0 and store.asleep == 1
+    assert os.listdir(tmp_path) == [key]
+    woken = store.get(key)
+    assert woken.game is not game
+    assert woken.game.state.astuple() == before
+    assert store.asleep == 0 and os.listdir(tmp_path) == []
+    woken.game.choose("1")
+    assert woken.game.state.astuple() != before
+
+def test_sessions_past_capacity_hibernate(tk, clock, tmp_path):
+    store = tk.SessionStore(capacity=1, ttl=600, clock=clock, hibernate_after=600,
+                            hibernate_dir=str(tmp_path))
+    first = store.add(started(tk))
+    second = store.add(started(tk, ["1"]))
+    assert len(store) == 1 and store.asleep == 1
+    assert store.get(first).game.state.astuple() == started(tk).state.astuple()
+    store.tidy()
+    assert len(store) == 1 and os.listdir(tmp_path) == [second]
+
+def test_hibernated_sessions_expire(tk, clock, tmp_path):
+    store = tk.SessionStore(capacity=10, ttl=60, clock=clock, hibernate_after=10,
+                            hibernate_dir=str(tmp_path))
+    key = store.add(started(tk))
+    clock.now += 11
+    store.tidy()
+    path = tmp_path / key
+    os.utime(path, (path.stat().st_atime - 120, path.stat().st_mtime - 120))
+    store.next_sweep = 0
+    store.tidy()
+    assert store.asleep == 0 and os.listdir(tmp_path) == []
+    assert store.get(key) is None
+
+def test_failed_hibernation_keeps_the_game(tk, clock, tmp_path):
+    folder = tmp_path / "sessions"
+    store = tk.SessionStore(capacity=1, ttl=0, clock=clock, hibernate_after=30,
+                            hibernate_dir=str(folder))
+    first = store.add(started(tk))
+    folder.rmdir()
+    second = store.add(started(tk))
+    assert len(store) == 2 and store.asleep == 0
+    clock.now += 31
+    store.tidy()
+    assert store.get(first) is not None and store.get(second) is not None
+
+def test_files_are_written_without_the_store_lock(tk, clock, tmp_path, monkeypatch):
+    store = tk.SessionStore(capacity=10, ttl=600, clock=clock, hibernate_after=30,
+                            hibernate_dir=str(tmp_path))
+    store.add(started(tk))
+    hibernate = tk.TimekeeperChronicles.hibernate
+    
+    def unlocked(game):
+        assert not store.lock.locked()
+        return hibernate(game)
+    
+    monkeypatch.setattr(tk.TimekeeperChronicles, "hibernate", unlocked)
+    clock.now += 31
+    store.tidy()
+    assert store.asleep == 1
+
+def test_session_asked_for_while_leaving_stays(tk, clock, tmp_path):
+    store = tk.SessionStore(capacity=10, ttl=600, clock=clock, hibernate_after=30,
+                            hibernate_dir=str(tmp_path))
+    key = store.add(started(tk))
+    clock.now += 31
+    with store.lock:
+        leaving = store._evict(clock())
+    assert store.get(key) is not None
+    store._hibernate(leaving, clock())
+    assert len(store) == 1 and store.asleep == 0 and os.listdir(tmp_path) == []
+    assert store.get(key) is not None
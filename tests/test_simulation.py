@@ -0,0 +1,33 @@
+import random
+
+def report(tk, capsys, workers, seed=7):
+    """run_simulator's report, bar its first line (which has the timing)."""
+    tk.run_simulator(3000, "random", seed, workers)
+    return capsys.readouterr().out.split("\n", 1)[1]
+
+def test_same_seed_same_report_whatever_the_workers(tk, capsys, monkeypatch):
+    monkeypatch.setattr(tk, "SIMULATION_CHUNK", 250)
+    alone = report(tk, capsys, 1)
+    assert report(tk, capsys, 2) == alone
+    assert report(tk, capsys, 3) == alone
+    assert report(tk, capsys, 1, seed=8) != alone
+
+def test_counts_every_game(tk, monkeypatch):
+    monkeypatch.setattr(tk, "SIMULATION_CHUNK", 100)
+    for policy in tk.POLICIES:
+        endings, achievements, stats = tk.run_simulation(1050, policy, seed=1, workers=1)
+        assert sum(endings.values()) == 1050
+        assert all(sum(counts.values()) == 1050 for counts in stats.values())
+        assert all(count <= 1050 for count in achievements.values())
+
+def test_simulated_games_replay_headless(tk):
+    taken = []
+    
+    def policy(rng, state, options, tried):
+        taken.append(tk.curious_policy(rng, state, options, tried))
+        return taken[-1]
+    
+    for seed in range(20):
+        taken.clear()
+        state = tk.simulate(policy, random.Random(seed))
+        assert tk.play_headless(taken).state == state
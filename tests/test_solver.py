@@ -0,0 +1,37 @@
+def played(tk, path, state=None):
+    """The state a list of menu keys leads to."""
+    state = tk.STORY.new_game() if state is None else state.copy()
+    for choice in path:
+        assert choice in tk.STORY.options(state)
+        tk.STORY.advance(state, choice)
+    return state
+
+def test_paths_are_as_short_as_explore_finds(tk, solver):
+    _, _, endings = tk.explore()
+    assert sorted(endings) == solver.endings
+    for ending, shortest in endings.items():
+        path = solver.solve(ending)
+        assert len(path) == len(shortest)
+        assert played(tk, path).ending == ending
+
+def test_mid_game_lookups_match_the_search(tk, solver):
+    for script in ("GAME OVER: Heat Exhaustion", "SECRET ENDING: The Enlightened"):
+        keys = tk.BENCH_SCRIPTS[script].split()
+        for count in (3, 9):
+            state = played(tk, keys[:count])
+            for ending in solver.endings:
+                path = solver.solve(ending, state)
+                searched = solver.search(ending, state)
+                assert (path is None) == (searched is None)
+                if path is not None:
+                    assert len(path) == len(searched)
+                    assert played(tk, path, state).ending == ending
+
+def test_states_off_the_graph_are_searched(tk, solver):
+    state = tk.STORY.new_game()
+    state.knowledge = state.courage = state.compassion = 70
+    state.flags |= tk.FLAG_BITS["saved_owl"]
+    assert solver.graph.find(state) is None
+    path = solver.solve("SECRET ENDING: The Enlightened", state)
+    assert path == solver.search("SECRET ENDING: The Enlightened", state)
+    assert played(tk, path, state).ending == "SECRET ENDING: The Enlightened"
@@ -0,0 +1,38 @@
+import pytest
+
+RANGES = {"owl_courage": [10, 20], "organic_compassion": [30, 50], "secret_knowledge": [50, 70]}
+
+def test_cached_sweep_matches_fresh_evaluation(tk):
+    sweeper = tk.ThresholdSweep(300, seed=5)
+    swept = list(sweeper.sweep(RANGES))
+    assert len(swept) == 8
+    for values, endings in swept:
+        assert endings == tk.ThresholdSweep(300, seed=5).evaluate(values), values
+        assert sum(endings.values()) == 300
+    # Chapter 1 is played once per Chapter 1 value, and so on down.
+    assert sweeper.replays == {1: 2, 2: 4, 3: 8}
+
+def test_going_back_to_earlier_values_still_matches(tk):
+    sweeper = tk.ThresholdSweep(200, seed=2, policy="curious")
+    for values in ({"secret_courage": 10}, {"forge_courage": 0}, {"secret_courage": 10}, {}):
+        assert sweeper.evaluate(values) == tk.ThresholdSweep(200, 2, "curious").evaluate(values)
+
+def test_defaults_play_the_real_story(tk):
+    sweeper = tk.ThresholdSweep(200, seed=1)
+    defaults = {name: threshold[3] for name, threshold in tk.THRESHOLDS.items()}
+    assert sweeper.evaluate(defaults) == sweeper.evaluate({})
+    assert tk.Story(tk.tuned_scenes(defaults)).scenes.keys() == tk.STORY.scenes.keys()
+
+def test_tuned_scenes_change_only_their_threshold(tk):
+    scenes = tk.tuned_scenes({"secret_knowledge": 55})
+    assert "knowledge >= 55" in repr(scenes["final"])
+    assert "knowledge >= 70" not in repr(scenes["final"])
+    assert "courage >= 70" in repr(scenes["final"])
+    assert all(scenes[name] is tk.SCENES[name] for name in tk.SCENES if name != "final")
+
+def test_parse_sweep_range(tk):
+    assert tk.parse_sweep_range("owl_courage=10:30:10") == ("owl_courage", [10, 20, 30])
+    assert tk.parse_sweep_range("owl_courage=5,15") == ("owl_courage", [5, 15])
+    for bad in ("nope=1:2", "owl_courage=a:b", "owl_courage=30:10"):
+        with pytest.raises(ValueError):
+            tk.parse_sweep_range(bad)
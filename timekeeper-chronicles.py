@@ -1,913 +1,6274 @@
+import argparse
+import array
+import asyncio
+import atexit
+import bisect
+import csv
+import functools
+import gc
+import gzip
+import heapq
+import io
+import itertools
+import json
+import mmap
+import platform
+import random
+import re
+import secrets
+import selectors
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import unicodedata
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import time
+import tracemalloc
 import os
+import zlib
+
+try:
+    import select
+    import termios
+    import tty
+except ImportError:  # Windows
+    termios = None
+try:
+    import msvcrt
+except ImportError:  # Not Windows
+    msvcrt = None
+try:
+    import numpy as np
+except ImportError:  # Only the batch engine needs NumPy
+    np = None
+
+# ANSI escape sequences used to draw the screen in-process.
+CLEAR = "\x1b[H\x1b[2J"
+HOME = "\x1b[H"
+ERASE_LINE = "\x1b[2K"
+ERASE_BELOW = "\x1b[J"
 
 def clear_screen():
     """Clear the terminal screen."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if ansi_supported(sys.stdout.fileno()):
+        sys.stdout.write(CLEAR)
+    else:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+@functools.lru_cache(maxsize=None)
+def ansi_supported(fd):
+    """Check whether a file descriptor is a terminal that understands ANSI."""
+    if not os.isatty(fd) or os.environ.get("TERM", "") == "dumb":
+        return False
+    if os.name == "nt":
+        return _enable_windows_ansi(fd)
+    return True
+
+def _enable_windows_ansi(fd):
+    """Turn on escape sequence support in a Windows console."""
+    try:
+        import ctypes
+        import msvcrt as console_handles
+        kernel32 = ctypes.windll.kernel32
+        handle = console_handles.get_osfhandle(fd)
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+def display_width(line):
+    """Number of terminal columns a line takes up."""
+    width = 0
+    for char in line:
+        if unicodedata.combining(char) or char == "\ufe0f":
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in "WF" else 1
+    return width
+
+def type_text(text, delay=0.03):
+    """Print text with typing effect."""
+    sys.stdout.flush()
+    renderer = Renderer()
+    renderer.type_text(text, delay)
+    renderer.flush()
+
+def format_banner(title):
+    """Build the banner text for each scene."""
+    width = 60
+    return "\n" + "=" * width + "\n" + f"{title:^{width}}" + "\n" + "=" * width
+
+def format_scene_banner(scene_name):
+    """Build the scene-specific banner text."""
+    return f"""
+    ╔══════════════════════════════════════════════════════╗
+    ║                    {scene_name:^36}                  ║
+    ╚══════════════════════════════════════════════════════╝
+    """
+
+def print_banner(title):
+    """Print a beautiful banner for each scene."""
+    print(format_banner(title))
+
+def print_scene_banner(scene_name):
+    """Print scene-specific banner."""
+    print(format_scene_banner(scene_name))
+
+# ==================== RENDERER ====================
+
+class Renderer:
+    """Draws game text in buffered chunks instead of character by character.
+    
+    Lines are collected and sent with a single os.write when the game waits
+    for the player. Typed text is drawn frame by frame: each frame writes
+    every character that is due by then, `fps` times a second, instead of
+    one print, flush and sleep per character. `instant` turns the typing
+    effect off, and pressing any key while text is typing shows the rest of
+    the screen at once. Keys other than Enter and space are also passed to
+    `reader` as type-ahead for the next prompt. `writes` counts the write syscalls made so far and
+    `scene_writes` how many each screen needed. Everything drawn also goes
+    to `broadcast`, if given, for spectators to watch.
+    """
+    
+    def __init__(self, fd=None, fps=15, instant=False, clock=time.monotonic,
+                 wait=None, reader=None, broadcast=None):
+        self.fd = sys.stdout.fileno() if fd is None else fd
+        self.broadcast = broadcast
+        self.reader = reader or STDIN
+        self.fps = fps
+        self.instant = instant
+        self.clock = clock
+        self.wait = wait or self.wait_for_key
+        self.buffer = []
+        self.writes = 0
+        self.scene_start = 0
+        self.scene_writes = []
+        self.skipping = False
+    
+    def write(self, text):
+        """Queue text to be drawn with the next frame."""
+        self.buffer.append(text)
+    
+    def flush(self):
+        """Draw everything queued in one write."""
+        if self.buffer:
+            data = "".join(self.buffer).encode()
+            self.buffer.clear()
+            self.write_now(data)
+    
+    def write_now(self, data):
+        """Write bytes straight to the terminal, counting each syscall."""
+        if self.broadcast is not None:
+            self.broadcast.write(data)
+        while data:
+            written = os.write(self.fd, data)
+            self.writes += 1
+            data = data[written:]
+    
+    def echo(self, text):
+        """Show spectators a line the player typed, which only the player's terminal echoed."""
+        if self.broadcast is not None:
+            self.broadcast.write((text + "\n").encode())
+    
+    def keyframe(self):
+        """Note that the next frame draws the whole screen, for spectators to start from."""
+        if self.broadcast is not None:
+            self.broadcast.mark()
+    
+    def type_text(self, text, delay=0.03):
+        """Type a line out, one frame of characters at a time."""
+        if self.instant or self.skipping or delay <= 0 or not text:
+            self.buffer.append(text + "\n")
+            return
+        
+        self.flush()
+        frame = 1 / self.fps
+        start = self.clock()
+        shown = 0
+        with self.watching_keys():
+            while shown < len(text):
+                due = min(len(text), int((self.clock() - start) / delay) + 1)
+                if due > shown:
+                    self.write_now(text[shown:due].encode())
+                    shown = due
+                if shown < len(text) and self.wait(frame):
+                    self.skipping = True
+                    break
+        self.buffer.append(text[shown:] + "\n")
+    
+    def ready_for_input(self):
+        """Draw what is left before the player is asked for something."""
+        self.flush()
+        self.skipping = False
+    
+    def end_scene(self):
+        """Draw what is left and record how many writes the screen took."""
+        self.flush()
+        self.scene_writes.append(self.writes - self.scene_start)
+        self.scene_start = self.writes
+        self.skipping = False
+    
+    def watching_keys(self):
+        """Let single keypresses through while text is typing."""
+        if termios is None or not os.isatty(sys.stdin.fileno()):
+            return _NoKeys()
+        return _CbreakMode(sys.stdin.fileno())
+    
+    def wait_for_key(self, timeout):
+        """Wait one frame; return True if a key was pressed."""
+        if msvcrt is not None:
+            time.sleep(timeout)
+            if msvcrt.kbhit():
+                msvcrt.getwch()
+                return True
+            return False
+        if termios is None or not os.isatty(sys.stdin.fileno()):
+            time.sleep(timeout)
+            return False
+        fd = sys.stdin.fileno()
+        if select.select([fd], [], [], timeout)[0]:
+            keys = os.read(fd, 64)
+            # Enter and space only skip the typing; other keys answer the next prompt.
+            if keys.strip():
+                self.reader.feed(keys)
+            return True
+        return False
+
+class _NoKeys:
+    """Stand-in for _CbreakMode when there is no terminal to watch."""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+class _CbreakMode:
+    """Switch the terminal to unechoed single-key input for a while."""
+    
+    def __init__(self, fd):
+        self.fd = fd
+        self.saved = None
+    
+    def __enter__(self):
+        self.saved = termios.tcgetattr(self.fd)
+        tty.setcbreak(self.fd)
+        new = termios.tcgetattr(self.fd)
+        new[3] &= ~termios.ECHO
+        termios.tcsetattr(self.fd, termios.TCSANOW, new)
+        return self
+    
+    def __exit__(self, *exc):
+        termios.tcsetattr(self.fd, termios.TCSANOW, self.saved)
+        return False
+
+# ==================== SCREEN ====================
+
+class Screen:
+    """Remembers what is on the terminal so redraws only touch what changed.
+    
+    Every clear starts a new frame. On an ANSI terminal the cursor is sent
+    home instead of wiping the screen, and each line is compared with the
+    line that used to be in its place: unchanged lines are stepped over and
+    changed ones are erased and redrawn, so returning to a menu only redraws
+    things like the stats bar. Anything left over below the new frame is
+    erased when the game waits for input. If the old frame scrolled or
+    wrapped, the screen is cleared in full; a terminal without ANSI support
+    just gets a blank line between frames.
+    """
+    
+    def __init__(self, renderer, ansi=None):
+        self.renderer = renderer
+        self.ansi = ansi_supported(renderer.fd) if ansi is None else ansi
+        self.previous = []
+        self.lines = []
+        self.diffing = False
+        self.fits = True
+        self.columns = 80
+        self.prompt_line = ""
+    
+    def clear(self):
+        """Start a new frame."""
+        self.renderer.end_scene()
+        if not self.ansi:
+            self.renderer.keyframe()
+            self.renderer.write("\n")
+            return
+        size = shutil.get_terminal_size()
+        if self.fits and 0 < len(self.lines) < size.lines:
+            self.renderer.write(HOME)
+            self.diffing = True
+        else:
+            self.renderer.keyframe()
+            self.renderer.write(CLEAR)
+            self.diffing = False
+        self.previous = self.lines
+        self.lines = []
+        self.fits = True
+        self.columns = size.columns
+    
+    def write(self, text):
+        """Draw complete lines."""
+        if not self.ansi:
+            self.renderer.write(text + "\n")
+            return
+        for line in text.split("\n"):
+            self.draw_line(line)
+    
+    def type_text(self, text, delay=0.03):
+        """Type text out, drawing only the lines that changed."""
+        if not self.ansi:
+            self.renderer.type_text(text, delay)
+            return
+        *instant, last = text.split("\n")
+        for line in instant:
+            self.draw_line(line)
+        self.draw_line(last, delay)
+    
+    def draw_line(self, line, delay=None):
+        """Draw one line unless the same line is already in its place."""
+        index = len(self.lines)
+        self.lines.append(line)
+        if display_width(line) >= self.columns:
+            self.fits = False
+        if self.diffing:
+            if index < len(self.previous) and self.previous[index] == line:
+                self.renderer.write("\n")
+                return
+            self.renderer.write(ERASE_LINE)
+        if delay is None:
+            self.renderer.write(line + "\n")
+        else:
+            self.renderer.type_text(line, delay)
+    
+    def prompt(self, prompt):
+        """Draw an input prompt and erase whatever is left below it."""
+        if not self.ansi:
+            self.renderer.write(prompt)
+            return
+        *lines, self.prompt_line = prompt.split("\n")
+        for line in lines:
+            self.draw_line(line)
+        if self.diffing:
+            self.renderer.write(ERASE_LINE + "\r")
+        self.renderer.write(self.prompt_line)
+        if self.diffing:
+            self.renderer.write(ERASE_BELOW)
+    
+    def answered(self, answer):
+        """Record the prompt line as the player left it after pressing Enter."""
+        if self.ansi:
+            self.lines.append(self.prompt_line + answer)
+
+# ==================== CONSOLES ====================
+
+class SessionEnded(Exception):
+    """Raised when a console has no more input for the game."""
+
+class InputTimeout(SessionEnded):
+    """Raised when the player doesn't answer a prompt in time."""
+
+class InputReader:
+    """Reads the player's lines straight from a file descriptor.
+    
+    Lines are split out of a byte buffer, so a pipe that delivers many at
+    once loses none of them. End of input raises SessionEnded instead of
+    EOFError, and read_line() can give up after a timeout. Keys typed while
+    text is still typing out are fed in as type-ahead and answer the next
+    prompt: a whole line answers it straight away, and a partial one is
+    shown after the prompt for the player to finish. Without select (on
+    Windows) it falls back to input(), with no timeouts or type-ahead.
+    """
+    
+    def __init__(self, fd=0):
+        self.fd = fd
+        self.tty = os.isatty(fd)
+        self.buffer = bytearray()
+        self.ended = False
+    
+    def feed(self, data):
+        """Keep keys typed ahead of the next prompt, applying backspaces."""
+        for byte in data:
+            if byte in (8, 127):  # Backspace or Delete
+                if self.buffer and self.buffer[-1] != 10:
+                    del self.buffer[-1]
+            else:
+                self.buffer.append(byte)
+    
+    def echo(self):
+        """What to show after a prompt for keys typed ahead of it.
+        
+        Keys typed ahead weren't echoed by the terminal. A whole line comes
+        back with its line end, as it answers the prompt at once; otherwise
+        it's the start of a line the player can finish. A pipe's lines are
+        never shown, as with input().
+        """
+        if not self.tty:
+            return ""
+        end = self.buffer.find(b"\n") + 1
+        return bytes(self.buffer[:end] if end else self.buffer).decode("utf-8", "replace")
+    
+    def read_line(self, timeout=None):
+        """The next line without its line ending.
+        
+        Raises SessionEnded once input has ended and InputTimeout if no
+        line is complete within timeout seconds.
+        """
+        if termios is None:
+            try:
+                return input()
+            except EOFError:
+                raise SessionEnded from None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            end = self.buffer.find(b"\n")
+            if end >= 0:
+                line = bytes(self.buffer[:end])
+                del self.buffer[:end + 1]
+                return line.decode("utf-8", "replace").rstrip("\r")
+            if self.ended:
+                if self.buffer:
+                    line = bytes(self.buffer)
+                    self.buffer.clear()
+                    return line.decode("utf-8", "replace")
+                raise SessionEnded
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0 or not select.select([self.fd], [], [], left)[0]:
+                    raise InputTimeout(f"No answer for {timeout:g} seconds")
+            try:
+                data = os.read(self.fd, 4096)
+            except OSError:
+                data = b""
+            if data:
+                self.buffer += data
+            else:
+                self.ended = True
+
+# Standard input, shared by every console so type-ahead carries over.
+STDIN = InputReader()
+
+# A word of a chained line; "r 3" (rewind three choices) is one word.
+_CHAIN_WORD = re.compile(r"r(?:ewind)?\s*\d+|\S+", re.IGNORECASE)
+
+class InputChain:
+    """Answers for the prompts after the one a line of several words was typed at.
+    
+    "4 2 ENTER 1" answers the prompt it was typed at with 4, and the next
+    prompts with 2, Enter and 1, without waiting for the player. A "Press
+    Enter" prompt takes an ENTER if one is next and otherwise lets the
+    queue through, so the ENTERs can be left out. The queue stops at the
+    first answer the game refuses.
+    """
+    
+    __slots__ = ("queue", "words", "taken")
+    
+    def __init__(self):
+        self.queue = deque()
+        # The line being answered from, and how many of its words are used
+        self.words = ()
+        self.taken = 0
+    
+    def __bool__(self):
+        return bool(self.queue)
+    
+    def split(self, line, pause=False):
+        """The answer a newly typed line gives its prompt, queueing any more."""
+        words = _CHAIN_WORD.findall(line)
+        if len(words) < 2:
+            self.words = ()
+            return line
+        self.words = words
+        self.taken = 0
+        self.queue.extend(words)
+        return self.take(pause)
+    
+    def take(self, pause=False):
+        """The next queued answer, for a "Press Enter" prompt if pause."""
+        if pause and self.queue[0].upper() != "ENTER":
+            return ""
+        word = self.queue.popleft()
+        self.taken += 1
+        return "" if word.upper() == "ENTER" else word
+    
+    def stop(self):
+        """Drop the queue after the game refused an answer from it.
+        
+        Returns a note saying where the line stopped, or None if the
+        refused answer wasn't chained.
+        """
+        if not self.taken:
+            return None
+        words = self.words
+        note = f"⛓️  Stopped at {words[self.taken - 1]!r} (answer {self.taken} of {len(words)})"
+        if self.queue:
+            note += f"; not used: {' '.join(self.queue)}"
+        self.queue.clear()
+        self.words = ()
+        self.taken = 0
+        return note
+
+def ask_player(prompt, timeout=None):
+    """Print a prompt and read the answer from standard input."""
+    print(prompt + STDIN.echo(), end="", flush=True)
+    return STDIN.read_line(timeout)
+
+class Console:
+    """Interactive terminal input and output used by the game.
+    
+    Every prompt gives up after `timeout` seconds (never when None),
+    unless it asks for a timeout of its own. A line of several words
+    answers the prompts after it too (see InputChain); the screens it
+    skips through are drawn at once, with no typing or pauses.
+    """
+    
+    __slots__ = ("renderer", "screen", "reader", "timeout", "chain")
+    
+    def __init__(self, renderer=None, screen=None, reader=None, timeout=None):
+        self.renderer = renderer or Renderer()
+        self.screen = screen or Screen(self.renderer)
+        self.reader = reader or STDIN
+        self.timeout = timeout
+        self.chain = InputChain()
+    
+    def write(self, text=""):
+        """Print a line instantly."""
+        self.screen.write(text)
+    
+    def type_text(self, text, delay=0.03):
+        """Print a line with typing effect."""
+        if self.chain:
+            self.screen.write(text)
+        else:
+            self.screen.type_text(text, delay)
+    
+    def clear(self):
+        """Clear the screen."""
+        self.screen.clear()
+    
+    def sleep(self, seconds):
+        """Wait between dramatic moments."""
+        if self.chain:
+            return
+        self.renderer.flush()
+        time.sleep(seconds)
+    
+    def ask(self, prompt, timeout=None, pause=False, split=True):
+        """Show a prompt and read the player's answer.
+        
+        The answer comes from the chain when it has one queued, and a
+        typed line is split into a chain unless split is False.
+        """
+        self.screen.prompt(prompt)
+        if self.chain:
+            answer = self.chain.take(pause)
+            self.renderer.write(answer + "\n")
+        else:
+            typed = self.reader.echo()
+            if typed:
+                self.renderer.write(typed)
+            self.renderer.ready_for_input()
+            answer = self.reader.read_line(self.timeout if timeout is None else timeout)
+            if not typed.endswith("\n"):
+                self.renderer.echo(answer[len(typed):])
+            if split:
+                answer = self.chain.split(answer, pause)
+        self.screen.answered(answer)
+        return answer
+    
+    def read_line(self, prompt):
+        """Read one menu choice."""
+        return self.ask(prompt)
+    
+    def read_name(self, prompt):
+        """Read the player's name, which may have spaces in it."""
+        return self.ask(prompt, split=False)
+    
+    def pause(self, prompt):
+        """Wait for the player to press Enter."""
+        self.ask(prompt, pause=True)
+    
+    def refused(self):
+        """Drop the rest of the chain after the game refused an answer, saying where it stopped."""
+        note = self.chain.stop() if self.chain is not None else None
+        if note:
+            self.write(note)
+    
+    def quit(self):
+        """Leave the game."""
+        self.renderer.flush()
+        sys.exit()
+
+def _discard(text="", delay=0.03):
+    pass
+
+class HeadlessConsole(Console):
+    """Console that plays from a scripted choice stream at machine speed.
+    
+    Choices come from any iterable of strings (a list, a file, a generator).
+    "Press Enter" prompts are answered automatically, the name prompt gets
+    `name`, and all output goes to `sink` (anything with a `write` method),
+    or nowhere when `sink` is None. Nothing sleeps or clears the screen.
+    """
+    
+    def __init__(self, choices, name="Hero", sink=None):
+        self.choices = iter(choices)
+        self.name = name
+        self.sink = sink
+        # Scripts give one answer per line.
+        self.chain = None
+        if sink is None:
+            # Nothing to show: skip output entirely instead of testing per line.
+            self.write = self.type_text = _discard
+    
+    def write(self, text=""):
+        if self.sink is not None:
+            self.sink.write(text + "\n")
+    
+    def type_text(self, text, delay=0.03):
+        self.write(text)
+    
+    def clear(self):
+        pass
+    
+    def sleep(self, seconds):
+        pass
+    
+    def read_line(self, prompt):
+        try:
+            choice = next(self.choices)
+        except StopIteration:
+            raise SessionEnded
+        if self.sink is not None:
+            self.sink.write(prompt + choice.rstrip("\n") + "\n")
+        return choice
+    
+    def read_name(self, prompt):
+        if self.sink is not None:
+            self.sink.write(prompt + self.name + "\n")
+        return self.name
+    
+    def pause(self, prompt):
+        if self.sink is not None:
+            self.sink.write(prompt + "\n")
+    
+    def quit(self):
+        raise SessionEnded
+
+# ==================== GAME STATE ====================
+
+# Every item in the game; each one is a single bit of GameState.items.
+ITEMS = (
+    "Crystal Chronicle", "Gear Key", "Oil Can", "Time Sap", "Lumina Blossom",
+    "Temporal Hammer", "Heat Gloves", "Repair Manual",
+)
+ITEM_BITS = {item: 1 << index for index, item in enumerate(ITEMS)}
+
+# Progress flags; each one is a single bit of GameState.flags.
+FLAGS = (
+    "saved_owl", "helped_robot",
+    "mechanical_fixed", "organic_fixed", "elemental_fixed",
+    "visited_volcanic", "visited_mechanical", "visited_garden",
+)
+FLAG_BITS = {flag: 1 << index for index, flag in enumerate(FLAGS)}
+VISITED_FLAGS = (FLAG_BITS["visited_volcanic"] | FLAG_BITS["visited_mechanical"]
+                 | FLAG_BITS["visited_garden"])
+
+# Save format: a header of magic, version and the CRC-32 of the body, then a
+# body of fixed-size fields followed by the UTF-8 player name, scene and
+# ending. Bump SAVE_VERSION whenever the layout changes.
+SAVE_MAGIC = b"TKCS"
+SAVE_VERSION = 1
+_SAVE_HEADER = struct.Struct("<4sBI")
+# items, item_order, flags, health, knowledge, courage, compassion, chapter,
+# then the byte lengths of the three strings
+_SAVE_FIELDS = struct.Struct("<BIBiiiiBIII")
+
+def _flag_property(bit):
+    """Boolean view of one bit of GameState.flags."""
+    def get(self):
+        return bool(self.flags & bit)
+    def set(self, value):
+        if value:
+            self.flags |= bit
+        else:
+            self.flags &= ~bit
+    return property(get, set)
+
+def _item_property(item):
+    """Boolean view of whether the player holds an item."""
+    bit = ITEM_BITS[item]
+    return property(lambda self: bool(self.items & bit))
+
+class GameState:
+    """One player's progress, packed to be cheap to copy, compare and hash.
+    
+    Items and progress flags are bitmasks and the stats are plain ints.
+    item_order remembers the order items were picked up, four bits per item,
+    so the inventory is still listed in that order.
+    """
+    
+    __slots__ = ("player_name", "items", "item_order", "flags", "health",
+                 "knowledge", "courage", "compassion", "chapter", "scene",
+                 "ending")
+    
+    def __init__(self):
+        self.player_name = ""
+        self.items = 0
+        self.item_order = 0
+        self.flags = 0
+        self.health = 100
+        self.knowledge = 0
+        self.courage = 0  # FIXED: Starts at 0
+        self.compassion = 0
+        self.chapter = 1
+        self.scene = "start"  # Menu the player is currently choosing from
+        self.ending = ""
+    
+    def reset(self):
+        """Start over with a new game's state."""
+        self.__init__()
+    
+    saved_owl = _flag_property(FLAG_BITS["saved_owl"])
+    helped_robot = _flag_property(FLAG_BITS["helped_robot"])
+    mechanical_fixed = _flag_property(FLAG_BITS["mechanical_fixed"])
+    organic_fixed = _flag_property(FLAG_BITS["organic_fixed"])
+    elemental_fixed = _flag_property(FLAG_BITS["elemental_fixed"])
+    visited_volcanic = _flag_property(FLAG_BITS["visited_volcanic"])
+    visited_mechanical = _flag_property(FLAG_BITS["visited_mechanical"])
+    visited_garden = _flag_property(FLAG_BITS["visited_garden"])
+    
+    has_crystal_chronicle = _item_property("Crystal Chronicle")
+    has_time_sap = _item_property("Time Sap")
+    has_temporal_hammer = _item_property("Temporal Hammer")
+    has_lumina_blossom = _item_property("Lumina Blossom")
+    
+    def has(self, item):
+        """Check whether the player holds an item."""
+        return bool(self.items & ITEM_BITS[item])
+    
+    def give(self, item):
+        """Add an item to the inventory (holding it twice changes nothing)."""
+        bit = ITEM_BITS[item]
+        if not self.items & bit:
+            self.items |= bit
+            self.item_order = (self.item_order << 4) | (ITEMS.index(item) + 1)
+    
+    @property
+    def inventory(self):
+        """Item names in the order they were picked up."""
+        names = []
+        order = self.item_order
+        while order:
+            names.append(ITEMS[(order & 15) - 1])
+            order >>= 4
+        names.reverse()
+        return names
+    
+    @property
+    def stability(self):
+        """Chrono-Core stability in percent; each healed fracture adds 20."""
+        fixed = self.flags & (FLAG_BITS["mechanical_fixed"] | FLAG_BITS["organic_fixed"]
+                              | FLAG_BITS["elemental_fixed"])
+        return 40 + 20 * bin(fixed).count("1")
+    
+    def copy(self):
+        """Independent copy of this state."""
+        state = GameState.__new__(GameState)
+        state.player_name = self.player_name
+        state.items = self.items
+        state.item_order = self.item_order
+        state.flags = self.flags
+        state.health = self.health
+        state.knowledge = self.knowledge
+        state.courage = self.courage
+        state.compassion = self.compassion
+        state.chapter = self.chapter
+        state.scene = self.scene
+        state.ending = self.ending
+        return state
+    
+    def astuple(self):
+        """All fields as a tuple, in __slots__ order."""
+        return (self.player_name, self.items, self.item_order, self.flags,
+                self.health, self.knowledge, self.courage, self.compassion,
+                self.chapter, self.scene, self.ending)
+    
+    @classmethod
+    def from_tuple(cls, fields):
+        """A state from the fields astuple() returned."""
+        state = cls.__new__(cls)
+        (state.player_name, state.items, state.item_order, state.flags,
+         state.health, state.knowledge, state.courage, state.compassion,
+         state.chapter, state.scene, state.ending) = fields
+        return state
+    
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+    
+    def __hash__(self):
+        return hash(self.astuple())
+    
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value
+                           in zip(self.__slots__, self.astuple()))
+        return f"GameState({fields})"
+    
+    def pack(self):
+        """Encode this state in the compact binary save format."""
+        texts = [text.encode("utf-8") for text in (self.player_name, self.scene, self.ending)]
+        body = _SAVE_FIELDS.pack(
+            self.items, self.item_order, self.flags, self.health,
+            self.knowledge, self.courage, self.compassion, self.chapter,
+            *map(len, texts),
+        ) + b"".join(texts)
+        return _SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, zlib.crc32(body)) + body
+    
+    @classmethod
+    def unpack(cls, data):
+        """Decode a state written by pack(); raises ValueError if it is not one."""
+        if len(data) < _SAVE_HEADER.size + _SAVE_FIELDS.size:
+            raise ValueError("Save data is truncated")
+        magic, version, checksum = _SAVE_HEADER.unpack_from(data)
+        if magic != SAVE_MAGIC:
+            raise ValueError("Not a Timekeeper Chronicles save")
+        if version != SAVE_VERSION:
+            raise ValueError(f"Unsupported save version {version}")
+        body = memoryview(data)[_SAVE_HEADER.size:]
+        if zlib.crc32(body) != checksum:
+            raise ValueError("Save data is corrupt")
+        
+        state = cls.__new__(cls)
+        (state.items, state.item_order, state.flags, state.health,
+         state.knowledge, state.courage, state.compassion, state.chapter,
+         *lengths) = _SAVE_FIELDS.unpack_from(body)
+        texts = []
+        offset = _SAVE_FIELDS.size
+        for length in lengths:
+            texts.append(bytes(body[offset:offset + length]).decode("utf-8"))
+            offset += length
+        if offset != len(body):
+            raise ValueError("Save data has the wrong length")
+        state.player_name, state.scene, state.ending = texts
+        return state
+
+# Achievements listed at the end of a game: (GameState attribute, label).
+ACHIEVEMENTS = (
+    ("saved_owl", "Saved the Mechanical Owl"),
+    ("has_time_sap", "Healed the Crystal Tree"),
+    ("has_temporal_hammer", "Forged Temporal Hammer"),
+    ("helped_robot", "Repaired the Assistant Robot"),
+    ("mechanical_fixed", "Healed Mechanical Fracture"),
+    ("organic_fixed", "Healed Organic Fracture"),
+    ("elemental_fixed", "Healed Elemental Fracture"),
+)
+
+# ==================== SCENE GRAPH ====================
+
+STATS = ("health", "knowledge", "courage", "compassion")
+
+# Scene a GameState is left at once the player quits the game.
+EXIT = "exit"
+
+# Words, numbers and operators a requirement is made of. Item names contain
+# spaces, so they are matched whole before single words.
+_REQUIREMENT_TOKEN = re.compile(
+    r"\s*(?:(\d+)|(>=|<=|==|!=|<|>|\(|\))|("
+    + "|".join(map(re.escape, ITEMS)) + r")|([a-z_]+))"
+)
+
+def _requirement_parts(text):
+    """Split a requirement into (kind, Python fragment) pairs.
+    
+    Kinds are "number", "operator" (comparisons and parentheses), "word"
+    (and, or, not), "stat" and "bits" (a flag or item mask test).
+    """
+    text = text.strip()
+    position = 0
+    while position < len(text):
+        match = _REQUIREMENT_TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Bad requirement {text!r} at {text[position:]!r}")
+        number, operator, item, word = match.groups()
+        if item:
+            yield "bits", f"(s.items & {ITEM_BITS[item]})"
+        elif word in ("and", "or", "not"):
+            yield "word", word
+        elif word in STATS:
+            yield "stat", f"s.{word}"
+        elif word in FLAG_BITS:
+            yield "bits", f"(s.flags & {FLAG_BITS[word]})"
+        elif word:
+            raise ValueError(f"Unknown name {word!r} in requirement {text!r}")
+        elif number:
+            yield "number", number
+        else:
+            yield "operator", operator
+        position = match.end()
+
+def compile_requirement(text):
+    """Compile a requirement such as "courage >= 20 or Temporal Hammer".
+    
+    A requirement names stats, progress flags and items (an item holds while
+    the player carries it), compares stats with numbers, and combines them
+    with and, or, not and parentheses. Returns a function of a GameState.
+    """
+    parts = [part for _, part in _requirement_parts(text)]
+    try:
+        return eval(f"lambda s: {' '.join(parts)}", {})
+    except SyntaxError:
+        raise ValueError(f"Bad requirement {text!r}") from None
+
+def compile_effects(*effects):
+    """Compile effect dicts into one function that applies them to a GameState.
+    
+    Stats are added to, "heal" adds health up to 100, "give" hands over an
+    item, "set" raises a progress flag, "chapter" and "ending" are stored,
+    and "restart" starts a new game. Returns None when there is nothing to do.
+    """
+    lines = []
+    for effect in effects:
+        for name, value in effect.items():
+            if name in STATS:
+                lines.append(f"s.{name} += {value:d}")
+            elif name == "heal":
+                lines.append(f"s.health = min(100, s.health + {value:d})")
+            elif name == "give" and value in ITEM_BITS:
+                lines.append(f"s.give({value!r})")
+            elif name == "set" and value in FLAG_BITS:
+                lines.append(f"s.flags |= {FLAG_BITS[value]}")
+            elif name == "chapter":
+                lines.append(f"s.chapter = {value:d}")
+            elif name == "ending":
+                lines.append(f"s.ending = {value!r}")
+            elif name == "restart":
+                lines.append("s.reset()")
+            else:
+                raise ValueError(f"Bad effect {name}={value!r}")
+    if not lines:
+        return None
+    namespace = {}
+    exec("def apply(s):\n    " + "\n    ".join(lines), namespace)
+    return namespace["apply"]
+
+def _compile_text(lines):
+    """Compile story lines; a (requirement, yes, no) tuple picks one of two."""
+    return tuple(
+        (compile_requirement(line[0]), line[1], line[2])
+        if isinstance(line, tuple) else line
+        for line in lines
+    )
+
+class Outcome:
+    """One way an arrival, a check or a choice can play out.
+    
+    The text is told first (formatted with the state as it was), then the
+    effects are applied, then the game moves on to goto, or stays at the
+    current menu when goto is None.
+    """
+    
+    __slots__ = ("requirement", "test", "text", "effects", "apply", "pause", "linger",
+                 "goto", "quit")
+    
+    def __init__(self, spec, branch=None):
+        branch = branch or {}
+        self.requirement = " and ".join(
+            f"({part['if']})" for part in (spec, branch) if "if" in part) or None
+        self.test = compile_requirement(self.requirement) if self.requirement else None
+        self.text = _compile_text(spec.get("text", ()) + branch.get("text", ()))
+        self.effects = (spec.get("effects", {}), branch.get("effects", {}))
+        self.apply = compile_effects(*self.effects)
+        for name in ("pause", "linger", "goto", "quit"):
+            setattr(self, name, branch.get(name, spec.get(name)))
+
+def _compile_outcomes(spec):
+    """Flatten an outcome and its branches into first-match Outcomes.
+    
+    Each branch adds its own requirement, text and effects to the ones it
+    shares with the others. If every branch has a requirement, the shared
+    part alone is the fallback.
+    """
+    branches = spec.get("branches")
+    if not branches:
+        return (Outcome(spec),)
+    outcomes = tuple(Outcome(spec, branch) for branch in branches)
+    if outcomes[-1].test is not None:
+        outcomes += (Outcome(spec),)
+    return outcomes
+
+class Option:
+    """A numbered menu option and the ways choosing it can play out."""
+    
+    __slots__ = ("key", "label", "requires", "test", "outcomes")
+    
+    def __init__(self, key, spec):
+        self.key = key
+        self.label = spec["label"]
+        self.requires = spec.get("requires")
+        self.test = compile_requirement(self.requires) if self.requires else None
+        self.outcomes = _compile_outcomes(spec)
+
+class Scene:
+    """A compiled scene: what happens on arrival and the menu it offers.
+    
+    Scenes without options are passages that always lead on elsewhere,
+    unless they stop to ask the player's name (ask_name is its prompt).
+    """
+    
+    __slots__ = ("name", "banner", "scene_banner", "sleep", "lines", "arrival",
+                 "ask_name", "show", "checks", "menu", "options", "keys", "table")
+    
+    def __init__(self, name, spec):
+        self.name = name
+        self.banner = spec.get("banner")
+        self.scene_banner = spec.get("scene_banner")
+        self.sleep = spec.get("sleep")
+        self.lines = spec.get("lines", ())
+        self.arrival = _compile_outcomes(spec)
+        self.ask_name = spec.get("ask_name")
+        self.show = f"show_{spec['show']}" if "show" in spec else None
+        self.checks = tuple(outcome for check in spec.get("checks", ())
+                            for outcome in _compile_outcomes(check))
+        self.menu = spec.get("menu", ())
+        self.options = tuple(Option(str(number), option) for number, option
+                             in enumerate(spec.get("options", ()), 1))
+        # Menus whose options are always offered keep their keys ready-made.
+        if any(option.test for option in self.options):
+            self.keys = None
+        else:
+            self.keys = tuple(option.key for option in self.options)
+        self.table = {option.key: option.outcomes for option in self.options}
+    
+    def outcomes(self):
+        """Every outcome in this scene."""
+        yield from self.arrival
+        yield from self.checks
+        for option in self.options:
+            yield from option.outcomes
+
+class _StoryFields:
+    """Lets story text name any GameState attribute in {braces}."""
+    
+    __slots__ = ("state",)
+    
+    def __init__(self, state):
+        self.state = state
+    
+    def __getitem__(self, name):
+        return getattr(self.state, name)
+
+def _resolve(outcomes, state):
+    """The first outcome whose requirement holds, or None."""
+    for outcome in outcomes:
+        test = outcome.test
+        if test is None or test(state):
+            return outcome
+    return None
+
+class Story:
+    """A scene graph compiled into a flat dispatch table.
+    
+    Each step is a lookup of the current scene and the chosen key, then the
+    first outcome whose requirement holds. Given a view, the story draws
+    itself as it goes: view.arrive(scene) when a scene is entered,
+    view.narrate(outcome) before an outcome's effects, view.show(scene)
+    before a menu and view.quit() when the game ends. Without one the graph
+    runs with no UI at all, for simulators and explorers.
+    """
+    
+    def __init__(self, scenes):
+        self.scenes = {name: Scene(name, spec) for name, spec in scenes.items()}
+        for scene in self.scenes.values():
+            for outcome in scene.outcomes():
+                if outcome.goto is not None and outcome.goto not in self.scenes:
+                    raise ValueError(f"Scene {scene.name!r} leads to unknown scene {outcome.goto!r}")
+    
+    def new_game(self, player_name="Hero"):
+        """A new game's state, waiting at the first menu."""
+        state = GameState()
+        self.enter(state, "start")
+        self.give_name(state, player_name)
+        return state
+    
+    def options(self, state):
+        """Keys of the options offered at the state's menu, as a tuple.
+        
+        Every game shares the story, so it never hands out anything a
+        caller could change under the other games.
+        """
+        scene = self.scenes[state.scene]
+        if scene.keys is not None:
+            return scene.keys
+        return tuple([option.key for option in scene.options
+                      if option.test is None or option.test(state)])
+    
+    def enter(self, state, name, view=None):
+        """Arrive at a scene and play on up to the next menu."""
+        scene = self.scenes[name]
+        if view is not None:
+            view.arrive(scene)
+        self._follow(state, scene, _resolve(scene.arrival, state), view)
+    
+    def advance(self, state, choice, view=None):
+        """Take an option at the state's menu and play on up to the next one."""
+        scene = self.scenes[state.scene]
+        self._follow(state, scene, _resolve(scene.table[choice], state), view)
+    
+    def give_name(self, state, player_name, view=None):
+        """Answer the state's name prompt and play on up to the next menu."""
+        scene = self.scenes[state.scene]
+        state.player_name = player_name
+        self._follow(state, scene, _resolve(scene.arrival, state), view, told=True)
+    
+    def _follow(self, state, scene, outcome, view, told=False):
+        """Play out an outcome and whatever it leads to, stopping at a menu.
+        
+        state.scene ends up as the menu's name, as a scene asking for the
+        player's name, or as EXIT if the game quit. With told, the first
+        outcome has already been narrated and applied.
+        """
+        scenes = self.scenes
+        while True:
+            if outcome is not None:
+                if told:
+                    told = False
+                else:
+                    if view is not None:
+                        view.narrate(outcome)
+                    if outcome.apply is not None:
+                        outcome.apply(state)
+                    if scene.ask_name:
+                        state.scene = scene.name
+                        return
+                if outcome.quit:
+                    state.scene = EXIT
+                    if view is not None:
+                        view.quit()
+                    return
+                if outcome.goto is not None:
+                    scene = scenes[outcome.goto]
+                    if view is not None:
+                        view.arrive(scene)
+                    outcome = _resolve(scene.arrival, state)
+                    continue
+            # At the menu before it's shown, so its hints are for this scene.
+            state.scene = scene.name
+            if view is not None:
+                view.show(scene)
+            outcome = _resolve(scene.checks, state)
+            if outcome is None:
+                return
+
+# ==================== STORY ====================
+
+# The whole game as data, compiled into STORY below. Each scene may clear
+# the screen with a banner, then plays its arrival: text, effects, an
+# optional pause, and a goto to another scene. "branches" split any of
+# these by requirement (first match wins) and "checks" are tested every
+# time the menu is shown. Scenes with options stop at a menu; the options
+# are numbered in order and each plays out like an arrival.
+DIVIDER = "\n" + "─" * 50
+CONTINUE = "\nPress Enter to continue..."
+
+SCENES = {
+    "start": {
+        "banner": "TIMEKEEPER CHRONICLES",
+        "lines": (
+            "\n" + "~" * 60,
+            "      AN EPIC TEXT ADVENTURE WITH MULTIPLE ENDINGS",
+            "~" * 60,
+        ),
+        "text": ("\nWhat is your name, destined Timekeeper? ",),
+        "ask_name": "> ",
+        "goto": "welcome",
+    },
+    "welcome": {
+        "text": ("\nWelcome, {player_name}! Your journey begins...",),
+        "linger": 2,
+        "goto": "chapter_1",
+    },
+    
+    # ---------- Chapter 1: The Awakening ----------
+    "chapter_1": {
+        "banner": "CHAPTER 1: THE AWAKENING",
+        "sleep": 1,
+        "text": (
+            "\n{player_name}, you awaken in a strange circular chamber.",
+            "Ancient machinery hums around you. Dust floats in beams of light.",
+            "A voice echoes: 'You are the last Timekeeper. The Chrono-Core fails.'",
+            "'Restore balance. Begin your journey...'",
+        ),
+        "pause": "\nPress Enter to begin...",
+        "goto": "entrance",
+    },
+    "entrance": {
+        "scene_banner": "THE AWAKENING CHAMBER",
+        "text": (
+            "\nYou stand in a circular chamber with three glowing archways:",
+            "1. 🔵 BLUE ARCHWAY - Mechanical humming sounds",
+            "2. 🟢 GREEN ARCHWAY - Smells of earth and growth",
+            "3. 🔴 RED ARCHWAY - Flickers with unstable energy",
+            "\nIn the center, a CRYSTAL CHRONICLE glows on a pedestal.",
+        ),
+        "show": "stats",
+        "menu": (DIVIDER, "What will you do?"),
+        "options": (
+            {
+                "label": "Take the Crystal Chronicle",
+                "branches": (
+                    {
+                        "if": "Crystal Chronicle",
+                        "text": ("\nYou already have the Chronicle.",),
+                    },
+                    {
+                        "text": (
+                            "\nYou take the CRYSTAL CHRONICLE.",
+                            "It glows warmly, showing glimpses of past and future.",
+                        ),
+                        "effects": {"give": "Crystal Chronicle", "knowledge": 15},
+                    },
+                ),
+                "pause": CONTINUE,
+                "goto": "entrance",
+            },
+            {"label": "Enter BLUE archway (Mechanical)", "goto": "mechanical"},
+            {"label": "Enter GREEN archway (Garden)", "goto": "garden"},
+            {"label": "Enter RED archway (Volcanic)", "goto": "volcanic"},
+            {
+                "label": "Ready to proceed to Chapter 2",
+                "branches": (
+                    {"if": "Crystal Chronicle", "goto": "complete_chapter_1"},
+                    {
+                        "text": ("\nYou should take the Crystal Chronicle first!",),
+                        "pause": CONTINUE,
+                        "goto": "entrance",
+                    },
+                ),
+            },
+        ),
+    },
+    "mechanical": {
+        "scene_banner": "MECHANICAL LABYRINTH",
+        # FIXED: Add courage for entering dangerous area (first time only)
+        "branches": (
+            {
+                "if": "visited_mechanical",
+                "text": (
+                    "\nYou return to the mechanical labyrinth.",
+                    "\nA mechanical owl is trapped under a fallen gear!",
+                ),
+            },
+            {
+                "text": (
+                    "\nYou bravely enter the dangerous mechanical area!",
+                    "+10 Courage for facing danger!",
+                    "\nA mechanical owl is trapped under a fallen gear!",
+                ),
+                "effects": {"courage": 10, "set": "visited_mechanical"},
+            },
+        ),
+        "show": "stats",
+        "menu": (DIVIDER, "What will you do?"),
+        "options": (
+            {
+                "label": "Try to free the owl",
+                "branches": (
+                    {
+                        "if": "saved_owl",
+                        "text": ("\nThe owl is already free and happily hooting.",),
+                    },
+                    {
+                        "if": "courage >= 20 or Temporal Hammer",
+                        "text": (
+                            "\nYou try to lift the heavy gear...",
+                            "\nSuccess! The owl is freed!",
+                            "It gives you a GEAR KEY in gratitude.",
+                            "+10 Courage bonus!",
+                        ),
+                        # Bonus courage for success
+                        "effects": {"give": "Gear Key", "set": "saved_owl",
+                                    "compassion": 20, "courage": 10},
+                    },
+                    {
+                        "text": (
+                            "\nYou try to lift the heavy gear...",
+                            "\nThe gear is too heavy. You need more courage.",
+                            "Current courage: {courage}/20 required",
+                            "+5 Courage for trying!",
+                        ),
+                        # Always get some courage for trying
+                        "effects": {"courage": 5, "health": -5},
+                    },
+                ),
+                "pause": CONTINUE,
+            },
+            {
+                "label": "Search for tools",
+                "branches": (
+                    {"if": "Oil Can", "text": ("\nYou've already searched here.",)},
+                    {
+                        "text": (
+                            "\nYou find an OIL CAN in a toolbox.",
+                            "+5 Courage for finding useful tools!",
+                        ),
+                        "effects": {"give": "Oil Can", "courage": 5},
+                    },
+                ),
+                "pause": CONTINUE,
+            },
+            {
+                "label": "Examine control panel",
+                "branches": (
+                    {
+                        "if": "Crystal Chronicle",
+                        "text": (
+                            "\nThe Chronicle activates the panel!",
+                            "You learn about time mechanics. +10 Knowledge",
+                        ),
+                        "effects": {"knowledge": 10},
+                    },
+                    {"text": ("\nThe panel shows complex symbols you don't understand.",)},
+                ),
+                "pause": CONTINUE,
+            },
+            {"label": "Return to entrance", "goto": "entrance"},
+        ),
+    },
+    "garden": {
+        "scene_banner": "ETERNAL GARDEN",
+        # FIXED: Add courage for exploring new area
+        "branches": (
+            {
+                "if": "visited_garden",
+                "text": (
+                    "\nYou return to the peaceful garden.",
+                    "\nA beautiful garden frozen in time.",
+                    "A crystal tree with a dying branch stands at the center.",
+                ),
+            },
+            {
+                "text": (
+                    "\nYou explore the mysterious garden.",
+                    "+5 Courage for venturing into the unknown!",
+                    "\nA beautiful garden frozen in time.",
+                    "A crystal tree with a dying branch stands at the center.",
+                ),
+                "effects": {"courage": 5, "set": "visited_garden"},
+            },
+        ),
+        "show": "stats",
+        "menu": (DIVIDER, "What will you do?"),
+        "options": (
+            {
+                "label": "Examine the crystal tree",
+                "text": ("\nThe tree's sap is liquid time.",),
+                "branches": (
+                    {
+                        "if": "Oil Can",
+                        "text": (
+                            "\nYou use oil to heal the branch. It produces TIME SAP.",
+                            "+5 Courage for healing nature!",
+                        ),
+                        "effects": {"give": "Time Sap", "compassion": 15, "courage": 5},
+                    },
+                    {"text": ("\nThe branch needs healing, but you lack tools.",)},
+                ),
+                "pause": CONTINUE,
+            },
+            {
+                "label": "Collect glowing flowers",
+                "branches": (
+                    {"if": "Lumina Blossom", "text": ("\nYou already have the blossom.",)},
+                    {
+                        "text": (
+                            "\nYou collect a LUMINA BLOSSOM.",
+                            "+3 Courage for finding magical items!",
+                        ),
+                        "effects": {"give": "Lumina Blossom", "courage": 3},
+                    },
+                ),
+                "pause": CONTINUE,
+            },
+            {
+                "label": "Look for the garden keeper",
+                "text": (
+                    "\nA gentle voice whispers: 'Heal the tree with care...'",
+                    "The garden appreciates your presence. +5 Compassion",
+                ),
+                "effects": {"compassion": 5},
+                "pause": CONTINUE,
+            },
+            {"label": "Return to entrance", "goto": "entrance"},
+        ),
+    },
+    "volcanic": {
+        "scene_banner": "VOLCANIC FORGE",
+        # FIXED: MAJOR BUG FIX - Courage added immediately upon entering
+        "branches": (
+            {
+                "if": "visited_volcanic",
+                "text": (
+                    "\nYou return to the scorching volcanic forge.",
+                    "\nIntense heat hits you! A forge holds an unfinished hammer.",
+                    "The heat is dangerous! (-15 health)",
+                ),
+                "effects": {"health": -15},
+            },
+            {
+                "text": (
+                    "\n🔥 You bravely enter the intensely hot volcanic forge!",
+                    "🛡️  +15 COURAGE for facing extreme danger!",
+                    "\nIntense heat hits you! A forge holds an unfinished hammer.",
+                    "The heat is dangerous! (-15 health)",
+                ),
+                "effects": {"courage": 15, "set": "visited_volcanic", "health": -15},
+            },
+        ),
+        "show": "stats",
+        "checks": (
+            {
+                "if": "health <= 0",
+                "text": ("\n❌ You succumb to the heat...",),
+                "goto": "heat_exhaustion",
+            },
+        ),
+        "menu": (DIVIDER, "What will you do?"),
+        "options": (
+            {
+                "label": "Try to complete the hammer (requires 30 courage)",
+                "text": (
+                    "\nYou approach the blazing forge...",
+                    "Your courage: {courage}/30 needed",
+                ),
+                "branches": (
+                    {
+                        "if": "courage >= 30",
+                        "text": (
+                            "\n✅ Your courage lets you withstand the heat!",
+                            "You complete the TEMPORAL HAMMER!",
+                            "+25 Courage for incredible bravery!",
+                        ),
+                        "effects": {"give": "Temporal Hammer", "courage": 25},
+                    },
+                    {
+                        "text": (
+                            "\n🔥 The heat is too intense! But you learn from the attempt.",
+                            "+10 Courage for facing your fears!",
+                        ),
+                        # Good courage gain even on failure, reduced penalty
+                        "effects": {"courage": 10, "health": -10},
+                    },
+                ),
+                "pause": CONTINUE,
+            },
+            {
+                "label": "Search for protective gear",
+                "branches": (
+                    {"if": "Heat Gloves", "text": ("\nYou already have the heat gloves.",)},
+                    {
+                        "text": (
+                            "\nYou find HEAT-RESISTANT GLOVES.",
+                            "+8 Courage for finding protective gear!",
+                            "These will help with hot objects.",
+                        ),
+                        "effects": {"give": "Heat Gloves", "courage": 8},
+                    },
+                ),
+                "pause": CONTINUE,
+            },
+            {
+                "label": "Study the forge's patterns",
+                "text": (
+                    "\nYou study the forge's ancient runes.",
+                    "+15 Knowledge about elemental time.",
+                    "+5 Courage for learning in dangerous conditions!",
+                ),
+                "effects": {"knowledge": 15, "courage": 5},
+                "pause": CONTINUE,
+            },
+            {"label": "Retreat to entrance", "goto": "entrance"},
+        ),
+    },
+    "heat_exhaustion": {
+        "banner": "GAME OVER",
+        "text": (
+            "\n{player_name}, your journey ends here.",
+            "Reason: Heat Exhaustion",
+            "\nTime continues without a keeper...",
+        ),
+        "effects": {"ending": "GAME OVER: Heat Exhaustion"},
+        "linger": 2,
+        "goto": "ending",
+    },
+    "complete_chapter_1": {
+        "banner": "CHAPTER 1 COMPLETE!",
+        "text": (
+            "\n{player_name}, you have gathered what you need.",
+            "A portal opens before you, leading to the Chrono-Core...",
+            "\n🎁 CHAPTER COMPLETION BONUS:",
+            "+20 Health, +20 Courage, +10 Knowledge, +10 Compassion",
+        ),
+        # Chapter completion bonus - FIXED: Now gives courage
+        "effects": {"heal": 20, "courage": 20, "knowledge": 10, "compassion": 10,
+                    "chapter": 2},
+        "pause": "\nPress Enter to continue to Chapter 2...",
+        "goto": "chapter_2",
+    },
+    
+    # ---------- Chapter 2: Heart of Time ----------
+    "chapter_2": {
+        "banner": "CHAPTER 2: HEART OF TIME",
+        "sleep": 1,
+        "text": (
+            "\nYou arrive at the CHRONO-CORE chamber.",
+            "A massive crystal sphere floats in the center, with three fractures.",
+            "Each fracture threatens to unravel time itself!",
+            "\n🛡️  +10 Courage for reaching the Chrono-Core!",
+        ),
+        # FIXED: Courage for reaching Chapter 2
+        "effects": {"courage": 10},
+        "pause": CONTINUE,
+        "goto": "core",
+    },
+    "core": {
+        "scene_banner": "CHRONO-CORE CHAMBER",
+        "text": (
+            "\nCore Stability: {stability}%",
+            "\nThree fractures need healing:",
+            ("mechanical_fixed", "🔵 Mechanical: HEALED", "🔵 Mechanical: BROKEN"),
+            ("organic_fixed", "🟢 Organic: HEALED", "🟢 Organic: BROKEN"),
+            ("elemental_fixed", "🔴 Elemental: HEALED", "🔴 Elemental: BROKEN"),
+        ),
+        "show": "stats",
+        "menu": (DIVIDER, "What will you do?"),
+        "options": (
+            {"label": "Heal MECHANICAL fracture (Blue)", "goto": "heal_mechanical"},
+            {"label": "Heal ORGANIC fracture (Green)", "goto": "heal_organic"},
+            {"label": "Heal ELEMENTAL fracture (Red)", "goto": "heal_elemental"},
+            {"label": "Check damaged robot assistant", "goto": "robot"},
+            {
+                "label": "ACTIVATE CORE RESTORATION",
+                "requires": "mechanical_fixed and organic_fixed and elemental_fixed",
+                "goto": "complete_chapter_2",
+            },
+        ),
+    },
+    "heal_mechanical": {
+        "scene_banner": "MECHANICAL FRACTURE",
+        "branches": (
+            {
+                "if": "mechanical_fixed",
+                "text": ("\nThis fracture is already healed.",),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {"text": ("\nGears grind painfully. A mainspring is overwound.",)},
+        ),
+        "menu": (DIVIDER, "How will you heal it?"),
+        "options": (
+            {
+                "label": "Use Temporal Hammer (if you have it)",
+                "branches": (
+                    {
+                        "if": "Temporal Hammer",
+                        "text": (
+                            "\nYou use the hammer to safely release tension!",
+                            "✅ MECHANICAL FRACTURE HEALED!",
+                            "+15 Courage for precise repair!",
+                        ),
+                        "effects": {"set": "mechanical_fixed", "courage": 15},
+                    },
+                    {"text": ("\nYou don't have the Temporal Hammer.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "label": "Use Gear Key (if you have it)",
+                "branches": (
+                    {
+                        "if": "Gear Key",
+                        "text": (
+                            "\nThe Gear Key perfectly aligns the mechanisms!",
+                            "✅ MECHANICAL FRACTURE HEALED!",
+                            "+10 Courage for clever solution!",
+                        ),
+                        "effects": {"set": "mechanical_fixed", "knowledge": 10, "courage": 10},
+                    },
+                    {"text": ("\nYou don't have the Gear Key.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "label": "Try manual repair (dangerous - requires courage)",
+                "text": (
+                    "\nYou attempt manual repair...",
+                    "Your courage: {courage}/40 needed",
+                ),
+                "branches": (
+                    {
+                        "if": "courage >= 40",
+                        "text": (
+                            "\n✅ Success through sheer bravery!",
+                            "✅ MECHANICAL FRACTURE HEALED!",
+                            "+25 Courage for incredible bravery!",
+                        ),
+                        "effects": {"set": "mechanical_fixed", "courage": 25, "health": -15},
+                    },
+                    {
+                        "text": (
+                            "\n❌ Too dangerous! You get injured.",
+                            "But +5 Courage for trying something dangerous!",
+                        ),
+                        # Still get courage for trying
+                        "effects": {"courage": 5, "health": -25},
+                    },
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {"label": "Return to core chamber", "goto": "core"},
+        ),
+    },
+    "heal_organic": {
+        "scene_banner": "ORGANIC FRACTURE",
+        "branches": (
+            {
+                "if": "organic_fixed",
+                "text": ("\nThis fracture is already healed.",),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {"text": ("\nCrystalline vines are withering. Life energy fades.",)},
+        ),
+        "menu": (DIVIDER, "How will you heal it?"),
+        "options": (
+            {
+                "label": "Use Time Sap (if you have it)",
+                "branches": (
+                    {
+                        "if": "Time Sap",
+                        "text": (
+                            "\nThe Time Sap revitalizes the vines!",
+                            "✅ ORGANIC FRACTURE HEALED!",
+                            "+5 Courage for healing nature!",
+                        ),
+                        "effects": {"set": "organic_fixed", "compassion": 20, "courage": 5},
+                    },
+                    {"text": ("\nYou don't have Time Sap.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "label": "Use Lumina Blossom (if you have it)",
+                "branches": (
+                    {
+                        "if": "Lumina Blossom",
+                        "text": (
+                            "\nThe blossom's light heals the crystalline growth!",
+                            "✅ ORGANIC FRACTURE HEALED!",
+                            "+5 Courage for using magical items!",
+                        ),
+                        "effects": {"set": "organic_fixed", "compassion": 15, "courage": 5},
+                    },
+                    {"text": ("\nYou don't have the Lumina Blossom.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "label": "Try compassionate healing (requires compassion)",
+                "text": (
+                    "\nYou try to heal with compassion...",
+                    "Your compassion: {compassion}/50 needed",
+                ),
+                "branches": (
+                    {
+                        "if": "compassion >= 50",
+                        "text": (
+                            "\n✅ Your kindness resonates with the life force!",
+                            "✅ ORGANIC FRACTURE HEALED!",
+                            "+15 Courage for emotional strength!",
+                        ),
+                        # Big courage for emotional bravery
+                        "effects": {"set": "organic_fixed", "compassion": 10, "courage": 15},
+                    },
+                    {"text": ("\n❌ You lack the compassion needed.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {"label": "Return to core chamber", "goto": "core"},
+        ),
+    },
+    "heal_elemental": {
+        "scene_banner": "ELEMENTAL FRACTURE",
+        "branches": (
+            {
+                "if": "elemental_fixed",
+                "text": ("\nThis fracture is already healed.",),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {"text": ("\nRaw temporal energy arcs dangerously. Reality is unstable.",)},
+        ),
+        "menu": (DIVIDER, "How will you heal it?"),
+        "options": (
+            {
+                "label": "Use Crystal Chronicle (if you have it)",
+                "branches": (
+                    {
+                        "if": "Crystal Chronicle",
+                        "text": (
+                            "\nThe Chronicle stabilizes the temporal energy!",
+                            "✅ ELEMENTAL FRACTURE HEALED!",
+                            "+20 Courage for facing temporal chaos!",
+                        ),
+                        "effects": {"set": "elemental_fixed", "knowledge": 25, "courage": 20},
+                    },
+                    {"text": ("\nYou don't have the Crystal Chronicle.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "label": "Use Heat Gloves (if you have them)",
+                "branches": (
+                    {
+                        "if": "Heat Gloves",
+                        "text": (
+                            "\nThe gloves protect you as you channel the energy!",
+                            "✅ ELEMENTAL FRACTURE HEALED!",
+                            "+25 Courage for channeling dangerous energy!",
+                        ),
+                        "effects": {"set": "elemental_fixed", "courage": 25},
+                    },
+                    {"text": ("\nYou don't have Heat Gloves.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "label": "Try to contain energy (requires knowledge)",
+                "text": (
+                    "\nYou attempt to contain the energy...",
+                    "Your knowledge: {knowledge}/60 needed",
+                ),
+                "branches": (
+                    {
+                        "if": "knowledge >= 60",
+                        "text": (
+                            "\n✅ Your knowledge lets you stabilize the fracture!",
+                            "✅ ELEMENTAL FRACTURE HEALED!",
+                            "+20 Courage for intellectual bravery!",
+                        ),
+                        "effects": {"set": "elemental_fixed", "knowledge": 15,
+                                    "courage": 20, "health": -10},
+                    },
+                    {
+                        "text": (
+                            "\n❌ The energy is too complex for your understanding.",
+                            "But +5 Courage for trying!",
+                        ),
+                        "effects": {"courage": 5, "health": -20},
+                    },
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {"label": "Return to core chamber", "goto": "core"},
+        ),
+    },
+    "robot": {
+        "scene_banner": "DAMAGED ASSISTANT",
+        "branches": (
+            {
+                "if": "helped_robot",
+                "text": (
+                    "\nThe repaired robot hums happily.",
+                    "'Thank you for your help, Timekeeper!'",
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "text": (
+                    "\nA damaged robot sparks weakly.",
+                    "It beeps: 'Core... failing... help...'",
+                ),
+            },
+        ),
+        "menu": (DIVIDER, "Will you help the robot?"),
+        "options": (
+            {
+                "label": "Yes, try to repair it (requires Oil Can)",
+                "branches": (
+                    {
+                        "if": "Oil Can",
+                        "text": (
+                            "\nYou use oil to repair the robot's joints!",
+                            "It thanks you and gives you a REPAIR MANUAL.",
+                            "+25 Compassion, +15 Courage!",
+                        ),
+                        "effects": {"give": "Repair Manual", "set": "helped_robot",
+                                    "compassion": 25, "courage": 15},
+                    },
+                    {"text": ("\nYou lack the tools to repair it properly.",)},
+                ),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+            {
+                "label": "No, focus on the core",
+                "text": ("\nYou leave the robot as it is.",),
+                "pause": CONTINUE,
+                "goto": "core",
+            },
+        ),
+    },
+    "complete_chapter_2": {
+        "banner": "CHAPTER 2 COMPLETE!",
+        "text": (
+            "\nAll three fractures are healed!",
+            "The Chrono-Core stabilizes at 100%!",
+            "Brilliant light fills the chamber...",
+            "\n🛡️  +30 COURAGE for restoring the Chrono-Core!",
+        ),
+        # FIXED: Big courage bonus for completing Chapter 2
+        "effects": {"courage": 30, "chapter": 3},
+        "pause": "\nPress Enter for the final choice...",
+        "goto": "final",
+    },
+    
+    # ---------- Final chapter ----------
+    "final": {
+        "banner": "FINAL CONVERGENCE",
+        "text": (
+            "\nThe Chrono-Core is stable. Time itself asks for guidance.",
+            "How will you shape the future of time?",
+        ),
+        "show": "stats",
+        "menu": (DIVIDER, "Choose the future:"),
+        "options": (
+            {"label": "ORDER - Perfect stability, no surprises", "goto": "ending_order"},
+            {"label": "BALANCE - Harmony between change and stability", "goto": "ending_balance"},
+            {"label": "EVOLUTION - Constant change and growth", "goto": "ending_evolution"},
+            # Special ending if all stats are high
+            {
+                "label": "ENLIGHTENMENT - Become one with time (Secret Ending)",
+                "requires": "knowledge >= 70 and courage >= 70 and compassion >= 70",
+                "goto": "ending_enlightenment",
+            },
+        ),
+    },
+    
+    # ---------- Endings ----------
+    "ending_order": {
+        "banner": "ENDING: THE PERFECT CLOCK",
+        "text": (
+            "\n{player_name}, you choose ORDER.",
+            "\nTime becomes a perfect, predictable mechanism.",
+            "Every second ticks with mathematical precision.",
+            "No surprises, no changes, no growth.",
+            "\nThe world is safe... but frozen.",
+            "You become the Keeper of the Eternal Clock.",
+        ),
+        "effects": {"ending": "ORDER ENDING: The Perfect Clock"},
+        "linger": 2,
+        "goto": "ending",
+    },
+    "ending_balance": {
+        "banner": "ENDING: HARMONY RESTORED",
+        "text": (
+            "\n{player_name}, you choose BALANCE.",
+            "\nTime flows naturally between order and change.",
+            "Seasons come and go, civilizations rise and fall.",
+            "Life finds its rhythm in the great dance of time.",
+        ),
+        "branches": (
+            {
+                "if": "compassion >= 60 and helped_robot and saved_owl",
+                "text": (
+                    "\n✨ Because of your great compassion,",
+                    "you achieve PERFECT HARMONY!",
+                    "All beings thrive in your balanced time.",
+                ),
+                "effects": {"ending": "PERFECT ENDING: Master of Balance"},
+            },
+            {
+                "text": (
+                    "\nBalance is restored. The world continues.",
+                    "You have done well, Timekeeper.",
+                ),
+                "effects": {"ending": "GOOD ENDING: Harmony Restored"},
+            },
+        ),
+        "linger": 2,
+        "goto": "ending",
+    },
+    "ending_evolution": {
+        "banner": "ENDING: RIVER OF CHANGE",
+        "text": (
+            "\n{player_name}, you choose EVOLUTION.",
+            "\nTime becomes a rushing river of constant change.",
+            "Innovation accelerates, discoveries multiply!",
+        ),
+        "branches": (
+            {
+                "if": "knowledge >= 70 and Crystal Chronicle",
+                "text": (
+                    "\n🧠 Your wisdom guides the rapid changes.",
+                    "A golden age of discovery begins under your watch!",
+                ),
+                "effects": {"ending": "EVOLUTION ENDING: Guided Progress"},
+            },
+            {
+                "text": (
+                    "\nChange comes rapidly, sometimes chaotically.",
+                    "The future is exciting but unpredictable...",
+                ),
+                "effects": {"ending": "CHAOTIC ENDING: Unchecked Evolution"},
+            },
+        ),
+        "linger": 2,
+        "goto": "ending",
+    },
+    "ending_enlightenment": {
+        "banner": "ENDING: THE ENLIGHTENED",
+        "text": (
+            "\n{player_name}, you achieve ENLIGHTENMENT.",
+            "\nYou understand: Time is not to be controlled.",
+            "It simply IS. You become one with time itself.",
+            "\nYou exist in every moment, everywhere.",
+            "Not controlling, but understanding. Not ruling, but being.",
+            "\nThis is the true purpose of a Timekeeper.",
+        ),
+        "effects": {"ending": "SECRET ENDING: The Enlightened"},
+        "linger": 2,
+        "goto": "ending",
+    },
+    "ending": {
+        "banner": "ADVENTURE COMPLETE",
+        "show": "ending_stats",
+        "menu": ("\nWould you like to:",),
+        "options": (
+            {"label": "Play Again", "effects": {"restart": True}, "goto": "start"},
+            {"label": "Exit Game", "goto": "goodbye"},
+        ),
+    },
+    "goodbye": {
+        "banner": "THANK YOU FOR PLAYING!",
+        "text": (
+            "\nCreated by Himanshu Choudhari",
+            "For Python Project Presentation",
+        ),
+        "linger": 3,
+        "quit": True,
+    },
+}
+
+STORY = Story(SCENES)
+
+# ==================== HISTORY ====================
+
+class History:
+    """The choices that led to a game's state, as a persistent linked list.
+    
+    Each step is one choice, the step before it, and a snapshot of the
+    state at the menu the choice was taken from (or None where nobody will
+    go back to it). Steps never change once made, so branches share every
+    step they have in common: taking a choice costs one small node, and
+    stepping back is following one link. History() is the empty history.
+    """
+    
+    __slots__ = ("choice", "state", "previous", "length")
+    
+    def __init__(self, choice=None, state=None, previous=None):
+        self.choice = choice
+        self.state = state
+        self.previous = previous
+        self.length = previous.length + 1 if previous is not None else 0
+    
+    def __len__(self):
+        return self.length
+    
+    def choices(self):
+        """The choices from the start of the history to here."""
+        choices = []
+        step = self
+        while step.previous is not None:
+            choices.append(step.choice)
+            step = step.previous
+        choices.reverse()
+        return choices
+    
+    def last(self, steps):
+        """The same history, forgetting all but its last steps choices."""
+        kept = []
+        step = self
+        while len(kept) < steps and step.previous is not None:
+            kept.append(step)
+            step = step.previous
+        history = History()
+        for step in reversed(kept):
+            history = History(step.choice, step.state, history)
+        return history
+
+# ==================== SAVING ====================
+
+DEFAULT_SAVE_PATH = os.path.join(os.path.expanduser("~"), ".timekeeper-chronicles.sav")
+
+def save_game(state, path):
+    """Write a state to path atomically.
+    
+    The save goes to a temporary file that is then renamed over path, so a
+    crash part way through leaves the previous save intact.
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(state.pack())
+    os.replace(temporary, path)
+
+def load_game(path):
+    """Read a state saved by save_game; raises ValueError for a bad save."""
+    with open(path, "rb") as file:
+        state = GameState.unpack(file.read())
+    scene = STORY.scenes.get(state.scene)
+    if scene is None or not (scene.options or scene.ask_name):
+        raise ValueError(f"Save is not waiting at a menu ({state.scene!r})")
+    return state
+
+# ==================== JOURNAL ====================
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".timekeeper-chronicles.journal")
+
+class Journal:
+    """Line-per-entry record of everything a session's outcome depends on.
+    
+    Entries are "name <player name>", "choice <key>" for every answered
+    menu, and "state <hex save>" whenever a saved game is restored, so
+    replay() can rebuild the session from the journal alone. Sessions are
+    appended to the file, each starting with "session <local time>". Each
+    entry is flushed as it is written, so a crash loses nothing.
+    """
+    
+    def __init__(self, path):
+        _drop_torn_line(path)
+        self.file = open(path, "a", encoding="utf-8")
+        self.record("session", time.strftime("%Y-%m-%dT%H:%M:%S"))
+    
+    def record(self, kind, value):
+        """Append one entry."""
+        self.file.write(f"{kind} {value}\n")
+        self.file.flush()
+    
+    def close(self):
+        """Close the journal file."""
+        self.file.close()
+
+def _drop_torn_line(path):
+    """Cut off a last line that a crash left without its newline, if there is one."""
+    try:
+        file = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with file:
+        end = file.seek(0, os.SEEK_END)
+        if not end:
+            return
+        file.seek(end - 1)
+        if file.read(1) == b"\n":
+            return
+        # Look back a block at a time for the last whole line's end.
+        position = end
+        while position > 0:
+            size = min(position, 4096)
+            position -= size
+            file.seek(position)
+            newline = file.read(size).rfind(b"\n")
+            if newline >= 0:
+                file.truncate(position + newline + 1)
+                return
+        file.truncate(0)
+
+def read_journal(path):
+    """Read a journal as a list of (kind, value) entries.
+    
+    Saved states come back as GameStates. A last line cut short by a crash
+    is ignored.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if not line.endswith("\n"):
+                break
+            kind, _, value = line[:-1].partition(" ")
+            if kind == "state":
+                value = GameState.unpack(bytes.fromhex(value))
+            elif kind not in ("session", "name", "choice"):
+                raise ValueError(f"Line {number}: unknown journal entry {kind!r}")
+            entries.append((kind, value))
+    return entries
+
+def replay(entries, stop=None):
+    """Rebuild the last session in journal entries on the bare story engine.
+    
+    Nothing is drawn and nothing waits, so thousands of choices replay in
+    milliseconds. With stop, replay halts before the choice after the
+    first stop choices. Returns (state, number of choices replayed); the
+    state is None if the session never started a game.
+    """
+    state = None
+    choices = 0
+    sessions = [number for number, (kind, _) in enumerate(entries) if kind == "session"]
+    if sessions:
+        entries = entries[sessions[-1] + 1:]
+    for kind, value in entries:
+        if kind == "state":
+            state = value.copy()
+        elif kind == "name":
+            if state is None:
+                state = GameState()
+                STORY.enter(state, "start")
+            STORY.give_name(state, value)
+        else:
+            if choices == stop:
+                break
+            if state is None or value not in STORY.options(state):
+                raise ValueError(f"Journal choice {choices + 1} ({value!r}) is not on offer")
+            STORY.advance(state, value)
+            choices += 1
+    return state, choices
+
+# ==================== INSTRUMENTATION ====================
+
+# Live counters when instrumentation is on (see main); None turns it off,
+# and games made while it is off carry no hooks at all.
+METRICS = None
+
+# Seconds between rewrites of the Prometheus file and flushes of the events.
+METRICS_INTERVAL = 15
+
+class EventLog:
+    """JSON-lines event stream that rotates once it grows past max_bytes.
+    
+    Rotation works like logging's RotatingFileHandler: path becomes
+    path.1, path.1 becomes path.2 and so on, keeping `backups` old files.
+    Lines are buffered, so call flush() to get them onto disk.
+    """
+    
+    def __init__(self, path, max_bytes=16 * 1024 * 1024, backups=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = open(path, "a", encoding="utf-8")
+        self.size = self.file.tell()
+    
+    def write(self, event):
+        """Append one event (a dict) as a line."""
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        if self.size + len(line) > self.max_bytes and self.size:
+            self.rotate()
+        self.file.write(line)
+        self.size += len(line)
+    
+    def rotate(self):
+        """Shift the old files along and start a new one."""
+        self.file.close()
+        for number in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{number}"):
+                os.replace(f"{self.path}.{number}", f"{self.path}.{number + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.size = 0
+    
+    def flush(self):
+        """Write buffered events to disk."""
+        self.file.flush()
+    
+    def close(self):
+        """Close the current file."""
+        self.file.close()
+
+def _label(value):
+    """A Prometheus label value, quoted and escaped."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{text}"'
+
+class Metrics:
+    """Counters and timers for every game played in this process.
+    
+    Each game being measured holds a meter() and tells it about every move,
+    the way it tells a Journal. Players' time is charged to the menu they
+    spent it at, from arriving to leaving.
+    Updates take a lock, since the HTTP server plays games on many threads.
+    """
+    
+    def __init__(self, events=None, clock=time.monotonic):
+        self.events = events
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.games = 0
+        self.scene_seconds = Counter()
+        self.scene_visits = Counter()
+        self.choices = Counter()  # (scene, key)
+        self.retries = Counter()
+        self.endings = Counter()
+        # (chapter, stat) -> [sum, count] of the stat as the chapter began
+        self.chapter_stats = {}
+        # Idle browser sessions moved to disk, and brought back
+        self.hibernations = 0
+        self.wakes = 0
+        self.wake_seconds = 0.0
+    
+    def meter(self):
+        """A new game's meter."""
+        return _Meter(self)
+    
+    def hibernated(self):
+        """Count a session moved to disk."""
+        with self.lock:
+            self.hibernations += 1
+    
+    def woke(self, seconds):
+        """Count a session brought back from disk, and how long that took."""
+        with self.lock:
+            self.wakes += 1
+            self.wake_seconds += seconds
+    
+    def record(self, event, game, **fields):
+        """Send an event to the stream. Call with the lock held, and only if there is one."""
+        self.events.write({"time": round(time.time(), 3), "event": event, "game": game, **fields})
+    
+    def prometheus(self):
+        """Every counter in Prometheus' text exposition format."""
+        with self.lock:
+            counters = [
+                ("timekeeper_games_total", "Games started.", [((), self.games)]),
+                ("timekeeper_scene_seconds_total", "Seconds players spent at each menu.",
+                 [((("scene", scene),), round(seconds, 6))
+                  for scene, seconds in sorted(self.scene_seconds.items())]),
+                ("timekeeper_scene_visits_total", "Times players left each menu.",
+                 [((("scene", scene),), count)
+                  for scene, count in sorted(self.scene_visits.items())]),
+                ("timekeeper_choices_total", "Options taken at each menu.",
+                 [((("scene", scene), ("choice", key)), count)
+                  for (scene, key), count in sorted(self.choices.items())]),
+                ("timekeeper_invalid_inputs_total",
+                 "Answers a menu refused, so the player had to try again.",
+                 [((("scene", scene),), count)
+                  for scene, count in sorted(self.retries.items())]),
+                ("timekeeper_endings_total", "Games reaching each ending.",
+                 [((("ending", ending),), count)
+                  for ending, count in sorted(self.endings.items())]),
+                ("timekeeper_sessions_hibernated_total", "Idle sessions moved to disk.",
+                 [((), self.hibernations)]),
+                ("timekeeper_sessions_woken_total", "Hibernated sessions brought back for a request.",
+                 [((), self.wakes)]),
+                ("timekeeper_session_wake_seconds_total", "Seconds spent bringing sessions back.",
+                 [((), round(self.wake_seconds, 6))]),
+            ]
+            chapter_stats = sorted(self.chapter_stats.items())
+        
+        lines = []
+        for name, help, samples in counters:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                text = ",".join(f"{key}={_label(label)}" for key, label in labels)
+                lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+        lines.append("# HELP timekeeper_chapter_stat Players' stats as each chapter began.")
+        lines.append("# TYPE timekeeper_chapter_stat summary")
+        for (chapter, stat), (total, count) in chapter_stats:
+            labels = f'chapter="{chapter}",stat="{stat}"'
+            lines.append(f"timekeeper_chapter_stat_sum{{{labels}}} {total}")
+            lines.append(f"timekeeper_chapter_stat_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+    
+    def save(self, path):
+        """Write prometheus() to path atomically, for a textfile collector."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.prometheus())
+        os.replace(temporary, path)
+    
+    def flush(self, path=None):
+        """Flush the event stream, and save the counters to path if given."""
+        if self.events is not None:
+            with self.lock:
+                self.events.flush()
+        if path:
+            self.save(path)
+    
+    def start_flushing(self, path=None, interval=METRICS_INTERVAL):
+        """Flush every interval seconds on a daemon thread."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush(path)
+                except OSError as error:
+                    print(f"\n⚠️  Could not write metrics ({error.strerror})", file=sys.stderr)
+        
+        threading.Thread(target=loop, name="metrics", daemon=True).start()
+    
+    def close(self, path=None):
+        """Flush everything one last time and close the event stream."""
+        self.flush(path)
+        if self.events is not None:
+            self.events.close()
+
+class _Meter:
+    """What Metrics remembers about one game between its moves."""
+    
+    __slots__ = ("metrics", "number", "scene", "since", "choice", "chapter",
+                 "ending", "flags")
+    
+    def __init__(self, metrics):
+        self.metrics = metrics
+        with metrics.lock:
+            metrics.games += 1
+            self.number = metrics.games
+            if metrics.events is not None:
+                metrics.record("start", self.number)
+        self.scene = None
+        self.since = metrics.clock()
+        self.choice = None
+        self.chapter = 1
+        self.ending = ""
+        self.flags = 0
+    
+    def chose(self, state, choice):
+        """Count a choice about to be taken at the state's menu."""
+        metrics = self.metrics
+        with metrics.lock:
+            self.choice = choice
+            metrics.choices[state.scene, choice] += 1
+            if metrics.events is not None:
+                metrics.record("choice", self.number, scene=state.scene, choice=choice)
+    
+    def moved(self, state):
+        """Charge the time spent at the menu just left and note what changed.
+        
+        The event stream gets a "scene" event for every change of menu,
+        naming the menu left (None for a new game's first), the one arrived
+        at and the choice that led there, and a "flag" event for every
+        progress flag raised.
+        """
+        metrics = self.metrics
+        now = metrics.clock()
+        with metrics.lock:
+            scene = self.scene
+            if state.flags != self.flags:
+                gained = state.flags & ~self.flags
+                if gained and metrics.events is not None:
+                    for flag in FLAGS:
+                        if gained & FLAG_BITS[flag]:
+                            metrics.record("flag", self.number, flag=flag, scene=scene,
+                                           choice=self.choice)
+                self.flags = state.flags
+            if state.scene != scene:
+                seconds = None
+                if scene is not None:
+                    seconds = now - self.since
+                    metrics.scene_seconds[scene] += seconds
+                    metrics.scene_visits[scene] += 1
+                    seconds = round(seconds, 3)
+                if metrics.events is not None:
+                    metrics.record("scene", self.number, scene=scene, to=state.scene,
+                                   choice=self.choice, seconds=seconds)
+                self.scene = state.scene
+                self.since = now
+            self.choice = None
+            if state.chapter > self.chapter:
+                for stat in STATS:
+                    totals = metrics.chapter_stats.setdefault((state.chapter, stat), [0, 0])
+                    totals[0] += getattr(state, stat)
+                    totals[1] += 1
+                if metrics.events is not None:
+                    metrics.record("chapter", self.number, chapter=state.chapter,
+                                   **{stat: getattr(state, stat) for stat in STATS})
+            self.chapter = state.chapter
+            if state.ending and state.ending != self.ending:
+                metrics.endings[state.ending] += 1
+                if metrics.events is not None:
+                    metrics.record("ending", self.number, ending=state.ending)
+            self.ending = state.ending
+    
+    def restored(self, state):
+        """Carry on measuring from a restored game's menu."""
+        metrics = self.metrics
+        with metrics.lock:
+            self.scene = state.scene
+            self.since = metrics.clock()
+            self.choice = None
+            self.chapter = state.chapter
+            self.ending = state.ending
+            self.flags = state.flags
+            if metrics.events is not None:
+                metrics.record("restore", self.number, scene=state.scene, chapter=state.chapter)
+    
+    def hibernating(self):
+        """This game's number and the wall-clock time it reached its menu."""
+        return self.number, time.time() - (self.metrics.clock() - self.since)
+    
+    @classmethod
+    def woken(cls, metrics, number, state, entered):
+        """Carry on measuring a hibernated game, as if it had never left memory.
+        
+        entered is the wall-clock time hibernating() gave, so the time the
+        game spent on disk is still charged to its menu.
+        """
+        meter = cls.__new__(cls)
+        meter.metrics = metrics
+        meter.number = number
+        meter.scene = state.scene
+        meter.since = metrics.clock() - (time.time() - entered)
+        meter.choice = None
+        meter.chapter = state.chapter
+        meter.ending = state.ending
+        meter.flags = state.flags
+        return meter
+    
+    def retried(self, scene):
+        """Count an answer the scene's menu refused."""
+        metrics = self.metrics
+        with metrics.lock:
+            metrics.retries[scene] += 1
+            if metrics.events is not None:
+                metrics.record("retry", self.number, scene=scene)
+
+# A hibernated game's meter: its game number (0 without one) and the
+# wall-clock time it reached its menu.
+_HIBERNATION = struct.Struct("<Id")
+
+# "r", "r 3" or "rewind 3": take back the last choice, or the last three.
+_REWIND = re.compile(r"r(?:ewind)?\s*(\d{0,4})", re.IGNORECASE)
+# Choices a game can always rewind. Its history is cut back to this many
+# once it holds twice as many, so a session that plays on for days keeps
+# a bounded history without copying it at every choice.
+REWIND_DEPTH = 100
+
+class TimekeeperChronicles:
+    # A game holds only its console and its player's progress; the story
+    # itself is the shared, compiled STORY.
+    __slots__ = ("console", "state", "save_path", "journal", "meter", "history", "view")
+    
+    def __init__(self, console=None, save_path=None, journal=None, rewind=False, drawn=True):
+        self.console = console or Console()
+        self.state = GameState()
+        # What the story draws itself through: the game, or None for a game
+        # nobody watches, which then formats no text, menus or hints at all
+        self.view = self if drawn else None
+        
+        # Where the game autosaves whenever the player changes scene
+        self.save_path = save_path
+        # Journal recording the player's name and every choice, if any
+        self.journal = journal
+        
+        # Meter counting this game's moves, if instrumentation is on
+        self.meter = METRICS.meter() if METRICS is not None else None
+        # Snapshots of this game's choices (at least the last REWIND_DEPTH),
+        # for the player to take back, if rewinding is on
+        self.history = History() if rewind else None
+    
+    # ==================== CONSOLE OUTPUT ====================
+    
+    def clear_screen(self):
+        """Clear the screen through the console."""
+        self.console.clear()
+    
+    def sleep(self, seconds):
+        """Pause for effect through the console."""
+        self.console.sleep(seconds)
+    
+    def pause(self, prompt):
+        """Wait for Enter through the console."""
+        self.console.pause(prompt)
+    
+    def print_banner(self, title):
+        """Print a chapter banner."""
+        self.console.write(format_banner(title))
+    
+    def print_scene_banner(self, scene_name):
+        """Print a scene banner."""
+        self.console.write(format_scene_banner(scene_name))
+    
+    def show_stats(self):
+        """Display player stats."""
+        write = self.console.write
+        write(f"\n{'═'*60}")
+        write(f"❤️  HEALTH: {self.state.health}/100 | 🧠 KNOWLEDGE: {self.state.knowledge} | 🛡️  COURAGE: {self.state.courage} | ❤️  COMPASSION: {self.state.compassion}")
+        if self.state.items:
+            write(f"🎒 INVENTORY: {', '.join(self.state.inventory)}")
+        endings = HINTS.endings(self.state)
+        if endings is not None:
+            write(f"🔮 ENDINGS STILL POSSIBLE: {', '.join(map(short_ending, endings)) or 'none'}")
+        write(f"{'═'*60}")
+    
+    def show_ending_stats(self):
+        """Show final statistics."""
+        write = self.console.write
+        write("\n" + "=" * 60)
+        write(f"HERO: {self.state.player_name}")
+        write(f"ENDING: {self.state.ending}")
+        write("=" * 60)
+        
+        write("\n📊 FINAL STATISTICS:")
+        write(f"  ❤️  Health: {self.state.health}/100")
+        write(f"  🧠 Knowledge: {self.state.knowledge}")
+        write(f"  🛡️  Courage: {self.state.courage}")
+        write(f"  ❤️  Compassion: {self.state.compassion}")
+        
+        write("\n🎒 INVENTORY:")
+        if self.state.items:
+            for item in self.state.inventory:
+                write(f"  • {item}")
+        else:
+            write("  (Empty)")
+        
+        write("\n🌟 ACHIEVEMENTS:")
+        achievements = [f"✓ {label}" for name, label in ACHIEVEMENTS
+                        if getattr(self.state, name)]
+        
+        if achievements:
+            for ach in achievements:
+                write(f"  {ach}")
+        else:
+            write("  (No achievements)")
+        
+        write("\n" + "=" * 60)
+    
+    def get_choice(self, options, scene):
+        """Get valid choice from player at the named scene's menu.
+        
+        Returns None if the player rewound instead, leaving the game at
+        another menu.
+        """
+        self.state.scene = scene
+        while True:
+            choice = self.console.read_line("\nYour choice: ").strip()
+            if choice in options:
+                return choice
+            if self.rewind_command(choice):
+                return None
+            self.reject_choice(options)
+    
+    def reject_choice(self, options):
+        """Tell the player which choices the menu takes."""
+        if self.meter is not None:
+            self.meter.retried(self.state.scene)
+        self.console.type_text(f"Please enter one of: {', '.join(options)}")
+        self.console.refused()
+    
+    # ==================== DRAWING THE STORY ====================
+    
+    def arrive(self, scene):
+        """Draw a scene's opening screen."""
+        if scene.banner or scene.scene_banner:
+            self.clear_screen()
+            self.draw_banner(scene)
+        if scene.sleep:
+            self.sleep(scene.sleep)
+        for line in scene.lines:
+            self.console.write(line)
+    
+    def draw_banner(self, scene):
+        """Print the scene's chapter or scene banner."""
+        if scene.banner:
+            self.print_banner(scene.banner)
+        else:
+            self.print_scene_banner(scene.scene_banner)
+    
+    def narrate(self, outcome):
+        """Tell an outcome's text and wait where it asks to."""
+        state = self.state
+        for line in outcome.text:
+            if isinstance(line, tuple):
+                test, yes, no = line
+                line = yes if test(state) else no
+            self.console.type_text(line.format_map(_StoryFields(state)))
+        if outcome.pause:
+            self.pause(outcome.pause)
+        if outcome.linger:
+            self.sleep(outcome.linger)
+    
+    def quit(self):
+        """Leave the game once the story has ended it."""
+        self.console.quit()
+    
+    def show(self, scene):
+        """Draw what a scene shows above its menu each time."""
+        if scene.show:
+            getattr(self, scene.show)()
+    
+    def show_menu(self, scene):
+        """Print a scene's menu and return the keys on offer."""
+        write = self.console.write
+        options = STORY.options(self.state)
+        for line in scene.menu:
+            write(line)
+        for option in scene.options:
+            if option.key in options:
+                write(f"{option.key}. {option.label}")
+        if self.history:
+            write("r. ⏪ Rewind a choice (r 3 rewinds three)")
+        return options
+    
+    # ==================== MAIN GAME FLOW ====================
+    
+    def start_game(self):
+        """Start the game."""
+        self.play("start")
+    
+    def play(self, scene=None):
+        """Play from a scene's arrival, or from where the game is waiting.
+        
+        Each turn of the loop is one input. The story moves between scenes
+        in a loop of its own, and Play Again restarts the same state in
+        place, so the stack stays as deep as it was whatever the number
+        of scenes or games a session plays.
+        """
+        if scene is not None:
+            self.enter(scene)
+        while True:
+            if self.state.scene == EXIT:
+                # Only an undrawn game gets here: the story quits through its view.
+                self.console.quit()
+            scene = STORY.scenes[self.state.scene]
+            if scene.ask_name:
+                self.give_name(self.console.read_name(scene.ask_name))
+            elif self.view is None:
+                choice = self.get_choice(STORY.options(self.state), scene.name)
+                if choice is not None:
+                    self.choose(choice)
+            else:
+                options = self.show_menu(scene)
+                choice = self.get_choice(options, scene.name)
+                if choice is not None:
+                    self.choose(choice)
+    
+    # Each of these moves the game on from one input to the next. play()
+    # drives them from the console; a server can drive them as input arrives.
+    
+    def enter(self, scene):
+        """Arrive at a scene and play on until the game needs input."""
+        try:
+            STORY.enter(self.state, scene, self.view)
+        finally:
+            if self.meter is not None:
+                self.meter.moved(self.state)
+        self.autosave()
+    
+    def give_name(self, name):
+        """Take the player's name (or "Hero") and play on."""
+        name = name.strip() or "Hero"
+        if self.journal:
+            self.journal.record("name", name)
+        if self.history is not None:
+            # A new game (Play Again asks for the name too) can't be rewound into the last.
+            self.history = History()
+        left = self.state.scene
+        try:
+            STORY.give_name(self.state, name, self.view)
+        finally:
+            if self.meter is not None:
+                self.meter.moved(self.state)
+        if self.state.scene != left:
+            self.autosave()
+    
+    def choose(self, choice):
+        """Take a valid menu choice and play on."""
+        if self.journal:
+            self.journal.record("choice", choice)
+        if self.meter is not None:
+            self.meter.chose(self.state, choice)
+        if self.history is not None:
+            self.history = History(choice, self.state.copy(), self.history)
+            if len(self.history) > 2 * REWIND_DEPTH:
+                self.history = self.history.last(REWIND_DEPTH)
+        left = self.state.scene
+        possible = HINTS.endings(self.state) if self.view is not None else None
+        try:
+            STORY.advance(self.state, choice, self.view)
+        finally:
+            if self.meter is not None:
+                self.meter.moved(self.state)
+        self.warn_closed(possible)
+        if self.state.scene != left:
+            self.autosave()
+    
+    def rewind(self, steps=1):
+        """Take back the last steps choices (all of them, if fewer); returns how many."""
+        history = self.history
+        taken = 0
+        snapshot = None
+        while taken < steps and history.previous is not None:
+            snapshot = history.state
+            history = history.previous
+            taken += 1
+        if snapshot is not None:
+            self.history = history
+            self.restore(snapshot)
+        return taken
+    
+    def rewind_command(self, text):
+        """Rewind if text asks to ("r", "r 3", "rewind 3"); False if it doesn't."""
+        match = _REWIND.fullmatch(text) if self.history is not None else None
+        if match is None:
+            return False
+        taken = self.rewind(int(match.group(1) or 1))
+        if not taken:
+            self.console.type_text("\nThere is nothing to rewind yet.")
+            return True
+        self.redraw()
+        self.console.type_text(f"\n⏪ Time flows backwards... {taken} choice"
+                               f"{'s' if taken > 1 else ''} undone.")
+        return True
+    
+    def warn_closed(self, possible):
+        """Warn about endings in possible that the game can no longer reach."""
+        if possible is None or self.state.ending:
+            return
+        still = HINTS.endings(self.state)
+        if still is None:
+            return
+        closed = [ending for ending in possible if ending not in still]
+        if closed:
+            self.console.type_text(f"\n⚠️  That choice closed off: {', '.join(closed)}")
+    
+    # ==================== SAVING & RESUMING ====================
+    
+    def autosave(self):
+        """Save the game to save_path, if autosave is on."""
+        if not self.save_path:
+            return
+        try:
+            save_game(self.state, self.save_path)
+        except OSError as error:
+            self.console.type_text(f"\n⚠️  Autosave failed ({error.strerror}); autosave is now off.")
+            self.save_path = None
+    
+    def close(self):
+        """Close the game's journal, if it keeps one."""
+        if self.journal:
+            self.journal.close()
+    
+    def load(self, path):
+        """Replace the game with a saved one and carry on from its menu."""
+        self.restore(load_game(path))
+        self.resume()
+    
+    def snapshot(self):
+        """Copy the player's progress."""
+        return self.state.copy()
+    
+    def restore(self, state):
+        """Put the game back to a snapshot."""
+        self.state = state.copy()
+        if self.journal:
+            self.journal.record("state", state.pack().hex())
+        if self.meter is not None:
+            self.meter.restored(self.state)
+    
+    def hibernate(self):
+        """The game waiting at its menu as bytes, for wake() to bring back.
+        
+        That is the packed state (which names the menu, and so its prompt)
+        after the meter's game number and when it reached the menu.
+        """
+        number, entered = self.meter.hibernating() if self.meter is not None else (0, 0.0)
+        return _HIBERNATION.pack(number, entered) + self.state.pack()
+    
+    @classmethod
+    def wake(cls, data, console):
+        """A game from hibernate()'s bytes, playing through console.
+        
+        Raises ValueError if data is not a hibernated game.
+        """
+        if len(data) < _HIBERNATION.size:
+            raise ValueError("Hibernated game is truncated")
+        number, entered = _HIBERNATION.unpack_from(data)
+        game = cls.__new__(cls)
+        game.console = console
+        game.state = GameState.unpack(data[_HIBERNATION.size:])
+        game.save_path = None
+        game.journal = None
+        game.meter = None
+        game.history = None
+        game.view = game
+        if METRICS is not None and number:
+            game.meter = _Meter.woken(METRICS, number, game.state, entered)
+        return game
+    
+    def resume(self):
+        """Redraw the menu the game was last waiting at and carry on."""
+        if self.state.scene == "start":
+            self.start_game()
+            return
+        if self.view is not None:
+            self.redraw()
+        self.play()
+    
+    def redraw(self):
+        """Draw the screen of the menu the game is waiting at, up to the menu."""
+        scene = STORY.scenes[self.state.scene]
+        self.clear_screen()
+        self.draw_banner(scene)
+        self.show(scene)
+
+# ==================== STATE EXPLORER ====================
+
+# Highest value of (knowledge, courage, compassion) that any later check can
+# still tell apart, by chapter. Chapter 1 allows for the bonuses every run
+# collects before the final choice (+10 knowledge, +10 compassion and +20
+# courage for finishing Chapter 1, +10 courage on reaching Chapter 2 and +30
+# for finishing it), so grinding a stat past its cap leads nowhere new.
+STAT_CAPS = {
+    1: (60, 30, 60),
+    2: (70, 40, 70),
+    3: (70, 70, 70),
+}
+
+def state_key(state):
+    """Canonical, hashable key for a GameState.
+    
+    Snapshots with the same key play out the same for the rest of the game:
+    inventory order is ignored, stats are capped by STAT_CAPS, health only
+    counts in Chapter 1 (where the forge can kill) and never below zero, and
+    the visited flags stop mattering once Chapter 1 is over.
+    """
+    chapter = state.chapter
+    knowledge_cap, courage_cap, compassion_cap = STAT_CAPS[chapter]
+    if chapter == 1:
+        health = max(state.health, 0)
+        flags = state.flags
+    else:
+        health = None
+        flags = state.flags & ~VISITED_FLAGS
+    return (
+        state.scene, chapter, state.ending, state.items, flags,
+        min(state.knowledge, knowledge_cap),
+        min(state.courage, courage_cap),
+        min(state.compassion, compassion_cap),
+        health,
+    )
+
+def explore():
+    """Breadth-first search over every state reachable from a new game.
+    
+    Returns (states, edges, endings): the number of distinct states, the
+    number of choices leading out of them, and a dict mapping each reachable
+    ending to a shortest list of choices that reaches it.
+    """
+    start = STORY.new_game()
+    seen = {state_key(start)}
+    # Each state is queued with its History; siblings share their parent's.
+    queue = deque([(start, History())])
+    edges = 0
+    endings = {}
+    
+    while queue:
+        state, history = queue.popleft()
+        if state.scene == "ending":
+            if state.ending not in endings:
+                endings[state.ending] = history.choices()
+            continue
+        
+        for choice in STORY.options(state):
+            next_state = state.copy()
+            STORY.advance(next_state, choice)
+            next_key = state_key(next_state)
+            edges += 1
+            if next_key not in seen:
+                seen.add(next_key)
+                queue.append((next_state, History(choice, None, history)))
+    
+    return len(seen), edges, endings
+
+def run_explorer():
+    """Explore the whole game and report what can be reached."""
+    started = time.perf_counter()
+    states, edges, endings = explore()
+    elapsed = time.perf_counter() - started
+    
+    print(f"States: {states}")
+    print(f"Edges: {edges}")
+    print(f"Time: {elapsed:.1f}s")
+    print(f"\nReachable endings ({len(endings)}):")
+    for ending, path in sorted(endings.items()):
+        print(f"  {ending}")
+        print(f"    {' '.join(path)}")
+
+# ==================== SOLVER ====================
+
+# What an ending can require of the stats: a rise ("courage") or a fall
+# ("-health") in one of them, or a rise in the three stats a hero grows.
+GOALS = tuple(sign + stat for stat in STATS for sign in ("", "-")) + ("total",)
+
+def _stat_floors(requirement):
+    """Lowest value of each stat, or of minus a stat, for a requirement to hold.
+    
+    "courage >= 20" gives {"courage": 20} and "health <= 0" gives
+    {"-health": 0}. Only plain comparisons joined by and count; a
+    requirement with or or not gives no floors, since it may hold some
+    other way.
+    """
+    if requirement is None:
+        return {}
+    parts = list(_requirement_parts(requirement))
+    if any(kind == "word" and part != "and" for kind, part in parts):
+        return {}
+    floors = {}
+    for (kind, stat), (_, operator), (number_kind, number) in zip(parts, parts[1:], parts[2:]):
+        if kind != "stat" or number_kind != "number":
+            continue
+        number = int(number)
+        if operator in (">=", ">"):
+            goal, floor = stat[2:], number + (operator == ">")
+        elif operator in ("<=", "<"):
+            goal, floor = "-" + stat[2:], -number + (operator == "<")
+        else:
+            continue
+        floors[goal] = max(floors.get(goal, floor), floor)
+    return floors
+
+def _common_floors(floor_sets):
+    """Floors that hold whichever of several ways is taken."""
+    floor_sets = list(floor_sets)
+    if not floor_sets:
+        return {}
+    return {goal: min(floors[goal] for floors in floor_sets)
+            for goal in floor_sets[0] if all(goal in floors for floors in floor_sets)}
+
+def _merge_floors(*floor_sets):
+    """Floors that all hold at once."""
+    merged = {}
+    for floors in floor_sets:
+        for goal, value in floors.items():
+            merged[goal] = max(merged.get(goal, value), value)
+    return merged
+
+def _gains(outcome):
+    """How far an outcome's effects move each of the GOALS."""
+    changes = {stat: sum(effects.get(stat, 0) for effects in outcome.effects) for stat in STATS}
+    heal = sum(effects.get("heal", 0) for effects in outcome.effects)
+    gains = {}
+    for stat, change in changes.items():
+        gains[stat] = max(0, change + (heal if stat == "health" else 0))
+        gains["-" + stat] = max(0, -change)
+    gains["total"] = sum(gains[stat] for stat in STATS[1:])
+    return gains
+
+def _requirement_values(requirement):
+    """Stat values worth trying to see which ways a requirement can go.
+    
+    Returns a list of {stat: value} dicts. Requirements compare stats with
+    constants, so a value on either side of each constant covers every case.
+    """
+    constants = {}
+    parts = list(_requirement_parts(requirement)) if requirement else []
+    for (kind, stat), _, (number_kind, number) in zip(parts, parts[1:], parts[2:]):
+        if kind == "stat" and number_kind == "number":
+            constants.setdefault(stat[2:], set()).update(
+                (int(number) - 1, int(number), int(number) + 1))
+    return [dict(zip(constants, values)) for values in itertools.product(*constants.values())]
+
+class Solver:
+    """Finds the fewest choices that reach an ending.
+    
+    Every state reachable from a new game is in the state graph, along with
+    its distance to each ending, so solving from one is a lookup and a walk
+    down those distances. Other states (from an edited save, say) fall back
+    to an A* search. States are compared by state_key(), so snapshots that
+    play out the same are searched once. The heuristic never overestimates.
+    It is the larger of two bounds:
+    - the exact distance in a coarser game that forgets stats and health,
+      where any requirement that could go either way does both;
+    - the choices needed to move each stat as far as the ending requires,
+      at the most any one choice can move it.
+    Like explore(), the search stops at the ending screen, so starting
+    over doesn't count.
+    """
+    
+    def __init__(self, story=STORY, graph_path=None):
+        self.story = story
+        self.endings = story_endings(story)
+        # The StateGraph, loaded (or mapped) from graph_path when first needed
+        self.graph_path = DEFAULT_GRAPH_PATH if graph_path is None else graph_path
+        self.graph = None
+        # Most each of the GOALS can move by in one choice and all it sets off
+        free = {}
+        for name in story.scenes:
+            self._free_gains(name, free, set())
+        self.step_gains = {goal: 1 for goal in GOALS}
+        for scene in story.scenes.values():
+            after = self._checks_gains(scene, free)
+            for option in scene.options:
+                for outcome in option.outcomes:
+                    following = free[outcome.goto] if outcome.goto else after
+                    for goal, gain in _gains(outcome).items():
+                        self.step_gains[goal] = max(self.step_gains[goal], gain + following[goal])
+        # Stat values to try for each requirement, the moves out of each
+        # coarse state, and per ending its coarse distances and stat floors
+        self._values = {}
+        self._moves = {}
+        self._targets = {}
+        self._floors = {}
+    
+    def _free_gains(self, name, free, visiting):
+        """Most each of the GOALS can move by between arriving at a scene and its menu."""
+        if name in free:
+            return free[name]
+        if name in visiting:
+            raise ValueError(f"Scene {name!r} leads back to itself without a choice")
+        visiting.add(name)
+        scene = self.story.scenes[name]
+        for outcome in scene.checks:
+            if outcome.goto:
+                self._free_gains(outcome.goto, free, visiting)
+        gains = {goal: 0 for goal in GOALS}
+        for outcome in scene.arrival:
+            following = (self._free_gains(outcome.goto, free, visiting) if outcome.goto
+                         else self._checks_gains(scene, free))
+            for goal, gain in _gains(outcome).items():
+                gains[goal] = max(gains[goal], gain + following[goal])
+        visiting.discard(name)
+        free[name] = gains
+        return gains
+    
+    def _checks_gains(self, scene, free):
+        """Most each of the GOALS can move by from a scene's checks before its menu.
+        
+        Checks that stay at the menu may all fire, so their gains add up.
+        """
+        staying = {goal: 0 for goal in GOALS}
+        leaving = {goal: 0 for goal in GOALS}
+        for outcome in scene.checks:
+            for goal, gain in _gains(outcome).items():
+                if outcome.goto:
+                    leaving[goal] = max(leaving[goal], gain + free[outcome.goto][goal])
+                else:
+                    staying[goal] += gain
+        return {goal: staying[goal] + leaving[goal] for goal in GOALS}
+    
+    @staticmethod
+    def coarse_key(state):
+        """What the coarse game keeps of a state."""
+        return state.scene, state.chapter, state.ending, state.items, state.flags
+    
+    def _holds(self, requirement, test, state):
+        """True, False, or None when a requirement could go either way for some stats."""
+        if test is None:
+            return True
+        values = self._values.get(requirement)
+        if values is None:
+            values = self._values[requirement] = _requirement_values(requirement)
+        if len(values) <= 1:
+            return bool(test(state))
+        trial = state.copy()
+        seen = set()
+        for stats in values:
+            for stat, value in stats.items():
+                setattr(trial, stat, value)
+            seen.add(bool(test(trial)))
+            if len(seen) == 2:
+                return None
+        return seen.pop()
+    
+    def _choices(self, outcomes, state):
+        """Outcomes a first-match list could pick, with None if it could pick none."""
+        for outcome in outcomes:
+            holds = self._holds(outcome.requirement, outcome.test, state)
+            if holds is False:
+                continue
+            yield outcome
+            if holds:
+                return
+        yield None
+    
+    def _follow(self, state, scene, outcome, results, seen):
+        """Every coarse state Story._follow could stop at, added to results."""
+        while True:
+            if outcome is not None:
+                state = state.copy()
+                if outcome.apply is not None:
+                    outcome.apply(state)
+                if outcome.quit:
+                    state.scene = EXIT
+                    results.add(self.coarse_key(state))
+                    return
+                if outcome.goto is not None:
+                    scene = self.story.scenes[outcome.goto]
+                    for arrival in self._choices(scene.arrival, state):
+                        self._follow(state, scene, arrival, results, seen)
+                    return
+            # Checks that stay put may fire again; each coarse state once.
+            mark = (scene.name, self.coarse_key(state))
+            if mark in seen:
+                return
+            seen.add(mark)
+            checks = list(self._choices(scene.checks, state))
+            for check in checks[:-1]:
+                self._follow(state, scene, check, results, seen)
+            outcome = checks[-1]
+            if outcome is None:
+                state = state.copy()
+                state.scene = scene.name
+                results.add(self.coarse_key(state))
+                return
+    
+    def _coarse_moves(self, state):
+        """Coarse states one choice away from a state's coarse state."""
+        key = self.coarse_key(state)
+        moves = self._moves.get(key)
+        if moves is None:
+            moves = set()
+            if state.scene not in ("ending", EXIT):
+                scene = self.story.scenes[state.scene]
+                for option in scene.options:
+                    if self._holds(option.requires, option.test, state) is False:
+                        continue
+                    for outcome in self._choices(option.outcomes, state):
+                        self._follow(state, scene, outcome, moves, set())
+            self._moves[key] = moves
+        return moves
+    
+    def _coarse_distances(self, state, ending):
+        """Fewest coarse choices to the ending from every coarse state mapped so far."""
+        key = self.coarse_key(state)
+        distances = self._targets.get(ending)
+        if distances is not None and key in distances:
+            return distances
+        # Map the coarse game from here, then count back from the ending
+        # over everything mapped, from this state or any before.
+        if key not in self._moves:
+            queue = deque([state])
+            queued = {key}
+            while queue:
+                for move in self._coarse_moves(queue.popleft()):
+                    if move not in self._moves and move not in queued:
+                        queued.add(move)
+                        reached = GameState()
+                        (reached.scene, reached.chapter, reached.ending,
+                         reached.items, reached.flags) = move
+                        queue.append(reached)
+        parents = {key: [] for key in self._moves}
+        for key, moves in self._moves.items():
+            for move in moves:
+                parents[move].append(key)
+        distances = {key: float("inf") for key in self._moves}
+        queue = deque()
+        for key in self._moves:
+            if key[2] == ending:
+                distances[key] = 0
+                queue.append(key)
+        while queue:
+            key = queue.popleft()
+            for parent in parents[key]:
+                if distances[parent] == float("inf"):
+                    distances[parent] = distances[key] + 1
+                    queue.append(parent)
+        self._targets[ending] = distances
+        return distances
+    
+    def _ending_floors(self, ending):
+        """Floors on the stats the ending requires, whichever way it is reached."""
+        scenes = self.story.scenes
+        sets = lambda outcome: any(effects.get("ending") == ending for effects in outcome.effects)
+        # What must hold to be on each way in: options' requirements lead to scenes.
+        entries = {name: [] for name in scenes}
+        for scene in scenes.values():
+            for outcome in scene.arrival + scene.checks:
+                if outcome.goto:
+                    entries[outcome.goto].append(_stat_floors(outcome.requirement))
+            for option in scene.options:
+                for outcome in option.outcomes:
+                    if outcome.goto:
+                        entries[outcome.goto].append(_merge_floors(
+                            _stat_floors(option.requires), _stat_floors(outcome.requirement)))
+        floor_sets = []
+        for scene in scenes.values():
+            entering = _common_floors(entries[scene.name])
+            floor_sets += [_merge_floors(entering, _stat_floors(outcome.requirement))
+                           for outcome in scene.arrival if sets(outcome)]
+            floor_sets += [_stat_floors(outcome.requirement)
+                           for outcome in scene.checks if sets(outcome)]
+            floor_sets += [_merge_floors(_stat_floors(option.requires),
+                                         _stat_floors(outcome.requirement))
+                           for option in scene.options for outcome in option.outcomes
+                           if sets(outcome)]
+        return _common_floors(floor_sets)
+    
+    def heuristic(self, state, ending, distances=None):
+        """A lower bound on the choices from state to the ending."""
+        if distances is None:
+            distances = self._coarse_distances(state, ending)
+        floors = self._floors.get(ending)
+        if floors is None:
+            floors = self._floors[ending] = self._ending_floors(ending)
+        bound = distances[self.coarse_key(state)]
+        total = 0
+        for goal, floor in floors.items():
+            if goal[0] == "-":
+                deficit = floor + getattr(state, goal[1:])
+            else:
+                deficit = floor - getattr(state, goal)
+                if goal != "health":
+                    total += max(deficit, 0)
+            if deficit > 0:
+                bound = max(bound, -(-deficit // self.step_gains[goal]))
+        if total:
+            bound = max(bound, -(-total // self.step_gains["total"]))
+        return bound
+    
+    def load_graph(self):
+        """The state graph, loaded (or mapped) on first use."""
+        if self.graph is None:
+            self.graph = load_state_graph(self.graph_path, self.story)[0]
+        return self.graph
+    
+    def solve(self, ending, state=None):
+        """Fewest choices from state (a new game by default) to the ending.
+        
+        Returns the list of menu keys, or None when no state reachable
+        without starting over has the ending.
+        """
+        if ending not in self.endings:
+            raise ValueError(f"No outcome sets the ending {ending!r}")
+        state = self.story.new_game() if state is None else state
+        if state.ending == ending:
+            return []
+        number = self.load_graph().find(state)
+        if number is None:
+            return self.search(ending, state)
+        return self.graph.path(number, ending)
+    
+    def search(self, ending, state):
+        """Fewest choices from state to the ending, by A* search."""
+        story = self.story
+        state = state.copy()
+        if state.ending == ending:
+            return []
+        distances = self._coarse_distances(state, ending)
+        estimate = self.heuristic(state, ending, distances)
+        if estimate == float("inf"):
+            return None
+        start = state_key(state)
+        costs = {start: 0}
+        tie = itertools.count()
+        # Among equal estimates, go deeper first.
+        frontier = [(estimate, 0, next(tie), start, state, History())]
+        while frontier:
+            _, cost, _, key, state, history = heapq.heappop(frontier)
+            cost = -cost
+            if cost > costs[key]:
+                continue
+            if state.ending == ending:
+                return history.choices()
+            if state.scene in ("ending", EXIT):
+                continue
+            for choice in story.options(state):
+                next_state = state.copy()
+                story.advance(next_state, choice)
+                next_key = state_key(next_state)
+                if next_key in costs and costs[next_key] <= cost + 1:
+                    continue
+                estimate = self.heuristic(next_state, ending, distances)
+                if estimate == float("inf"):
+                    continue
+                costs[next_key] = cost + 1
+                heapq.heappush(frontier, (cost + 1 + estimate, -cost - 1, next(tie),
+                                          next_key, next_state, History(choice, None, history)))
+        return None
+
+def run_solver(target, load_path=None, graph_path=None):
+    """Print the fewest choices to each ending matching target, from a new game or a save."""
+    state = None
+    if load_path:
+        try:
+            state = load_game(load_path)
+        except (OSError, ValueError) as error:
+            sys.exit(f"Can't load {load_path}: {error}")
+    solver = Solver(graph_path=graph_path)
+    endings = [ending for ending in solver.endings if target.lower() in ending.lower()]
+    if not endings:
+        sys.exit(f"No ending matches {target!r}")
+    solver.load_graph()
+    for ending in endings:
+        started = time.perf_counter()
+        path = solver.solve(ending, state)
+        elapsed = time.perf_counter() - started
+        print(f"{ending} ({elapsed * 1000:.1f}ms)")
+        if path is None:
+            print("  unreachable from here")
+        else:
+            print(f"  {len(path)} choices: {' '.join(path)}")
+
+class _AnswerRecorder(HeadlessConsole):
+    """Scripted console noting every answer the game waits for, by chapter."""
+    
+    def __init__(self, choices, name):
+        super().__init__(choices, name)
+        self.game = None
+        # (chapter, answer): ENTER for "Press Enter", chapter None for the name
+        self.answers = []
+    
+    def read_line(self, prompt):
+        choice = super().read_line(prompt)
+        self.answers.append((self.game.state.chapter, choice))
+        return choice
+    
+    def read_name(self, prompt):
+        self.answers.append((None, self.name))
+        return self.name
+    
+    def pause(self, prompt):
+        self.answers.append((self.game.state.chapter, "ENTER"))
+
+def round_trips(path, name="Hero"):
+    """Answers a player waits on along a path of menu choices, chained and not.
+    
+    Returns (answers, lines): every answer the game waits for, in order,
+    and the lines a player who chains them would send, one per chapter.
+    The name is a line of its own, as a name prompt never splits a line.
+    Answers after the path's last choice are left out, bar the Enters on
+    the way to the menu after it.
+    """
+    console = _AnswerRecorder(path, name)
+    game = console.game = TimekeeperChronicles(console)
+    try:
+        game.start_game()
+    except SessionEnded:
+        pass
+    lines = []
+    last = None
+    for chapter, answer in console.answers:
+        if chapter is None or chapter != last:
+            lines.append([])
+        lines[-1].append(answer)
+        last = chapter
+    return [answer for _, answer in console.answers], [" ".join(line) for line in lines]
+
+def run_round_trips(graph_path=None):
+    """Print how many answers the fastest path to each ending waits for."""
+    solver = Solver(graph_path=graph_path)
+    print("Round trips on the fastest path to each ending: one per answer, one per")
+    print("chained line per chapter, and the name then everything else in one line.")
+    for ending in solver.endings:
+        path = solver.solve(ending)
+        if path is None:
+            continue
+        answers, lines = round_trips(path)
+        print(f"\n  {ending}: {len(answers)} / {len(lines)} / 2")
+        print(f"    {lines[0]}")
+        print(f"    {' '.join(answers[1:])}")
+
+# ==================== REACHABILITY INDEX ====================
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".timekeeper-chronicles.idx")
+INDEX_MAGIC = b"TKRI"
+INDEX_VERSION = 1
+# Magic, version, story fingerprint, log2 of the slot count; padded so the
+# slots after it are 8-byte aligned.
+_INDEX_HEADER = struct.Struct("<4sBIB6x")
+
+def _story_fingerprint():
+    """Checksum of the story, so an index built for another story is ignored."""
+    return zlib.crc32(repr(SCENES).encode("utf-8"))
+
+class _KeyPacker:
+    """Packs a state_key() exactly into one int below 2**56, for index slots."""
+    
+    # Bits each field of a packed key takes, from the lowest up
+    WIDTHS = (("health", 8), ("compassion", 7), ("courage", 7), ("knowledge", 7),
+              ("flags", 8), ("items", 8), ("ending", 3), ("chapter", 2), ("scene", 6))
+    
+    def __init__(self, story):
+        self.scenes = {name: number for number, name in enumerate(list(story.scenes) + [EXIT])}
+        self.endings = {ending: number for number, ending in enumerate([""] + story_endings(story))}
+    
+    def pack(self, key):
+        """The int for a state_key(), or None for one the index can't hold."""
+        scene, chapter, ending, items, flags, knowledge, courage, compassion, health = key
+        scene = self.scenes.get(scene)
+        ending = self.endings.get(ending)
+        if scene is None or ending is None or not 0 <= chapter < 4:
+            return None
+        health = 0 if health is None else health + 1
+        if max(knowledge, courage, compassion) > 127 or health > 255 or items > 255 or flags > 255:
+            return None
+        # Chapter is at least 1, so no key packs to 0, the empty slot.
+        return (((((((scene << 2 | chapter) << 3 | ending) << 8 | items) << 8 | flags) << 7
+                  | knowledge) << 7 | courage) << 7 | compassion) << 8 | health
+    
+    def fields(self, packed):
+        """The fields of a packed key (or a NumPy array of them), by name.
+        
+        Scenes and endings come back as their numbers.
+        """
+        fields = {}
+        for name, width in self.WIDTHS:
+            fields[name] = packed & ((1 << width) - 1)
+            packed = packed >> width
+        return fields
+
+def _slot(packed, bits):
+    """First slot to probe for a packed key in a table of 2**bits slots."""
+    return (packed * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
+
+def build_index(path, story=STORY, graph=None):
+    """Map every state reachable from a new game to the endings it can still reach.
+    
+    Reads them off a StateGraph (built here unless one is given): a state
+    can reach an ending if its distance to it is counted. The result is
+    written to path as an open-addressing hash table of 8-byte slots, each
+    holding a packed state_key() below a bitmask of endings (bit i for the
+    i-th of story_endings()). Returns the number of states.
+    """
+    if graph is None:
+        graph = StateGraph.build(story)
+    masks = array.array("B", bytes(len(graph.keys)))
+    for bit, ending in enumerate(story_endings(story)):
+        for number, distance in enumerate(graph.distances[ending]):
+            if distance != UNREACHABLE:
+                masks[number] |= 1 << bit
+    
+    bits = max(len(graph.keys) * 2 - 1, 1).bit_length()
+    slots = array.array("Q", bytes(8 << bits))
+    for number, packed in enumerate(graph.keys):
+        slot = _slot(packed, bits)
+        while slots[slot]:
+            slot = (slot + 1) & ((1 << bits) - 1)
+        slots[slot] = masks[number] << 56 | packed
+    if sys.byteorder != "little":
+        slots.byteswap()
+    
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, _story_fingerprint(), bits))
+        slots.tofile(file)
+    os.replace(temporary, path)
+    return len(graph.keys)
+
+class ReachabilityIndex:
+    """Endings still reachable from a state, looked up in a file built by build_index().
+    
+    The file is memory-mapped on the first lookup, so the game starts no
+    slower and only the pages it touches are read. Each lookup packs the
+    state's key and probes a slot or two. Without a usable index (path is
+    None, none has been built, or it was built for another version of the
+    story) every lookup returns None and the game shows no hints.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._slots = None
+        self._opened = path is None
+    
+    def _open(self):
+        """Map the index file, if there is one for this story."""
+        self._opened = True
+        try:
+            with open(self.path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        if len(mapped) < _INDEX_HEADER.size:
+            mapped.close()
+            return
+        magic, version, fingerprint, bits = _INDEX_HEADER.unpack_from(mapped)
+        if (magic != INDEX_MAGIC or version != INDEX_VERSION or fingerprint != _story_fingerprint()
+                or len(mapped) != _INDEX_HEADER.size + (8 << bits) or sys.byteorder != "little"):
+            mapped.close()
+            return
+        self._mapped = mapped
+        self._slots = memoryview(mapped)[_INDEX_HEADER.size:].cast("Q")
+        self._bits = bits
+        self._packer = _KeyPacker(STORY)
+        endings = story_endings(STORY)
+        # The endings for every mask, so a lookup builds nothing. Game overs
+        # aren't endings anyone aims for, so hints leave them out.
+        self._endings = [tuple(ending for bit, ending in enumerate(endings)
+                               if mask >> bit & 1 and not ending.startswith("GAME OVER"))
+                         for mask in range(256)]
+    
+    def endings(self, state):
+        """Endings (not game overs) the state can still reach, or None if unknown."""
+        if not self._opened:
+            self._open()
+        if self._slots is None:
+            return None
+        packed = self._packer.pack(state_key(state))
+        if packed is None:
+            return None
+        slots = self._slots
+        wrap = (1 << self._bits) - 1
+        slot = _slot(packed, self._bits)
+        while True:
+            value = slots[slot]
+            if not value:
+                return None
+            if value & 0xFFFFFFFFFFFFFF == packed:
+                return self._endings[value >> 56]
+            slot = (slot + 1) & wrap
+
+def short_ending(ending):
+    """An ending's name without its kind, e.g. "The Perfect Clock"."""
+    return ending.partition(": ")[2] or ending
+
+# The index the game shows hints from; main() can point it elsewhere.
+HINTS = ReachabilityIndex(DEFAULT_INDEX_PATH)
+
+def run_build_index(path, graph_path=None):
+    """Build the reachability index from the state graph and say how big it came out."""
+    started = time.perf_counter()
+    graph = load_state_graph(DEFAULT_GRAPH_PATH if graph_path is None else graph_path)[0]
+    states = build_index(path, graph=graph)
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {states:,} states in {elapsed:.1f}s: {path} ({os.path.getsize(path):,} bytes)")
+
+# ==================== STATE GRAPH ====================
+
+DEFAULT_GRAPH_PATH = os.path.join(os.path.expanduser("~"), ".timekeeper-chronicles.graph")
+GRAPH_MAGIC = b"TKSG"
+GRAPH_VERSION = 2
+# magic, version, story fingerprint, then counts of states, edges and the
+# numbers in the rows' table, and the first finished state
+_GRAPH_HEADER = struct.Struct("<4sBIIIII")
+# Distance from a state to an ending it can't reach
+UNREACHABLE = 0xFFFF
+
+class _Recorder:
+    """View that notes every outcome a step plays, for StateGraph's rows."""
+    
+    __slots__ = ("outcomes",)
+    
+    def __init__(self):
+        self.outcomes = []
+    
+    def arrive(self, scene):
+        pass
+    
+    def narrate(self, outcome):
+        self.outcomes.append(outcome)
+    
+    def show(self, scene):
+        pass
+    
+    def quit(self):
+        pass
+
+def _story_outcomes(story):
+    """Every outcome in the story, in an order that only changes with the story."""
+    return [outcome for scene in story.scenes.values() for outcome in scene.outcomes()]
+
+class StateGraph:
+    """Every state reachable from a new game and the choices between them.
+    
+    States are numbered in the order explore() finds them, except that the
+    finished ones (at the ending screen, or quit) come last, from
+    `finished` on. `keys` holds each state's packed state_key(). State n's
+    options are edges offsets[n] up to offsets[n + 1], in menu order: the
+    menu key in `choices`, the state it leads to in `targets` and, in
+    `rows`, which run of outcomes it plays (an index into `row_outcomes`).
+    The whole story only has a few dozen such runs, so a row tells all an
+    edge does to a game. `distances` maps each ending to the fewest
+    choices from every state to a state with it. Arrays are stdlib
+    arrays, so the graph works without NumPy.
+    """
+    
+    def __init__(self, story, offsets, targets, choices, rows, keys, row_outcomes, finished,
+                 distances=None, index=None):
+        self.story = story
+        self.offsets = offsets
+        self.targets = targets
+        self.choices = choices
+        self.rows = rows
+        self.keys = keys
+        self.row_outcomes = row_outcomes
+        self.finished = finished
+        self.packer = _KeyPacker(story)
+        if index is None:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            index = (array.array("Q", (keys[number] for number in order)), array.array("I", order))
+        # The keys in order and the states they belong to, for find() to search
+        self._sorted_keys, self._sorted_states = index
+        self.distances = self._count_distances() if distances is None else distances
+    
+    def _count_distances(self):
+        """Fewest choices from every state to each ending, counted back from it."""
+        states = len(self.keys)
+        # Edges turned around: the states leading into each state
+        starts = array.array("I", bytes(4 * (states + 1)))
+        for target in self.targets:
+            starts[target + 1] += 1
+        for number in range(states):
+            starts[number + 1] += starts[number]
+        filled = array.array("I", starts)
+        sources = array.array("I", bytes(4 * len(self.targets)))
+        offsets = self.offsets
+        for number in range(states):
+            for target in self.targets[offsets[number]:offsets[number + 1]]:
+                sources[filled[target]] = number
+                filled[target] += 1
+        
+        endings = list(self.packer.endings)
+        reached = [endings[self.packer.fields(key)["ending"]] for key in self.keys]
+        distances = {}
+        for ending in endings[1:]:
+            counted = array.array("H", [UNREACHABLE]) * states
+            frontier = [number for number in range(states) if reached[number] == ending]
+            for number in frontier:
+                counted[number] = 0
+            distance = 0
+            while frontier:
+                distance += 1
+                following = []
+                for number in frontier:
+                    for source in sources[starts[number]:starts[number + 1]]:
+                        if counted[source] == UNREACHABLE:
+                            counted[source] = distance
+                            following.append(source)
+                frontier = following
+            distances[ending] = counted
+        return distances
+    
+    def path(self, number, ending):
+        """Fewest menu keys from state number to the ending, or None if there's no way."""
+        distances = self.distances[ending]
+        if distances[number] == UNREACHABLE:
+            return None
+        path = []
+        while distances[number]:
+            for edge in range(self.offsets[number], self.offsets[number + 1]):
+                target = self.targets[edge]
+                if distances[target] == distances[number] - 1:
+                    path.append(str(self.choices[edge]))
+                    number = target
+                    break
+        return path
+    
+    @classmethod
+    def build(cls, story=STORY):
+        """Walk every state reachable from a new game, as explore() does."""
+        packer = _KeyPacker(story)
+        start = story.new_game()
+        ids = {state_key(start): 0}
+        keys = array.array("Q", [packer.pack(state_key(start))])
+        queue = deque([start])
+        # Edges in the order states are found, renumbered at the end
+        offsets = array.array("I", [0])
+        targets = array.array("I")
+        choices = array.array("B")
+        rows = array.array("B")
+        runs = {}
+        recorder = _Recorder()
+        finished = []
+        while queue:
+            state = queue.popleft()
+            if state.scene in ("ending", EXIT):
+                finished.append(len(offsets) - 1)
+                offsets.append(len(targets))
+                continue
+            for choice in story.options(state):
+                next_state = state.copy()
+                recorder.outcomes = []
+                story.advance(next_state, choice, recorder)
+                next_key = state_key(next_state)
+                number = ids.get(next_key)
+                if number is None:
+                    number = ids[next_key] = len(keys)
+                    packed = packer.pack(next_key)
+                    if packed is None:
+                        raise ValueError(f"State {next_key!r} doesn't fit in the graph")
+                    keys.append(packed)
+                    queue.append(next_state)
+                row = runs.setdefault(tuple(recorder.outcomes), len(runs))
+                if row > 255:
+                    raise ValueError("The story has too many kinds of step to map")
+                choices.append(int(choice))
+                targets.append(number)
+                rows.append(row)
+            offsets.append(len(targets))
+        
+        # Renumber so the finished states come last.
+        done = set(finished)
+        order = [number for number in range(len(keys)) if number not in done] + finished
+        renumber = array.array("I", bytes(4 * len(order)))
+        for new, old in enumerate(order):
+            renumber[old] = new
+        arrays = (array.array("I", [0]), array.array("I"), array.array("B"),
+                  array.array("B"), array.array("Q"))
+        new_offsets, new_targets, new_choices, new_rows, new_keys = arrays
+        for old in order:
+            start, end = offsets[old], offsets[old + 1]
+            new_targets.extend(renumber[target] for target in targets[start:end])
+            new_choices.extend(choices[start:end])
+            new_rows.extend(rows[start:end])
+            new_offsets.append(len(new_targets))
+            new_keys.append(keys[old])
+        return cls(story, new_offsets, new_targets, new_choices, new_rows, new_keys,
+                   list(runs), len(order) - len(finished))
+    
+    def find(self, state):
+        """The number of the state with the same state_key(), or None if it isn't reachable."""
+        packed = self.packer.pack(state_key(state))
+        if packed is None:
+            return None
+        index = bisect.bisect_left(self._sorted_keys, packed)
+        if index == len(self._sorted_keys) or self._sorted_keys[index] != packed:
+            return None
+        return self._sorted_states[index]
+    
+    def save(self, path):
+        """Write the graph to path atomically."""
+        number = {id(outcome): index for index, outcome in enumerate(_story_outcomes(self.story))}
+        table = array.array("H")
+        for run in self.row_outcomes:
+            table.append(len(run))
+            table.extend(number[id(outcome)] for outcome in run)
+        arrays = (self.offsets, self.targets, self.keys, self._sorted_keys, self._sorted_states,
+                  *self.distances.values(), table, self.choices, self.rows)
+        if sys.byteorder != "little":
+            arrays = [array.array(part.typecode, part) for part in arrays]
+            for part in arrays:
+                part.byteswap()
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(_GRAPH_HEADER.pack(GRAPH_MAGIC, GRAPH_VERSION, _story_fingerprint(),
+                                          len(self.keys), len(self.targets), len(table),
+                                          self.finished))
+            for part in arrays:
+                part.tofile(file)
+        os.replace(temporary, path)
+    
+    @classmethod
+    def load(cls, path, story=STORY):
+        """Read a graph saved by save(); raises ValueError if it is for another story."""
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) < _GRAPH_HEADER.size:
+            raise ValueError("State graph is truncated")
+        magic, version, fingerprint, states, edges, numbers, finished = \
+            _GRAPH_HEADER.unpack_from(data)
+        if magic != GRAPH_MAGIC or version != GRAPH_VERSION:
+            raise ValueError("Not a state graph this version can read")
+        if fingerprint != _story_fingerprint():
+            raise ValueError("State graph was built for another version of the story")
+        endings = story_endings(story)
+        arrays = []
+        offset = _GRAPH_HEADER.size
+        for typecode, count in (("I", states + 1), ("I", edges), ("Q", states), ("Q", states),
+                                ("I", states), *[("H", states)] * len(endings),
+                                ("H", numbers), ("B", edges), ("B", edges)):
+            part = array.array(typecode)
+            end = offset + part.itemsize * count
+            part.frombytes(data[offset:end])
+            if sys.byteorder != "little":
+                part.byteswap()
+            arrays.append(part)
+            offset = end
+        if offset != len(data):
+            raise ValueError("State graph has the wrong length")
+        offsets, targets, keys, sorted_keys, sorted_states = arrays[:5]
+        distances = dict(zip(endings, arrays[5:-3]))
+        table, choices, rows = arrays[-3:]
+        outcomes = _story_outcomes(story)
+        row_outcomes = []
+        position = 0
+        while position < len(table):
+            length = table[position]
+            row_outcomes.append(tuple(outcomes[number] for number
+                                      in table[position + 1:position + 1 + length]))
+            position += 1 + length
+        return cls(story, offsets, targets, choices, rows, keys, row_outcomes, finished,
+                   distances, (sorted_keys, sorted_states))
+
+def load_state_graph(path=DEFAULT_GRAPH_PATH, story=STORY):
+    """The state graph saved at path, mapped and saved there first if it is missing or stale.
+    
+    Returns (graph, seconds spent mapping it, or None if it was loaded).
+    """
+    try:
+        return StateGraph.load(path, story), None
+    except (OSError, ValueError):
+        pass
+    print("Mapping every reachable state (once per version of the story)...", file=sys.stderr)
+    started = time.perf_counter()
+    graph = StateGraph.build(story)
+    elapsed = time.perf_counter() - started
+    try:
+        graph.save(path)
+    except OSError as error:
+        print(f"⚠️  Could not keep the state graph in {path} ({error.strerror})", file=sys.stderr)
+    return graph, elapsed
+
+# ==================== MONTE CARLO ====================
+
+# Games that haven't reached an ending after this many choices are given up
+# and counted by the menu they were stuck at.
+MAX_CHOICES = 300
+# Games per job handed to a worker. Each job is seeded from the run's seed
+# and its own number, so results don't depend on how many workers there are.
+SIMULATION_CHUNK = 5000
+
+def random_policy(rng, state, options, tried):
+    """Pick any option on offer."""
+    # Cheaper than rng.choice(), and this runs once per simulated choice.
+    return options[int(rng.random() * len(options))]
+
+def curious_policy(rng, state, options, tried):
+    """Pick an option not yet tried at this menu, or any once all have been."""
+    fresh = [key for key in options if (state.scene, key) not in tried]
+    return rng.choice(fresh or options)
+
+POLICIES = {"random": random_policy, "curious": curious_policy}
+
+def simulate(policy, rng, max_choices=MAX_CHOICES):
+    """Play one game on the bare engine, choosing with policy, and return its state."""
+    state = STORY.new_game()
+    tried = set()
+    for _ in range(max_choices):
+        if state.scene == "ending":
+            break
+        options = STORY.options(state)
+        choice = policy(rng, state, options, tried)
+        tried.add((state.scene, choice))
+        STORY.advance(state, choice)
+    return state
+
+def _simulate_chunk(policy_name, seed, chunk, runs):
+    """Play one job's games and count their endings, achievements and final stats."""
+    rng = random.Random(f"{seed}/{chunk}")
+    policy = POLICIES[policy_name]
+    endings = Counter()
+    achievements = Counter()
+    stats = {stat: Counter() for stat in STATS}
+    for _ in range(runs):
+        state = simulate(policy, rng)
+        endings[state.ending or f"(unfinished at {state.scene})"] += 1
+        for name, label in ACHIEVEMENTS:
+            if getattr(state, name):
+                achievements[label] += 1
+        for stat, counts in stats.items():
+            counts[getattr(state, stat)] += 1
+    return endings, achievements, stats
+
+def run_simulation(runs, policy="random", seed=0, workers=None):
+    """Play runs games across a process pool and return the merged counts."""
+    jobs = [(policy, seed, chunk, min(SIMULATION_CHUNK, runs - start))
+            for chunk, start in enumerate(range(0, runs, SIMULATION_CHUNK))]
+    endings = Counter()
+    achievements = Counter()
+    stats = {stat: Counter() for stat in STATS}
+    if workers == 1:
+        results = (_simulate_chunk(*job) for job in jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(workers)
+        results = pool.map(_simulate_chunk, *zip(*jobs))
+    try:
+        for chunk_endings, chunk_achievements, chunk_stats in results:
+            endings.update(chunk_endings)
+            achievements.update(chunk_achievements)
+            for stat, counts in chunk_stats.items():
+                stats[stat].update(counts)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return endings, achievements, stats
+
+def _percentile(counts, share):
+    """The value below which share of a histogram's weight falls."""
+    target = share * sum(counts.values())
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= target:
+            return value
+    return None
+
+def run_simulator(runs, policy, seed, workers):
+    """Simulate many random playthroughs and report how they turned out."""
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    endings, achievements, stats = run_simulation(runs, policy, seed, workers)
+    elapsed = time.perf_counter() - started
+    
+    print(f"Simulated {runs:,} {policy} games in {elapsed:.1f}s "
+          f"({runs / elapsed:,.0f} games/s, {workers} workers, seed {seed})")
+    print("\nENDINGS:")
+    for ending, count in endings.most_common():
+        print(f"  {ending:<40}{count:>12,}{count / runs:>9.2%}")
+    print("\nACHIEVEMENTS:")
+    for _, label in ACHIEVEMENTS:
+        count = achievements[label]
+        print(f"  {label:<40}{count:>12,}{count / runs:>9.2%}")
+    print(f"\n{'FINAL STATS':<16}" + "".join(f"{name:>7}" for name in ("p5", "p25", "p50", "p75", "p95")))
+    for stat, counts in stats.items():
+        print(f"  {stat:<14}" + "".join(
+            f"{_percentile(counts, share):>7}" for share in (0.05, 0.25, 0.5, 0.75, 0.95)))
+
+# ==================== THRESHOLD SWEEP ====================
+
+# Stat thresholds that can be tuned by name:
+# (chapter they are tested in, scene, stat, value in the story).
+THRESHOLDS = {
+    "owl_courage": (1, "mechanical", "courage", 20),
+    "forge_courage": (1, "volcanic", "courage", 30),
+    "mechanical_courage": (2, "heal_mechanical", "courage", 40),
+    "organic_compassion": (2, "heal_organic", "compassion", 50),
+    "elemental_knowledge": (2, "heal_elemental", "knowledge", 60),
+    "secret_knowledge": (3, "final", "knowledge", 70),
+    "secret_courage": (3, "final", "courage", 70),
+    "secret_compassion": (3, "final", "compassion", 70),
+    "balance_compassion": (3, "ending_balance", "compassion", 60),
+    "evolution_knowledge": (3, "ending_evolution", "knowledge", 70),
+}
+CHAPTERS = (1, 2, 3)
+
+def _substitute(spec, pattern, replacement):
+    """Copy of a scene spec with pattern replaced in its requirements."""
+    if isinstance(spec, dict):
+        return {key: pattern.sub(replacement, value)
+                if key in ("if", "requires") else _substitute(value, pattern, replacement)
+                for key, value in spec.items()}
+    if isinstance(spec, (list, tuple)):
+        return type(spec)(_substitute(value, pattern, replacement) for value in spec)
+    return spec
+
+def tuned_scenes(values):
+    """SCENES with the named THRESHOLDS in values changed to the given numbers."""
+    scenes = dict(SCENES)
+    for name, value in values.items():
+        _, scene, stat, default = THRESHOLDS[name]
+        pattern = re.compile(rf"\b{stat} (>=|<=|==|!=|<|>) {default}\b")
+        scenes[scene] = _substitute(scenes[scene], pattern, rf"{stat} \g<1> {value:d}")
+    return scenes
+
+def story_endings(story=STORY):
+    """Every ending an outcome of the story can set, sorted."""
+    return sorted({effects["ending"] for scene in story.scenes.values()
+                   for outcome in scene.outcomes() for effects in outcome.effects
+                   if "ending" in effects})
+
+class ThresholdSweep:
+    """Random playthroughs replayed chapter by chapter under tuned thresholds.
+    
+    Every evaluation plays the same games with the same random numbers, so
+    combinations can be compared fairly. The games are played one chapter at
+    a time: the states they reach the next chapter with are kept, keyed by
+    the thresholds tested so far, and only chapters from the first changed
+    threshold's onwards are played again. Sweeping chapter by chapter (as
+    sweep() does) means a Chapter 3 threshold never replays Chapters 1 and 2.
+    """
+    
+    def __init__(self, games, seed=0, policy="random", max_choices=MAX_CHOICES):
+        self.games = games
+        self.seed = seed
+        self.policy = POLICIES[policy]
+        self.max_choices = max_choices
+        # Per chapter: (thresholds up to it, states after it as (fields, choices) counts)
+        self._played = {}
+        # Per chapter: (its own thresholds, the story they give)
+        self._stories = {}
+        # How many times each chapter has been played
+        self.replays = Counter()
+    
+    def evaluate(self, values):
+        """How the games end with the given THRESHOLDS values.
+        
+        Returns a Counter of endings, with "(unfinished)" for games still
+        going after max_choices choices.
+        """
+        values = {name: values.get(name, threshold[3]) for name, threshold in THRESHOLDS.items()}
+        population = None
+        for chapter in CHAPTERS:
+            prefix = tuple(value for name, value in values.items()
+                           if THRESHOLDS[name][0] <= chapter)
+            played = self._played.get(chapter)
+            if played is None or played[0] != prefix:
+                story = self._story(chapter, values)
+                if population is None:
+                    population = Counter({(story.new_game().astuple(), 0): self.games})
+                played = prefix, self._play_chapter(story, chapter, population)
+                self._played[chapter] = played
+                self.replays[chapter] += 1
+            population = played[1]
+        endings = Counter()
+        for (fields, _), count in population.items():
+            endings[GameState.from_tuple(fields).ending or "(unfinished)"] += count
+        return endings
+    
+    def _story(self, chapter, values):
+        """The story with one chapter's thresholds tuned; other chapters aren't played."""
+        own = {name: value for name, value in values.items() if THRESHOLDS[name][0] == chapter}
+        key = tuple(own.values())
+        cached = self._stories.get(chapter)
+        if cached is None or cached[0] != key:
+            cached = key, Story(tuned_scenes(own))
+            self._stories[chapter] = cached
+        return cached[1]
+    
+    def _play_chapter(self, story, chapter, population):
+        """Play each game in population until it leaves the chapter, ends or runs out of choices."""
+        rng = random.Random(f"{self.seed}/{chapter}")
+        policy = self.policy
+        played = Counter()
+        for (fields, used), count in population.items():
+            state = GameState.from_tuple(fields)
+            if state.chapter != chapter or state.scene == "ending" or used >= self.max_choices:
+                played[fields, used] += count
+                continue
+            for _ in range(count):
+                game = state.copy()
+                choices = used
+                tried = set()
+                while (choices < self.max_choices and game.scene != "ending"
+                       and game.chapter == chapter):
+                    choice = policy(rng, game, story.options(game), tried)
+                    tried.add((game.scene, choice))
+                    story.advance(game, choice)
+                    choices += 1
+                played[game.astuple(), choices] += 1
+        return played
+    
+    def sweep(self, ranges):
+        """Evaluate every combination of ranges, a dict of THRESHOLDS names to values.
+        
+        Yields (values, endings). Thresholds of later chapters vary fastest,
+        so consecutive combinations share as many played chapters as they can.
+        """
+        names = sorted(ranges, key=lambda name: THRESHOLDS[name][0])
+        for combination in itertools.product(*(ranges[name] for name in names)):
+            values = dict(zip(names, combination))
+            yield values, self.evaluate(values)
+
+def parse_sweep_range(text):
+    """Parse "name=low:high:step" or "name=a,b,c" into (name, values)."""
+    name, _, spec = text.partition("=")
+    if name not in THRESHOLDS:
+        raise ValueError(f"Unknown threshold {name!r} (choose from {', '.join(THRESHOLDS)})")
+    try:
+        if ":" in spec:
+            low, high, *step = (int(part) for part in spec.split(":"))
+            values = list(range(low, high + 1, step[0] if step else 1))
+        else:
+            values = [int(part) for part in spec.split(",")]
+    except (ValueError, IndexError):
+        raise ValueError(f"Bad range {text!r}; use name=low:high:step or name=a,b,c") from None
+    if not values:
+        raise ValueError(f"Range {text!r} is empty")
+    return name, values
+
+def run_sweep(specs, games, seed, policy):
+    """Sweep threshold ranges and write each combination's ending shares as CSV."""
+    try:
+        ranges = dict(parse_sweep_range(spec) for spec in specs)
+    except ValueError as error:
+        sys.exit(str(error))
+    sweeper = ThresholdSweep(games, seed, policy)
+    endings = story_endings() + ["(unfinished)"]
+    names = sorted(ranges, key=lambda name: THRESHOLDS[name][0])
+    reached = Counter()
+    writer = csv.writer(sys.stdout)
+    writer.writerow(names + endings)
+    started = time.perf_counter()
+    points = 0
+    for values, counts in sweeper.sweep(ranges):
+        writer.writerow([values[name] for name in names]
+                        + [f"{counts[ending] / games:.4f}" for ending in endings])
+        reached.update(counts.keys())
+        points += 1
+    elapsed = time.perf_counter() - started
+    
+    print(f"\nSwept {points:,} combinations of {games:,} {policy} games in {elapsed:.1f}s "
+          f"(chapters played: " + ", ".join(f"{chapter}: {sweeper.replays[chapter]:,}"
+                                            for chapter in CHAPTERS) + ")", file=sys.stderr)
+    print("Combinations reaching each ending:", file=sys.stderr)
+    for ending in endings:
+        print(f"  {ending:<40}{reached[ending]:>8,}", file=sys.stderr)
+
+# ==================== BATCH ENGINE ====================
+
+# Health changes compose as min(cap, health + add) + bonus; "no cap" is this.
+_NO_CAP = 1 << 30
+
+class _Steps:
+    """The effects of a run of outcomes, folded together."""
+    
+    def __init__(self):
+        self.cap = _NO_CAP
+        self.add = 0
+        self.bonus = 0
+        self.stats = dict.fromkeys(STATS[1:], 0)
+        self.gives = []
+        self.flags = 0
+        self.chapter = 0
+        self.ending = None
+        self.restart = False
+    
+    def then(self, effects):
+        """Follow on with an outcome's effects, in the order the story applies them."""
+        for effect in effects:
+            for name, value in effect.items():
+                if name == "health":
+                    self.bonus += value
+                elif name in STATS:
+                    self.stats[name] += value
+                elif name == "heal":
+                    # min(100, min(cap, h + add) + bonus + value)
+                    self.cap = min(100, self.cap + self.bonus + value)
+                    self.add += self.bonus + value
+                    self.bonus = 0
+                elif name == "give":
+                    self.gives.append(ITEMS.index(value))
+                elif name == "set":
+                    self.flags |= FLAG_BITS[value]
+                elif name == "chapter":
+                    self.chapter = value
+                elif name == "ending":
+                    self.ending = value
+                elif name == "restart":
+                    self.__init__()
+                    self.restart = True
+
+# A game's knowledge, courage, compassion and health - 100 are packed into
+# one int64, 16 bits each. Only health can go below zero, so it goes on top.
+def _pack_stats(knowledge, courage, compassion, health):
+    """Stats (or changes to them) as one packed int."""
+    return knowledge | courage << 16 | compassion << 32 | health << 48
+
+class BatchEngine:
+    """Many games stored as parallel NumPy arrays and advanced together.
+    
+    Games walk a StateGraph. Each game's place is one int64 holding the
+    state it's in, where that state's edges start and how many there are,
+    and the row of the edge that led there. Every edge holds the place it
+    leads to, so a step picks an edge for each game by arithmetic and
+    moves it with a single lookup, with no requirement tested while
+    playing. What the graph's keys leave out is kept per game: the stats
+    (exact, where keys cap them), packed into one int64, the order items
+    were found in, and the areas visited once Chapter 1 is over. Most
+    edges just add their row's change to the packed stats. The few that
+    restart, heal past Chapter 1, hand over new items or leave Chapter 1
+    are numbered last and applied to just the games taking them. The
+    same choices reach the same states as on Story.advance().
+    """
+    
+    # Rarer effects, handled only for the games whose rows have them
+    _RESTART, _HEAL, _GIVE, _CHAPTER = 1, 2, 4, 8
+    # Games play_random() steps together: enough to keep NumPy busy, few
+    # enough that their arrays stay in the CPU's cache.
+    CHUNK = 1 << 16
+    
+    def __init__(self, size, graph):
+        if np is None:
+            raise RuntimeError("The batch engine needs NumPy (pip install numpy)")
+        self.size = size
+        self.graph = graph
+        self._compile(graph)
+        self.places = np.empty(size, np.int64)
+        self.stats = np.empty(size, np.int64)
+        self.item_order = np.empty(size, np.uint32)
+        self.visited = np.empty(size, np.uint8)
+        # Choices taken so far, over all games
+        self.choices = 0
+        self.new_games()
+    
+    def _compile(self, graph):
+        """Turn the graph and its rows into the arrays a step looks up."""
+        states = len(graph.keys)
+        finished = graph.finished
+        looping = np.arange(finished, states)
+        # Finished states have no options but an edge back to themselves, so
+        # games that are over step with the rest until enough are over to drop.
+        offsets = np.frombuffer(graph.offsets, np.uint32).astype(np.int64)
+        counts = np.diff(offsets)
+        offsets = offsets[:-1].copy()
+        offsets[finished:] = len(graph.targets) + np.arange(len(looping))
+        counts[finished:] = 0
+        targets = np.concatenate([np.frombuffer(graph.targets, np.uint32), looping]).astype(np.int64)
+        self._choices = np.concatenate([np.frombuffer(graph.choices, np.uint8),
+                                        np.zeros(len(looping), np.uint8)])
+        
+        rows = []
+        for run in graph.row_outcomes:
+            steps = _Steps()
+            for outcome in run:
+                steps.then(outcome.effects)
+            rows.append(steps)
+        rows.append(_Steps())
+        edge_rows = np.concatenate([np.frombuffer(graph.rows, np.uint8),
+                                    np.full(len(looping), len(rows) - 1)]).astype(np.int64)
+        
+        fields = graph.packer.fields(np.frombuffer(graph.keys, np.uint64))
+        self._ending = fields["ending"].astype(np.intp)
+        self.scene_names = list(graph.packer.scenes)
+        self.endings = list(graph.packer.endings)
+        
+        # Rarer effects mostly do nothing, or the same thing every time, from
+        # a given state: its items are held already, and its health and the
+        # areas visited are in its key. So each edge gets a variant of its
+        # row with what the effects come to from there. Only restarts, heals
+        # past Chapter 1, new items and leaving Chapter 1 stay rare.
+        sources = np.concatenate([np.repeat(np.arange(finished), counts[:finished]), looping])
+        
+        def per_edge(value):
+            return np.array([value(steps) for steps in rows], np.int64)[edge_rows]
+        
+        restart = per_edge(lambda steps: steps.restart) != 0
+        chapter_one = restart | (fields["chapter"][sources] == 1)
+        gives = per_edge(lambda steps: sum(1 << item for item in steps.gives))
+        gives &= ~np.where(restart, 0, fields["items"][sources].astype(np.int64))
+        leave = chapter_one & (per_edge(lambda steps: steps.chapter) > 1)
+        flags = np.where(restart, 0, fields["flags"][sources].astype(np.int64))
+        visited = np.where(leave, (flags | per_edge(lambda steps: steps.flags)) & VISITED_FLAGS, 0)
+        # Chapter 1 keys hold health + 1, or 1 with no health left.
+        heal = per_edge(lambda steps: steps.cap) != _NO_CAP
+        health = np.where(restart, 100, fields["health"][sources].astype(np.int64) - 1)
+        known = heal & chapter_one & (health > 0)
+        healed = np.where(known, np.minimum(per_edge(lambda steps: steps.cap),
+                                            health + per_edge(lambda steps: steps.add))
+                          + per_edge(lambda steps: steps.bonus) - health, 0)
+        special = (self._RESTART * restart | self._HEAL * (heal & ~known)
+                   | self._GIVE * (gives != 0) | self._CHAPTER * leave)
+        # Number the variants with rarer effects last, so one comparison finds them.
+        variants, edge_rows = np.unique((special != 0) << 46 | special << 42 | (healed + 512) << 32
+                                        | visited << 24 | gives << 16 | edge_rows,
+                                        return_inverse=True)
+        variants = [(rows[variant & 0xFFFF], variant >> 42 & 0xF, (variant >> 32 & 0x3FF) - 512,
+                     variant >> 24 & 0xFF, variant >> 16 & 0xFF) for variant in variants.tolist()]
+        self._first_special = sum(not special for _, special, *_ in variants)
+        
+        # A place, from the lowest bits: first edge, row, state, option count.
+        self._row_shift = len(targets).bit_length()
+        self._state_shift = self._row_shift + (len(variants) - 1).bit_length()
+        self._count_shift = self._state_shift + states.bit_length()
+        if self._count_shift + int(counts.max()).bit_length() > 63:
+            raise ValueError("The story's graph is too large for the batch engine")
+        self._offset_mask = (1 << self._row_shift) - 1
+        self._row_mask = (1 << (self._state_shift - self._row_shift)) - 1
+        self._state_mask = (1 << (self._count_shift - self._state_shift)) - 1
+        # Places below this have no options left: the game is over.
+        self._playing = 1 << self._count_shift
+        self._places = (counts[targets] << self._count_shift | targets << self._state_shift
+                        | edge_rows << self._row_shift | offsets[targets])
+        
+        def table(value, dtype):
+            return np.array([value(*variant) for variant in variants], dtype)
+        
+        def change(steps, special, healed, visited, gives):
+            if steps.cap == _NO_CAP:
+                health = steps.bonus
+            else:
+                # Heals that depend on a game's own health are left to _apply_special.
+                health = 0 if special & self._HEAL else healed
+            return _pack_stats(*(steps.stats[stat] for stat in STATS[1:]), health)
+        
+        def new_items(steps, special, healed, visited, gives):
+            order = 0
+            for item in steps.gives:
+                if gives & 1 << item:
+                    order = order << 4 | item + 1
+                    gives &= ~(1 << item)
+            return order
+        
+        self._special = table(lambda steps, special, *_: special, np.uint8)
+        self._change = table(change, np.int64)
+        self._cap = table(lambda steps, *_: steps.cap, np.int64)
+        self._add = table(lambda steps, *_: steps.add, np.int64)
+        self._bonus = table(lambda steps, *_: steps.bonus, np.int64)
+        self._order_shift = table(lambda steps, *variant: 4 * bin(variant[-1]).count("1"), np.uint32)
+        self._order_items = table(new_items, np.uint32)
+        self._visited = table(lambda steps, special, healed, visited, gives: visited, np.uint8)
+        
+        start = graph.story.new_game()
+        number = graph.find(start)
+        self._start = (int(counts[number]) << self._count_shift | number << self._state_shift
+                       | int(offsets[number]),
+                       _pack_stats(start.knowledge, start.courage, start.compassion, start.health - 100),
+                       start.item_order)
+    
+    def new_games(self):
+        """Start every game anew, at its first menu."""
+        place, stats, item_order = self._start
+        self.places.fill(place)
+        self.stats.fill(stats)
+        self.item_order.fill(item_order)
+        self.visited.fill(0)
+    
+    def state_ids(self, places=None):
+        """The numbers of the states games are in (all of them by default)."""
+        return (self.places if places is None else places) >> self._state_shift & self._state_mask
+    
+    def _take(self, places, stats, item_order, visited, edges):
+        """Move games at places along edges; returns the places they reach.
+        
+        stats, item_order and visited hold those games' own and are
+        updated in place.
+        """
+        reached = self._places.take(edges)
+        rows = reached >> self._row_shift & self._row_mask
+        stats += self._change.take(rows)
+        if rows.max(initial=0) >= self._first_special:
+            where = np.flatnonzero(rows >= self._first_special)
+            self._apply_special(where, rows[where], stats, item_order, visited)
+        return reached
+    
+    def _apply_special(self, where, rows, stats, item_order, visited):
+        """Apply the rarer effects of rows, restarts first, to the games at where."""
+        special = self._special[rows]
+        restart = (special & self._RESTART) != 0
+        if restart.any():
+            games = where[restart]
+            stats[games] = self._change[rows[restart]]
+            item_order[games] = 0
+            visited[games] = 0
+        heal = (special & self._HEAL) != 0
+        if heal.any():
+            games = where[heal]
+            picked = rows[heal]
+            health = 100 + (stats[games] >> 48)
+            healed = np.minimum(self._cap[picked], health + self._add[picked]) + self._bonus[picked]
+            stats[games] += (healed - health) << 48
+        give = (special & self._GIVE) != 0
+        if give.any():
+            games = where[give]
+            picked = rows[give]
+            item_order[games] = item_order[games] << self._order_shift[picked] | self._order_items[picked]
+        leave = (special & self._CHAPTER) != 0
+        if leave.any():
+            # Visited flags drop out of state keys after Chapter 1, so keep them.
+            visited[where[leave]] = self._visited[rows[leave]]
+    
+    def step(self, keys, games=None):
+        """Take one menu key per game and play each on to its next menu.
+        
+        keys holds a key per game (1 for the first option), or per game in
+        games when only those are playing. A game whose key is not on offer
+        stays where it is, as do games that are over. Returns how many
+        games took their choice.
+        """
+        games = np.arange(self.size) if games is None else np.asarray(games)
+        places = self.places[games]
+        keys = np.asarray(keys)
+        first = places & self._offset_mask
+        counts = places >> self._count_shift
+        edges = np.full(len(games), -1, np.int64)
+        for column in range(int(counts.max(initial=0))):
+            edge = np.minimum(first + column, len(self._choices) - 1)
+            match = (column < counts) & (self._choices.take(edge) == keys)
+            edges[match] = edge[match]
+        moving = np.flatnonzero(edges >= 0)
+        games = games[moving]
+        stats = self.stats[games]
+        item_order = self.item_order[games]
+        visited = self.visited[games]
+        self.places[games] = self._take(places[moving], stats, item_order, visited, edges[moving])
+        self.stats[games] = stats
+        self.item_order[games] = item_order
+        self.visited[games] = visited
+        self.choices += len(games)
+        return len(games)
+    
+    def play_random(self, rng, max_choices=MAX_CHOICES, record=0):
+        """Play every game on, each picking evenly among the options on offer.
+        
+        Games stop when they're over or have taken max_choices choices.
+        Returns the keys the first record games took, as an array with a
+        row per step and a column per game (0 once a game is over).
+        """
+        recorded = np.zeros((max_choices, record), np.int32)
+        for start in range(0, self.size, self.CHUNK):
+            self._play_chunk(np.arange(start, min(start + self.CHUNK, self.size)),
+                             rng, max_choices, recorded)
+        return recorded
+    
+    def _play_chunk(self, games, rng, max_choices, recorded):
+        """Play the games in games on, as play_random() does.
+        
+        They're stepped as compact arrays of their own, from which games
+        that are over are dropped once they're a quarter.
+        """
+        places = self.places[games]
+        stats = self.stats[games]
+        item_order = self.item_order[games]
+        visited = self.visited[games]
+        record = recorded.shape[1]
+        
+        def keep(where):
+            """Write the games at where back to the engine's arrays."""
+            chosen = games[where]
+            self.places[chosen] = places[where]
+            self.stats[chosen] = stats[where]
+            self.item_order[chosen] = item_order[where]
+            self.visited[chosen] = visited[where]
+        
+        for step in range(max_choices):
+            over = int(np.count_nonzero(places < self._playing))
+            if over == len(places):
+                break
+            if over > len(places) // 4:
+                done = places < self._playing
+                keep(np.flatnonzero(done))
+                playing = np.flatnonzero(~done)
+                games, places, stats, item_order, visited = (
+                    games[playing], places[playing], stats[playing], item_order[playing],
+                    visited[playing])
+                over = 0
+            self.choices += len(places) - over
+            # 32 random bits per game pick among its options by multiplying
+            # and shifting; the bias is at most a count in 2**32.
+            bits = rng.bit_generator.random_raw((len(places) + 1) // 2).view(np.uint32)[:len(places)]
+            edges = (places & self._offset_mask) + (bits * (places >> self._count_shift) >> 32)
+            until = np.searchsorted(games, record)
+            if until:
+                recorded[step, games[:until]] = self._choices.take(edges[:until])
+            places = self._take(places, stats, item_order, visited, edges)
+        keep(slice(None))
+    
+    def state(self, game):
+        """One game's progress as a GameState."""
+        fields = self.graph.packer.fields(self.graph.keys[self.state_ids(int(self.places[game]))])
+        stats = int(self.stats[game])
+        state = GameState()
+        state.player_name = "Hero"
+        state.items = fields["items"]
+        state.item_order = int(self.item_order[game])
+        state.flags = fields["flags"] | int(self.visited[game])
+        state.health = 100 + (stats >> 48)
+        state.knowledge = stats & 0xFFFF
+        state.courage = stats >> 16 & 0xFFFF
+        state.compassion = stats >> 32 & 0xFFFF
+        state.chapter = fields["chapter"]
+        state.scene = self.scene_names[fields["scene"]]
+        state.ending = self.endings[fields["ending"]]
+        return state
+    
+    def ending_counts(self):
+        """How many games have each ending ("" for none yet)."""
+        counts = np.bincount(self._ending.take(self.state_ids()), minlength=len(self.endings))
+        return Counter({ending: int(count) for ending, count in zip(self.endings, counts) if count})
+
+def _replay_keys(keys):
+    """Play one game on the scalar engine with a batch game's keys."""
+    state = STORY.new_game()
+    for key in keys:
+        choice = str(key)
+        if key and state.scene != EXIT and choice in STORY.options(state):
+            STORY.advance(state, choice)
+    return state
+
+def run_batch(size, seed, graph_path=DEFAULT_GRAPH_PATH, checked=2000):
+    """Simulate games on the batch engine and check some against the scalar one."""
+    if np is None:
+        sys.exit("The batch engine needs NumPy (pip install numpy)")
+    graph, mapped = load_state_graph(graph_path)
+    if mapped is not None:
+        print(f"Mapped {len(graph.keys):,} states and {len(graph.targets):,} choices "
+              f"in {mapped:.1f}s, kept in {graph_path}")
+    checked = min(checked, size)
+    started = time.perf_counter()
+    engine = BatchEngine(size, graph)
+    compiled = time.perf_counter() - started
+    started = time.perf_counter()
+    recorded = engine.play_random(np.random.default_rng(seed), record=checked)
+    elapsed = time.perf_counter() - started
+    print(f"Played {size:,} games at once in {elapsed:.2f}s ({size / elapsed:,.0f} games/s, "
+          f"{engine.choices / elapsed:,.0f} choices/s, seed {seed}), "
+          f"after {compiled:.2f}s setting up")
+    print("\nENDINGS:")
+    for ending, count in engine.ending_counts().most_common():
+        print(f"  {ending or '(unfinished)':<40}{count:>12,}{count / size:>9.2%}")
+    
+    started = time.perf_counter()
+    keys = recorded.T
+    mismatched = sum(_replay_keys(keys[game]).astuple() != engine.state(game).astuple()
+                     for game in range(checked))
+    scalar = time.perf_counter() - started
+    taken = int(np.count_nonzero(recorded))
+    print(f"\nReplayed {checked:,} games on the scalar engine: {mismatched} differ. "
+          f"Scalar: {taken / scalar:,.0f} choices/s, batch: "
+          f"{engine.choices / elapsed / (taken / scalar):,.0f}x faster.")
+
+# ==================== EVENT ANALYTICS ====================
+
+# Menu option that takes the player out of Chapter 1, and only with the
+# Crystal Chronicle in hand.
+CHRONICLE_GATE = ("entrance", "Ready to proceed to Chapter 2")
+
+# Lines parsed together as one JSON array by read_events().
+EVENT_BATCH = 4096
+
+def read_events(path):
+    """Yield the events in a --events log one at a time, gunzipping if needed.
+    
+    Lines are parsed EVENT_BATCH at a time as one JSON array, which keeps
+    the work in json's C scanner; a batch that won't parse (such as one
+    with a line cut short by a crash) is parsed again line by line. Lines
+    that aren't JSON objects come back as None, so the caller can count them.
+    """
+    with open(path, "rb") as file:
+        gzipped = file.read(2) == b"\x1f\x8b"
+    opener = gzip.open if gzipped else open
+    loads = json.loads
+    with opener(path, "rt", encoding="utf-8", errors="replace") as file:
+        while True:
+            lines = list(itertools.islice(file, EVENT_BATCH))
+            if not lines:
+                return
+            try:
+                events = loads(f"[{','.join(lines)}]")
+            except ValueError:
+                events = []
+                for line in lines:
+                    try:
+                        events.append(loads(line))
+                    except ValueError:
+                        events.append(None)
+            for event in events:
+                yield event if type(event) is dict else None
+
+def _seconds_bucket(seconds):
+    """Round a time up to a power of two milliseconds, for a histogram."""
+    return (1 << int(seconds * 1000).bit_length()) / 1000
+
+class EventSummary:
+    """Counts built from playthrough events in a single pass.
+    
+    Every count is keyed by things the story has a fixed number of (menus,
+    options, flags, stat values, endings), so memory stays the same however
+    many events or games go in. Summaries of separate logs merge().
+    """
+    
+    COUNTERS = ("arrivals", "departures", "moves", "choices", "retries", "seconds",
+                "flags", "chapters", "chapter_stats", "endings")
+    
+    def __init__(self):
+        self.events = 0
+        self.bad_lines = 0
+        self.games = 0
+        self.arrivals = Counter()       # menu
+        self.departures = Counter()     # menu
+        self.moves = Counter()          # (menu left, choice, menu reached)
+        self.choices = Counter()        # (menu, choice)
+        self.retries = Counter()        # menu
+        self.seconds = Counter()        # (menu, _seconds_bucket())
+        self.flags = Counter()          # (flag, menu, choice that raised it)
+        self.chapters = Counter()       # chapter begun
+        self.chapter_stats = Counter()  # (chapter, stat, value as it began)
+        self.endings = Counter()
+    
+    def add(self, events):
+        """Count an iterable of events (None for a line that couldn't be read).
+        
+        An event missing a field its kind needs, or with one of the wrong
+        type, counts as a bad line too. Fields are read before anything is
+        counted, so a missing one leaves no partial counts behind.
+        """
+        choices, moves, arrivals, departures, seconds = (
+            self.choices, self.moves, self.arrivals, self.departures, self.seconds)
+        for event in events:
+            self.events += 1
+            if event is None:
+                self.bad_lines += 1
+                continue
+            kind = event.get("event")
+            try:
+                if kind == "choice":
+                    choices[event["scene"], event["choice"]] += 1
+                elif kind == "scene":
+                    scene, to = event["scene"], event["to"]
+                    if scene is None:
+                        arrivals[to] += 1
+                    else:
+                        choice, bucket = event["choice"], _seconds_bucket(event["seconds"])
+                        moves[scene, choice, to] += 1
+                        seconds[scene, bucket] += 1
+                        departures[scene] += 1
+                        arrivals[to] += 1
+                elif kind == "retry":
+                    self.retries[event["scene"]] += 1
+                elif kind == "flag":
+                    self.flags[event["flag"], event["scene"], event["choice"]] += 1
+                elif kind == "chapter":
+                    chapter = event["chapter"]
+                    began = [(chapter, stat, event[stat]) for stat in STATS]
+                    self.chapters[chapter] += 1
+                    self.chapter_stats.update(began)
+                elif kind == "ending":
+                    self.endings[event["ending"]] += 1
+                elif kind == "start":
+                    self.games += 1
+                elif kind == "restore":
+                    arrivals[event["scene"]] += 1
+            except (KeyError, TypeError, ValueError):
+                self.bad_lines += 1
+        return self
+    
+    def merge(self, other):
+        """Add another summary's counts to this one."""
+        self.events += other.events
+        self.bad_lines += other.bad_lines
+        self.games += other.games
+        for name in self.COUNTERS:
+            getattr(self, name).update(getattr(other, name))
+        return self
+
+def summarize_log(path):
+    """Summarize one log file."""
+    return EventSummary().add(read_events(path))
+
+def summarize_logs(paths, workers=None):
+    """Summarize many log files, one file per job across a process pool.
+    
+    A gzip stream can only be read from the start, so a single file is
+    never split; rotated logs shard naturally.
+    """
+    summary = EventSummary()
+    if workers == 1 or len(paths) < 2:
+        results = map(summarize_log, paths)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(min(workers or os.cpu_count() or 1, len(paths)))
+        results = pool.map(summarize_log, paths)
+    try:
+        for result in results:
+            summary.merge(result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return summary
+
+def _option_key(scene, label):
+    """The key of the option with this label at a scene's menu."""
+    for option in STORY.scenes[scene].options:
+        if option.label == label:
+            return option.key
+    raise KeyError(f"No option {label!r} at {scene!r}")
+
+def healing_methods(scenes=SCENES):
+    """How each option of the heal_* menus heals its fracture, if it can.
+    
+    Returns {(scene, key): (flag, requirement, "item" or "stat check")}
+    for options with a branch that raises a *_fixed flag, from that
+    branch's requirement.
+    """
+    methods = {}
+    for name, spec in scenes.items():
+        if not name.startswith("heal_"):
+            continue
+        for key, option in enumerate(spec.get("options", ()), 1):
+            for branch in option.get("branches", ()):
+                flag = branch.get("effects", {}).get("set", "")
+                if flag.endswith("_fixed") and "if" in branch:
+                    requirement = branch["if"]
+                    kind = "item" if any(item in requirement for item in ITEMS) else "stat check"
+                    methods[name, str(key)] = (flag, requirement, kind)
+    return methods
+
+def _percentage(part, whole):
+    """part as a percentage of whole, or blank if whole is nothing."""
+    return f"{part / whole:>8.1%}" if whole else " " * 8
+
+def report_events(summary):
+    """Funnel and distribution reports on a summary, as lines of text."""
+    lines = []
+    games = summary.games
+    
+    lines.append("\nCHAPTER FUNNEL:")
+    finished = sum(count for ending, count in summary.endings.items()
+                   if not ending.startswith("GAME OVER"))
+    steps = [("Started a game", games)]
+    steps += [(f"Began Chapter {chapter}", summary.chapters[chapter])
+              for chapter in sorted(summary.chapters)]
+    steps += [("Reached a true ending", finished)]
+    for label, count in steps:
+        lines.append(f"  {label:<32}{count:>12,}{_percentage(count, games)}")
+    
+    lines.append(f"\n{'DROP-OFF BY MENU':<22}{'ARRIVED':>10}{'LEFT':>10}{'STAYED':>10}"
+                 f"{'STAYED %':>9}{'RETRIES':>9}{'p50 TIME':>10}{'p90 TIME':>10}")
+    for scene in STORY.scenes:
+        arrived = summary.arrivals[scene]
+        if not arrived:
+            continue
+        left = summary.departures[scene]
+        times = Counter({bucket: count for (menu, bucket), count in summary.seconds.items()
+                         if menu == scene})
+        p50, p90 = (_percentile(times, share) for share in (0.5, 0.9))
+        lines.append(
+            f"  {scene:<20}{arrived:>10,}{left:>10,}{arrived - left:>10,}"
+            f"{_percentage(arrived - left, arrived):>9}{summary.retries[scene]:>9,}"
+            + "".join(f"{'':>10}" if seconds is None else f"{'≤' + _format_seconds(seconds):>10}"
+                      for seconds in (p50, p90)))
+    
+    lines.append("\nHOW FRACTURES WERE HEALED:")
+    methods = healing_methods()
+    healed = Counter()
+    for (flag, scene, choice), count in summary.flags.items():
+        method = methods.get((scene, choice))
+        if method is not None and method[0] == flag:
+            healed[flag, method[2], method[1]] += count
+    for flag in sorted({method[0] for method in methods.values()}):
+        total = sum(count for (name, _, _), count in healed.items() if name == flag)
+        lines.append(f"  {flag:<32}{total:>12,}")
+        for kind in ("item", "stat check"):
+            by_kind = {requirement: count for (name, method, requirement), count
+                       in healed.items() if name == flag and method == kind}
+            lines.append(f"    by {kind:<27}{sum(by_kind.values()):>12,}"
+                         f"{_percentage(sum(by_kind.values()), total)}")
+            for requirement, count in sorted(by_kind.items(), key=lambda pair: -pair[1]):
+                lines.append(f"      {requirement:<28}{count:>12,}")
+    
+    scene, label = CHRONICLE_GATE
+    key = _option_key(scene, label)
+    tried = summary.choices[scene, key]
+    passed = sum(count for (left, choice, to), count in summary.moves.items()
+                 if left == scene and choice == key and to != scene)
+    lines.append("\nCRYSTAL CHRONICLE GATE:")
+    lines.append(f"  {'Tried to leave Chapter 1':<32}{tried:>12,}")
+    lines.append(f"  {'Turned back without it':<32}{tried - passed:>12,}{_percentage(tried - passed, tried)}")
+    lines.append(f"  {'Stopped playing at ' + scene:<32}"
+                 f"{summary.arrivals[scene] - summary.departures[scene]:>12,}")
+    
+    shares = (0.1, 0.25, 0.5, 0.75, 0.9)
+    lines.append(f"\n{'STATS AS EACH CHAPTER BEGAN':<30}"
+                 + "".join(f"{f'p{int(share * 100)}':>7}" for share in shares))
+    for chapter in sorted(summary.chapters):
+        for stat in STATS:
+            values = Counter({value: count for (begun, name, value), count
+                              in summary.chapter_stats.items()
+                              if begun == chapter and name == stat})
+            lines.append(f"  Chapter {chapter} {stat:<18}"
+                         + "".join(f"{_percentile(values, share):>7}" for share in shares))
+    
+    lines.append("\nCHOICES:")
+    for scene in STORY.scenes:
+        taken = {choice: count for (menu, choice), count in summary.choices.items()
+                 if menu == scene}
+        if taken:
+            total = sum(taken.values())
+            lines.append(f"  {scene:<20}" + "  ".join(
+                f"{choice}: {count / total:.0%}" for choice, count in sorted(taken.items())))
+    
+    lines.append("\nENDINGS:")
+    for ending, count in summary.endings.most_common():
+        lines.append(f"  {ending:<40}{count:>12,}{_percentage(count, games)}")
+    return lines
+
+def run_analytics(paths, workers=None):
+    """Summarize event logs and print the reports."""
+    started = time.perf_counter()
+    summary = summarize_logs(paths, workers)
+    elapsed = time.perf_counter() - started
+    print(f"Read {summary.events:,} events from {len(paths)} file(s) in {elapsed:.1f}s "
+          f"({summary.events / max(elapsed, 1e-9):,.0f} events/s)"
+          + (f"; skipped {summary.bad_lines:,} unreadable lines" if summary.bad_lines else ""))
+    print(f"{summary.games:,} games started")
+    for line in report_events(summary):
+        print(line)
+
+def play_headless(choices, name="Hero", sink=None, save_path=None, load_path=None,
+                  journal=None):
+    """Play one game from a scripted choice stream and return the game.
+    
+    The run stops when the choices run out (normally at the "Play Again"
+    prompt after an ending) or when the script chooses to exit. With
+    load_path the game carries on from that save instead of starting anew;
+    with save_path it autosaves there as it goes, and with a Journal it
+    records its choices. Without a sink the game isn't drawn at all.
+    """
+    game = TimekeeperChronicles(HeadlessConsole(choices, name, sink), save_path, journal,
+                                drawn=sink is not None)
+    try:
+        if load_path:
+            game.load(load_path)
+        else:
+            game.start_game()
+    except SessionEnded:
+        pass
+    return game
+
+def run_headless(path, name, quiet, save_path=None, load_path=None, journal_path=None):
+    """Play a choice file ('-' for stdin) headless and report the ending."""
+    journal = Journal(journal_path) if journal_path else None
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        with source:
+            choices = (line for line in source if line.strip())
+            game = play_headless(choices, name, None if quiet else sys.stdout,
+                                 save_path, load_path, journal)
+    finally:
+        if journal:
+            journal.close()
+    print(f"ENDING: {game.state.ending or '(none)'}")
+
+def run_replay(path, stop=None):
+    """Replay a journal on the bare engine and report the state it rebuilds."""
+    entries = read_journal(path)
+    started = time.perf_counter()
+    state, choices = replay(entries, stop)
+    elapsed = time.perf_counter() - started
+    
+    print(f"Replayed {choices} choices in {elapsed * 1000:.2f} ms")
+    if state is None:
+        print("The journal never started a game.")
+        return
+    print(f"HERO: {state.player_name}")
+    print(f"CHAPTER: {state.chapter}  MENU: {state.scene}")
+    print(f"HEALTH: {state.health}  KNOWLEDGE: {state.knowledge}  "
+          f"COURAGE: {state.courage}  COMPASSION: {state.compassion}")
+    print(f"INVENTORY: {', '.join(state.inventory) or '(empty)'}")
+    print(f"FLAGS: {', '.join(flag for flag in FLAGS if state.flags & FLAG_BITS[flag]) or '(none)'}")
+    print(f"ENDING: {state.ending or '(none)'}")
+
+class _SimulatedTime:
+    """Clock and frame wait that let a Renderer draw without real waiting."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def clock(self):
+        return self.now
+    
+    def wait(self, timeout):
+        self.now += timeout
+        return False
+
+class _MeasuredConsole(HeadlessConsole):
+    """Scripted console that draws through a Renderer and labels each screen."""
+    
+    def __init__(self, choices, name, renderer):
+        super().__init__(choices, name, renderer)
+        self.game = None
+        self.screens = []
+    
+    def type_text(self, text, delay=0.03):
+        self.sink.type_text(text, delay)
+    
+    def clear(self):
+        self.sink.end_scene()
+        self.screens.append(self.game.state.scene)
+    
+    def read_line(self, prompt):
+        self.sink.ready_for_input()
+        return super().read_line(prompt)
+    
+    def read_name(self, prompt):
+        self.sink.ready_for_input()
+        return super().read_name(prompt)
+    
+    def pause(self, prompt):
+        self.sink.ready_for_input()
+        super().pause(prompt)
+
+def measure_render(choices, name="Hero", fps=15, instant=False):
+    """Count the write syscalls each screen of a scripted game needs.
+    
+    The game is drawn into os.devnull with simulated time, so typing costs
+    no real waiting. Returns {scene: [writes for each screen]}, where a
+    screen runs from one clear to the next and is labelled with the menu the
+    player left it from.
+    """
+    fd = os.open(os.devnull, os.O_WRONLY)
+    simulated = _SimulatedTime()
+    renderer = Renderer(fd, fps, instant, simulated.clock, simulated.wait)
+    console = _MeasuredConsole(choices, name, renderer)
+    game = TimekeeperChronicles(console)
+    console.game = game
+    try:
+        game.start_game()
+    except SessionEnded:
+        pass
+    finally:
+        console.clear()
+        os.close(fd)
+    
+    per_scene = {}
+    for scene, writes in zip(console.screens, renderer.scene_writes):
+        per_scene.setdefault(scene, []).append(writes)
+    return per_scene
+
+def run_render_stats(path, name, fps, instant):
+    """Report write syscalls per screen for a choice file."""
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with source:
+        choices = [line for line in source if line.strip()]
+    per_scene = measure_render(choices, name, fps, instant)
+    
+    print(f"{'SCENE':<18}{'SCREENS':>8}{'WRITES':>8}{'PER SCREEN':>12}{'MAX':>6}")
+    for scene, counts in per_scene.items():
+        print(f"{scene:<18}{len(counts):>8}{sum(counts):>8}"
+              f"{sum(counts) / len(counts):>12.1f}{max(counts):>6}")
+
+def interactive_game(fps=15, instant=False, save_path=None, journal_path=None, timeout=None):
+    """A game played at the terminal, autosaving and journaling as asked."""
+    journal = None
+    if journal_path:
+        try:
+            journal = Journal(journal_path)
+        except OSError as error:
+            print(f"\n⚠️  Not keeping a journal ({error.strerror})")
+    console = Console(Renderer(fps=fps, instant=instant, broadcast=BROADCAST), timeout=timeout)
+    return TimekeeperChronicles(console, save_path, journal, rewind=True)
+
+def continue_game(fps=15, instant=False, save_path=DEFAULT_SAVE_PATH,
+                  journal_path=DEFAULT_JOURNAL_PATH, load_path=None, state=None, timeout=None):
+    """Carry on an interactive game from state or a save; False if it can't be loaded."""
+    if state is None and not (load_path or save_path):
+        print("\nAutosave is off. Use --load FILE to carry on a saved game.")
+        return False
+    if state is None:
+        try:
+            state = load_game(load_path or save_path)
+        except FileNotFoundError:
+            print("\nNo saved game yet. Start a new game and it will autosave as you play.")
+            return False
+        except (OSError, ValueError) as error:
+            print(f"\n⚠️  Could not load the saved game: {error}")
+            return False
+    game = interactive_game(fps, instant, save_path, journal_path, timeout)
+    try:
+        game.restore(state)
+        game.resume()
+    finally:
+        game.close()
+    return True
+
+# ==================== BENCHMARKS ====================
+
+# Shortest choice scripts (from the solver) to each ending, played by the
+# playthrough benchmarks. Fixed here so timings stay comparable over time.
+BENCH_SCRIPTS = {
+    "CHAOTIC ENDING: Unchecked Evolution": "1 3 2 4 5 2 2 1 3 3 1 5 3",
+    "EVOLUTION ENDING: Guided Progress": "1 2 3 3 4 3 2 4 5 1 3 2 2 3 1 5 3",
+    "GAME OVER: Heat Exhaustion": "4 4 4 4 4 4 4 4 4 1 4 4",
+    "GOOD ENDING: Harmony Restored": "1 3 2 4 5 2 2 1 3 3 1 5 2",
+    "ORDER ENDING: The Perfect Clock": "1 3 2 4 5 2 2 1 3 3 1 5 1",
+    "PERFECT ENDING: Master of Balance": "1 2 2 1 1 4 5 1 2 3 1 4 1 2 3 5 2",
+    "SECRET ENDING: The Enlightened": "1 2 2 3 3 4 3 1 4 5 1 3 2 1 3 1 4 1 5 4",
+}
+# A benchmark counts as slower only past this much, since timings jitter.
+DEFAULT_BENCH_THRESHOLD = 20
+# What the suite turns off while it runs, whatever this run was started
+# with, so timings don't depend on whether the machine has a hint index
+# or metrics on. Saved with the results.
+BENCH_SETTINGS = {"hints": False, "metrics": False}
+BENCH_LINE = "\nYou approach the blazing forge. The heat is intense, but you press on..."
+
+class _MemoryRenderer(Renderer):
+    """Renderer that draws into a bytearray instead of a terminal."""
+    
+    def __init__(self, instant):
+        simulated = _SimulatedTime()
+        super().__init__(-1, 15, instant, simulated.clock, simulated.wait)
+        self.sink = bytearray()
+    
+    def write_now(self, data):
+        self.sink += data
+        self.writes += 1
+    
+    def watching_keys(self):
+        return _NoKeys()
+
+def _memory_console(instant=True):
+    """An ANSI console drawing into memory, and its renderer."""
+    renderer = _MemoryRenderer(instant)
+    return Console(renderer, Screen(renderer, ansi=True)), renderer
+
+def _bench_type_text(instant):
+    """Draw a screen of story lines, typed or instant, into memory."""
+    console, renderer = _memory_console(instant)
+    lines = 20 if instant else 1
+    def run():
+        console.clear()
+        for _ in range(lines):
+            console.type_text(BENCH_LINE)
+        renderer.flush()
+        renderer.sink.clear()
+    return run, lines
+
+def _bench_show_stats():
+    """Redraw the stats panel of a game half way through Chapter 2."""
+    console, renderer = _memory_console()
+    game = TimekeeperChronicles(console)
+    game.state = STORY.new_game()
+    for choice in BENCH_SCRIPTS["SECRET ENDING: The Enlightened"].split()[:12]:
+        STORY.advance(game.state, choice)
+    def run():
+        console.clear()
+        game.show_stats()
+        renderer.flush()
+        renderer.sink.clear()
+    return run, 1
+
+def _bench_get_choice():
+    """Read menu choices from fed input, every other one invalid."""
+    game = TimekeeperChronicles(HeadlessConsole(itertools.cycle(["9", " 2\n"])))
+    options = ["1", "2", "3"]
+    def run():
+        for _ in range(100):
+            game.get_choice(options, "core")
+    return run, 100
+
+def _bench_playthrough(ending):
+    """Play a whole game along an ending's script, output going to memory."""
+    choices = BENCH_SCRIPTS[ending].split()
+    def run():
+        play_headless(choices, sink=io.StringIO())
+    return run, 1
+
+def _bench_command(*arguments):
+    """Run a fresh interpreter with arguments."""
+    command = [sys.executable, *arguments]
+    def run():
+        subprocess.run(command, check=True, stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL)
+    return run, 1
+
+# Loads this file as a module without running the game.
+_COLD_START = ("import importlib.util, sys; "
+               "spec = importlib.util.spec_from_file_location('timekeeper', sys.argv[1]); "
+               "spec.loader.exec_module(importlib.util.module_from_spec(spec))")
+
+def _bench_reference():
+    """Plain Python work that doesn't depend on the game, to gauge the machine."""
+    def run():
+        table = {}
+        for number in range(1000):
+            table[number] = str(number)
+        return sum(len(text) for text in table.values())
+    return run, 1
+
+# Timings are compared after scaling by this benchmark, so a machine that
+# is busier or slower overall doesn't read as a regression.
+REFERENCE_BENCHMARK = "reference"
+
+def benchmarks():
+    """Every benchmark as (name, setup); setup returns (run, operations per run)."""
+    suite = [
+        (REFERENCE_BENCHMARK, _bench_reference),
+        ("type_text instant", lambda: _bench_type_text(True)),
+        ("type_text typed", lambda: _bench_type_text(False)),
+        ("show_stats", _bench_show_stats),
+        ("get_choice", _bench_get_choice),
+    ]
+    suite += [(f"playthrough {short_ending(ending)}",
+               functools.partial(_bench_playthrough, ending)) for ending in BENCH_SCRIPTS]
+    suite += [
+        ("python startup", lambda: _bench_command("-c", "pass")),
+        ("cold start", lambda: _bench_command("-c", _COLD_START, os.path.abspath(__file__))),
+    ]
+    return suite
+
+def _time_loops(run, loops):
+    """Seconds taken to call run loops times."""
+    started = time.perf_counter()
+    for _ in range(loops):
+        run()
+    return time.perf_counter() - started
+
+def time_suite(suite, rounds=7, round_time=0.1, progress=None):
+    """Best seconds per operation for each of suite's (name, setup) benchmarks.
+    
+    Each benchmark is timed in rounds of at least round_time and keeps its
+    best round. The rounds go round the whole suite in turn, so a slow
+    patch on a busy machine is spread over every benchmark instead of
+    landing on one. The garbage collector is off while timing, as with
+    timeit. progress(name, seconds) is called as each benchmark's first
+    round finishes.
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        timed = []
+        for name, setup in suite:
+            run, operations = setup()
+            loops = 1
+            while True:
+                elapsed = _time_loops(run, loops)
+                if elapsed >= round_time:
+                    break
+                loops *= 2
+            timed.append([name, run, loops, loops * operations, elapsed])
+            if progress:
+                progress(name, elapsed / (loops * operations))
+        for _ in range(rounds - 1):
+            for entry in timed:
+                entry[4] = min(entry[4], _time_loops(entry[1], entry[2]))
+    finally:
+        if collecting:
+            gc.enable()
+    return {name: best / operations for name, _, _, operations, best in timed}
+
+def machine_details():
+    """What the benchmarks ran on, to tell results from different machines apart."""
+    return {
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def _format_seconds(seconds):
+    """A duration in the unit that reads best."""
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.2f}µs"
+
+def compare_benchmarks(results, baseline, threshold):
+    """Compare results with a baseline's, both {name: {"seconds": ...}}.
+    
+    Returns (speed, rows): how much slower the machine ran the reference
+    benchmark than it did for the baseline (1.0 without one), and a row of
+    (name, old, new, change in percent after scaling by speed, slower) for
+    every other benchmark in both.
+    """
+    speed = 1.0
+    if REFERENCE_BENCHMARK in results and REFERENCE_BENCHMARK in baseline:
+        speed = results[REFERENCE_BENCHMARK]["seconds"] / baseline[REFERENCE_BENCHMARK]["seconds"]
+    rows = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None or name == REFERENCE_BENCHMARK:
+            continue
+        change = (result["seconds"] / old["seconds"] / speed - 1) * 100
+        rows.append((name, old["seconds"], result["seconds"], change, change > threshold))
+    return speed, rows
+
+def run_benchmarks(out_path=None, baseline_path=None, threshold=DEFAULT_BENCH_THRESHOLD):
+    """Run the suite, save it as JSON and fail on slowdowns against a baseline."""
+    global HINTS, METRICS
+    baseline = None
+    if baseline_path:
+        try:
+            with open(baseline_path, encoding="utf-8") as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as error:
+            sys.exit(f"Can't read baseline {baseline_path}: {error}")
+    
+    print(f"{'BENCHMARK':<40}{'FIRST ROUND':>12}")
+    hints, metrics = HINTS, METRICS
+    HINTS, METRICS = ReachabilityIndex(None), None
+    try:
+        timings = time_suite(benchmarks(), progress=lambda name, seconds: print(
+            f"{name:<40}{_format_seconds(seconds):>12}", flush=True))
+    finally:
+        HINTS, METRICS = hints, metrics
+    print(f"\n{'BENCHMARK':<40}{'BEST':>12}{'OPS/S':>14}")
+    results = {}
+    for name, seconds in timings.items():
+        results[name] = {"seconds": seconds, "per_second": 1 / seconds}
+        print(f"{name:<40}{_format_seconds(seconds):>12}{1 / seconds:>14,.0f}")
+    
+    if out_path:
+        report = {"machine": machine_details(), "settings": BENCH_SETTINGS, "results": results}
+        with open(out_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+        print(f"\nSaved to {out_path}")
+    if baseline is None:
+        return
+    
+    if baseline.get("machine", {}).get("platform") != machine_details()["platform"]:
+        print(f"\n⚠️  The baseline was measured on {baseline.get('machine', {}).get('platform')}")
+    if baseline.get("settings") != BENCH_SETTINGS:
+        print("\n⚠️  The baseline may have been measured with hints or metrics on")
+    speed, compared = compare_benchmarks(results, baseline.get("results", {}), threshold)
+    print(f"\nThe machine ran the reference benchmark {speed:.2f}x as long as for the baseline;"
+          " changes below allow for that.")
+    print(f"\n{'AGAINST BASELINE':<40}{'BEFORE':>12}{'NOW':>12}{'CHANGE':>9}")
+    for name, old, new, change, slower in compared:
+        print(f"{name:<40}{_format_seconds(old):>12}{_format_seconds(new):>12}{change:>+8.1f}%"
+              + ("  SLOWER" if slower else ""))
+    slower = [name for name, *_, is_slower in compared if is_slower]
+    if slower:
+        sys.exit(f"\n{len(slower)} benchmark(s) slower than the baseline by more than {threshold}%: "
+                 + ", ".join(slower))
+    print(f"\nNo benchmark is more than {threshold}% slower than the baseline.")
+
+# ==================== GAME SERVER ====================
+
+class SessionConsole(Console):
+    """Console for one player connected to the game server.
+    
+    Nothing here blocks. Output collects in pages: a "Press Enter" prompt
+    ends a page, and the server sends the next page only once the player
+    has pressed Enter. Input never comes through the console; the server
+    hands each line it reads straight to the game.
+    """
+    
+    # The server may hold many idle sessions, so keep each one small: an idle
+    # console is one empty list, since finished pages share the empty tuple.
+    __slots__ = ("page", "pages")
+    
+    def __init__(self, chain=False):
+        self.page = []
+        self.pages = ()
+        # Answers queued by a line of several words, if the server splits lines
+        self.chain = InputChain() if chain else None
+    
+    def write(self, text=""):
+        self.page.append(text + "\n")
+    
+    def type_text(self, text, delay=0.03):
+        self.page.append(text + "\n")
+    
+    def clear(self):
+        # A remote client may not speak ANSI, so leave a gap instead.
+        self.page.append("\n")
+    
+    def sleep(self, seconds):
+        pass
+    
+    def prompt(self, text):
+        """Show a prompt the player answers on the same line."""
+        self.page.append(text)
+    
+    def read_line(self, prompt):
+        raise RuntimeError("a server session reads input through the server")
+    
+    read_name = read_line
+    
+    def pause(self, prompt):
+        self.page.append(prompt)
+        self.pages += ("".join(self.page),)
+        self.page = []
+    
+    def quit(self):
+        raise SessionEnded
+    
+    def take_pages(self):
+        """Hand over the finished pages, then whatever is on the current one."""
+        pages = [*self.pages, "".join(self.page)]
+        self.pages = ()
+        self.page = []
+        return pages
+
+class GameServer:
+    """Plays many games at once over TCP, one coroutine per connection.
+    
+    Any line-based client (nc, telnet) can play. Each page of output goes
+    out in one write, and the session waits for the socket to drain before
+    it reads again, so a slow client can't make output pile up. Players
+    idle for idle_timeout seconds are dropped, and lines longer than
+    line_limit bytes end the session.
+    """
+    
+    def __init__(self, host="127.0.0.1", port=4000, idle_timeout=600, line_limit=1024):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout or None
+        self.line_limit = line_limit
+        self.server = None
+        # Tasks of the sessions in play, cancelled on shutdown
+        self.sessions = set()
+        self.played = 0
+        self.peak = 0
+    
+    async def start(self):
+        """Start listening and return the port (useful when port is 0)."""
+        self.server = await asyncio.start_server(
+            self.handle, self.host, self.port, limit=self.line_limit, backlog=4096)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+    
+    async def serve(self):
+        """Serve until SIGINT or SIGTERM, then shut down gracefully."""
+        await self.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except NotImplementedError:  # Windows: Ctrl+C raises KeyboardInterrupt
+                pass
+        print(f"Serving Timekeeper Chronicles on {self.host}:{self.port} (Ctrl+C to stop)")
+        await stop.wait()
+        await self.shutdown()
+    
+    async def shutdown(self, grace=5):
+        """Stop taking players, say goodbye to everyone playing and wait for them."""
+        self.server.close()
+        for task in self.sessions:
+            task.cancel()
+        if self.sessions:
+            await asyncio.wait(self.sessions, timeout=grace)
+        await self.server.wait_closed()
+    
+    async def handle(self, reader, writer):
+        """Play one connection's game until it ends, goes idle or hangs up."""
+        task = asyncio.current_task()
+        self.sessions.add(task)
+        self.peak = max(self.peak, len(self.sessions))
+        try:
+            await self.play(reader, writer)
+        except asyncio.CancelledError:
+            if not writer.is_closing():
+                writer.write(b"\n\nThe server is shutting down. Goodbye!\n")
+        except (SessionEnded, ConnectionError):
+            pass
+        finally:
+            self.sessions.discard(task)
+            self.played += 1
+            writer.close()
+    
+    async def play(self, reader, writer):
+        """Drive a game from the lines a player sends."""
+        console = SessionConsole(chain=True)
+        game = TimekeeperChronicles(console, rewind=True)
+        try:
+            game.enter("start")
+            while True:
+                scene = STORY.scenes[game.state.scene]
+                if scene.ask_name:
+                    console.prompt(scene.ask_name)
+                    game.give_name(await self.exchange(reader, writer, console, split=False))
+                    continue
+                options = game.show_menu(scene)
+                while True:
+                    console.prompt("\nYour choice: ")
+                    choice = (await self.exchange(reader, writer, console)).strip()
+                    if choice in options:
+                        game.choose(choice)
+                        break
+                    if game.rewind_command(choice):
+                        break
+                    game.reject_choice(options)
+        except SessionEnded:
+            if game.state.scene != EXIT:
+                raise
+        # The story ended the game: send its farewell without waiting for Enter.
+        await self.send(writer, "".join(console.take_pages()))
+    
+    async def exchange(self, reader, writer, console, split=True):
+        """Send the game's pages one Enter at a time and return the answer to the last."""
+        pages = console.take_pages()
+        for page in pages[:-1]:
+            await self.send(writer, page)
+            await self.answer(reader, writer, console.chain, pause=True)
+        await self.send(writer, pages[-1])
+        return await self.answer(reader, writer, console.chain, split=split)
+    
+    async def answer(self, reader, writer, chain, pause=False, split=True):
+        """The answer to the prompt just sent: the chain's next, or a line read."""
+        if chain:
+            # Echo it, as the player's terminal would have their typing.
+            answer = chain.take(pause)
+            writer.write(answer.encode("utf-8") + b"\n")
+            return answer
+        line = await self.read_line(reader, writer)
+        return chain.split(line, pause) if split else line
+    
+    async def send(self, writer, text):
+        """Write a page and wait until the client has room for more."""
+        writer.write(text.encode("utf-8"))
+        await writer.drain()
+    
+    async def read_line(self, reader, writer):
+        """Read one line from the player, ending the session if they go quiet."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            writer.write(b"\n\nIdle for too long. Goodbye!\n")
+            raise SessionEnded from None
+        except ValueError:  # Longer than line_limit
+            raise SessionEnded from None
+        if not line:
+            raise SessionEnded
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+def run_server(host, port, idle_timeout):
+    """Serve games until interrupted and report how many were played."""
+    server = GameServer(host, port, idle_timeout)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    print(f"\nServed {server.played} sessions (at most {server.peak} at once)")
+
+async def _read_prompt(reader):
+    """Read server output up to a prompt; None once the server hangs up.
+    
+    Every prompt leaves the cursor on its own line, so output that doesn't
+    end in a newline is waiting for an answer.
+    """
+    chunks = []
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        if not chunk.endswith(b"\n"):
+            return b"".join(chunks).decode("utf-8", "replace")
+
+async def _bot(host, port, replies, rng, latencies):
+    """A stand-in player answering prompts at random; returns the games it played."""
+    games = 0
+    while replies > 0:
+        reader, writer = await asyncio.open_connection(host, port)
+        games += 1
+        try:
+            sent = time.perf_counter()
+            while replies > 0:
+                text = await _read_prompt(reader)
+                if text is None:
+                    break
+                latencies.append(time.perf_counter() - sent)
+                if text.endswith("Your choice: "):
+                    answer = rng.choice("1234")
+                elif text.endswith("> "):
+                    answer = "Bot"
+                else:
+                    answer = ""
+                writer.write(answer.encode() + b"\n")
+                sent = time.perf_counter()
+                replies -= 1
+        finally:
+            writer.close()
+    return games
+
+async def _run_bots(host, port, clients, replies, seed):
+    """Play `clients` bots at once and gather what they measured."""
+    latencies = []
+    results = await asyncio.gather(
+        *(_bot(host, port, replies, random.Random(seed + n), latencies)
+          for n in range(clients)),
+        return_exceptions=True)
+    return results, latencies
+
+def run_bots(host, port, clients, replies, seed=0):
+    """Load-test a game server with bots and report throughput and latency."""
+    started = time.perf_counter()
+    results, latencies = asyncio.run(_run_bots(host, port, clients, replies, seed))
+    elapsed = time.perf_counter() - started
+    failed = [result for result in results if isinstance(result, BaseException)]
+    games = sum(result for result in results if not isinstance(result, BaseException))
+    
+    print(f"{clients} bots, {games} games, {len(latencies)} replies in {elapsed:.2f} s")
+    print(f"  {len(latencies) / elapsed:,.0f} replies/s, {games / elapsed:,.1f} games/s")
+    if latencies:
+        latencies.sort()
+        for name, share in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            print(f"  {name} {latencies[int(share * (len(latencies) - 1))] * 1000:.2f} ms")
+        print(f"  max {latencies[-1] * 1000:.2f} ms")
+    if failed:
+        print(f"  {len(failed)} bots failed, first with: {failed[0]!r}")
+
+# ==================== SPECTATING ====================
+
+# The game being broadcast to spectators, if any (see main)
+BROADCAST = None
+
+# Bytes of output a broadcast keeps for spectators that are behind.
+BROADCAST_SIZE = 1 << 20
+
+# Seconds a spectator's connection may refuse more output before it's dropped.
+SPECTATOR_STALL = 10
+
+class Broadcast:
+    """One game's output, written once for any number of spectators to read.
+    
+    Output goes into a fixed ring buffer. written counts every byte ever
+    written, and a spectator is just an offset into that count. The
+    player's thread writes while the spectators' thread reads, so both go
+    through a lock: written only moves on once the ring holds the bytes,
+    and read() copies what it returns while the lock is held, since a
+    transport may hold on to what it's given long after the ring has
+    wrapped around. A spectator more than the ring's size behind has lost
+    what it missed and skips ahead to the newest keyframe (the start of a
+    frame that draws the whole screen) still in the ring.
+    """
+    
+    def __init__(self, size=BROADCAST_SIZE):
+        self.size = size
+        self.ring = memoryview(bytearray(size))
+        self.lock = threading.Lock()
+        self.written = 0
+        self.keyframe = 0
+        # Called after every write, from the writer's thread
+        self.listener = None
+    
+    def write(self, data):
+        """Add output to the ring."""
+        data = memoryview(data)
+        with self.lock:
+            written = self.written + len(data)
+            if len(data) > self.size:
+                data = data[-self.size:]
+            start = (written - len(data)) % self.size
+            end = start + len(data)
+            if end <= self.size:
+                self.ring[start:end] = data
+            else:
+                split = self.size - start
+                self.ring[start:] = data[:split]
+                self.ring[:end - self.size] = data[split:]
+            self.written = written
+        if self.listener is not None:
+            self.listener()
+    
+    def mark(self):
+        """Make what is written next a keyframe."""
+        with self.lock:
+            self.keyframe = self.written
+    
+    def start(self):
+        """Where a new (or lagging) spectator should start reading."""
+        with self.lock:
+            return self._start()
+    
+    def _start(self):
+        """start(), with the lock already held."""
+        return max(self.keyframe, self.written - self.size, 0)
+    
+    def read(self, offset):
+        """Output from offset up to now, the offset after it and whether it skipped.
+        
+        An offset the ring has already overwritten skips ahead to start().
+        """
+        with self.lock:
+            skipped = offset < self.written - self.size
+            if skipped:
+                offset = self._start()
+            end = self.written
+            start = offset % self.size
+            stop = start + (end - offset)
+            if stop <= self.size:
+                return bytes(self.ring[start:stop]), end, skipped
+            return b"".join((self.ring[start:], self.ring[:stop - self.size])), end, skipped
 
-def type_text(text, delay=0.03):
-    """Print text with typing effect."""
-    for char in text:
-        print(char, end='', flush=True)
-        time.sleep(delay)
-    print()
+class SpectatorServer:
+    """Streams a Broadcast to spectators connecting over TCP (nc, telnet).
+    
+    Spectators are served by an event loop on a thread of their own. All
+    the player's side does is write into the broadcast and, at most once
+    per batch of writes, wake that loop, so the player's game runs the
+    same whether one spectator or a thousand is watching. A spectator
+    whose connection takes nothing for SPECTATOR_STALL seconds is dropped.
+    """
+    
+    def __init__(self, broadcast, host="127.0.0.1", port=4001):
+        self.broadcast = broadcast
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.changed = None
+        self.waking = False
+        self.ready = threading.Event()
+        self.watching = 0
+        self.skips = 0
+        self.error = None
+    
+    def start(self):
+        """Start serving on a daemon thread and return the port."""
+        threading.Thread(target=asyncio.run, args=(self.serve(),), name="spectators",
+                         daemon=True).start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.port
+    
+    async def serve(self):
+        """Accept spectators forever."""
+        self.loop = asyncio.get_running_loop()
+        self.changed = self.loop.create_future()
+        try:
+            server = await asyncio.start_server(self.watch, self.host, self.port, backlog=4096)
+        except OSError as error:
+            self.error = error
+            self.ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self.broadcast.listener = self.notify
+        self.ready.set()
+        await server.serve_forever()
+    
+    def notify(self):
+        """Wake the spectators' loop (called from the player's thread)."""
+        if not self.waking:
+            self.waking = True
+            self.loop.call_soon_threadsafe(self.wake)
+    
+    def wake(self):
+        """Let every waiting spectator read what was written."""
+        self.waking = False
+        changed, self.changed = self.changed, self.loop.create_future()
+        changed.set_result(None)
+    
+    async def watch(self, reader, writer):
+        """Send one spectator the game's output until either side goes."""
+        broadcast = self.broadcast
+        self.watching += 1
+        try:
+            offset = broadcast.start()
+            while True:
+                if offset == broadcast.written:
+                    await self.changed
+                    continue
+                data, offset, skipped = broadcast.read(offset)
+                if skipped:
+                    self.skips += 1
+                writer.write(data)
+                await asyncio.wait_for(writer.drain(), SPECTATOR_STALL)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.watching -= 1
+            writer.transport.abort()
 
-def print_banner(title):
-    """Print a beautiful banner for each scene."""
-    width = 60
-    print("\n" + "=" * width)
-    print(f"{title:^{width}}")
-    print("=" * width)
+def _read_spectators(sockets, stop):
+    """Read and discard what spectator sockets receive, until stop is set."""
+    selector = selectors.DefaultSelector()
+    for connection in sockets:
+        selector.register(connection, selectors.EVENT_READ)
+    received = 0
+    while not stop.is_set():
+        for key, _ in selector.select(0.05):
+            received += len(key.fileobj.recv(65536))
+    selector.close()
+    return received
 
-def print_scene_banner(scene_name):
-    """Print scene-specific banner."""
-    banner = f"""
-    ╔══════════════════════════════════════════════════════╗
-    ║                    {scene_name:^36}                  ║
-    ╚══════════════════════════════════════════════════════╝
-    """
-    print(banner)
+class _TimedRenderer(Renderer):
+    """Renderer that records how long each of its writes took."""
+    
+    def __init__(self, fd, broadcast, times):
+        simulated = _SimulatedTime()
+        super().__init__(fd, 15, True, simulated.clock, simulated.wait, broadcast=broadcast)
+        self.times = times
+    
+    def write_now(self, data):
+        start = time.perf_counter()
+        super().write_now(data)
+        self.times.append(time.perf_counter() - start)
 
-class TimekeeperChronicles:
-    def __init__(self):
-        self.player_name = ""
-        self.inventory = []
-        self.health = 100
-        self.knowledge = 0
-        self.courage = 0  # FIXED: Starts at 0
-        self.compassion = 0
-        self.current_chapter = 1
-        self.game_state = "playing"
-        
-        # Progress flags
-        self.has_crystal_chronicle = False
-        self.saved_owl = False
-        self.has_time_sap = False
-        self.has_temporal_hammer = False
-        self.has_lumina_blossom = False
-        
-        # Chapter 2 flags
-        self.mechanical_fixed = False
-        self.organic_fixed = False
-        self.elemental_fixed = False
-        self.helped_robot = False
-        
-        # Track visited areas for courage bonuses
-        self.visited_volcanic = False
-        self.visited_mechanical = False
-        self.visited_garden = False
-        
-        # Ending achieved
-        self.ending = ""
+def measure_spectating(viewers, games=50):
+    """Seconds each write of a drawn game takes with this many spectators.
     
-    def show_stats(self):
-        """Display player stats."""
-        print(f"\n{'═'*60}")
-        print(f"❤️  HEALTH: {self.health}/100 | 🧠 KNOWLEDGE: {self.knowledge} | 🛡️  COURAGE: {self.courage} | ❤️  COMPASSION: {self.compassion}")
-        if self.inventory:
-            print(f"🎒 INVENTORY: {', '.join(self.inventory)}")
-        print(f"{'═'*60}")
-    
-    def get_choice(self, options):
-        """Get valid choice from player."""
-        while True:
+    Games play the benchmark scripts through a Renderer into os.devnull,
+    broadcasting to `viewers` local connections that another thread reads
+    as fast as output arrives. Returns (write times, spectators still
+    watching at the end).
+    """
+    broadcast = Broadcast()
+    server = SpectatorServer(broadcast, port=0)
+    port = server.start()
+    sockets = [socket.create_connection(("127.0.0.1", port)) for _ in range(viewers)]
+    while server.watching < viewers:
+        time.sleep(0.01)
+    stop = threading.Event()
+    reading = threading.Thread(target=_read_spectators, args=(sockets, stop), daemon=True)
+    reading.start()
+    times = []
+    scripts = itertools.islice(itertools.cycle(BENCH_SCRIPTS.values()), games)
+    fd = os.open(os.devnull, os.O_WRONLY)
+    try:
+        for script in scripts:
+            renderer = _TimedRenderer(fd, broadcast, times)
+            console = _MeasuredConsole(script.split(), "Hero", renderer)
+            console.game = TimekeeperChronicles(console)
             try:
-                choice = input("\nYour choice: ").strip()
-                if choice in options:
-                    return choice
-                else:
-                    type_text(f"Please enter one of: {', '.join(options)}")
-            except:
-                type_text("Invalid input. Please try again.")
+                console.game.start_game()
+            except SessionEnded:
+                pass
+            renderer.flush()
+    finally:
+        os.close(fd)
+    time.sleep(0.5)
+    watching = server.watching
+    stop.set()
+    reading.join()
+    for connection in sockets:
+        connection.close()
+    return times, watching
+
+def start_spectating(host, port):
+    """Broadcast interactive games from now on to spectators connecting to host:port."""
+    global BROADCAST
+    BROADCAST = Broadcast()
+    port = SpectatorServer(BROADCAST, host, port).start()
+    print(f"👀 Spectators can watch with: nc {host} {port}")
+
+def run_spectator_latency(viewers=(0, 1, 10, 100, 1000)):
+    """Report the player's write latency as the number of spectators grows."""
+    print(f"{'SPECTATORS':>10}{'WRITES':>8}{'MEDIAN':>10}{'P99':>10}{'MAX':>10}{'WATCHING':>10}")
+    for count in viewers:
+        times, watching = measure_spectating(count)
+        times.sort()
+        print(f"{count:>10}{len(times):>8}{_format_seconds(times[len(times) // 2]):>10}"
+              f"{_format_seconds(times[len(times) * 99 // 100]):>10}"
+              f"{_format_seconds(times[-1]):>10}{watching:>10}")
+
+# ==================== HTTP API ====================
+
+# Locks shared by all the sessions a SessionStore holds.
+SESSION_LOCKS = 64
+
+# Session ids are secrets.token_urlsafe(); a hibernated session's file is
+# named after its id.
+_SESSION_ID = re.compile(r"[A-Za-z0-9_-]+")
+
+# What a hibernated session's file starts with: when (wall-clock time) it
+# was last used. The hibernated game follows.
+_LAST_USED = struct.Struct("<d")
+
+# Seconds between deleting hibernated sessions that expired on disk
+HIBERNATION_SWEEP = 60
+
+class _WebSession:
+    """One browser's game: the game, its console and when it was last used."""
     
-    # ==================== MAIN GAME FLOW ====================
+    __slots__ = ("game", "lock", "used")
     
-    def start_game(self):
-        """Start the game."""
-        clear_screen()
-        print_banner("TIMEKEEPER CHRONICLES")
-        print("\n" + "~" * 60)
-        print("      AN EPIC TEXT ADVENTURE WITH MULTIPLE ENDINGS")
-        print("~" * 60)
-        
-        type_text("\nWhat is your name, destined Timekeeper? ")
-        self.player_name = input("> ").strip()
-        if not self.player_name:
-            self.player_name = "Hero"
-        
-        type_text(f"\nWelcome, {self.player_name}! Your journey begins...")
-        time.sleep(2)
-        self.chapter_1()
+    def __init__(self, game, lock, used):
+        self.game = game
+        # Requests for one session can arrive on different connections at once.
+        self.lock = lock
+        self.used = used
+
+class SessionStore:
+    """Games in play, keyed by id, forgetting the least recently used.
     
-    def chapter_1(self):
-        """Chapter 1: The Awakening."""
-        clear_screen()
-        print_banner("CHAPTER 1: THE AWAKENING")
-        time.sleep(1)
-        
-        type_text(f"\n{self.player_name}, you awaken in a strange circular chamber.")
-        type_text("Ancient machinery hums around you. Dust floats in beams of light.")
-        type_text("A voice echoes: 'You are the last Timekeeper. The Chrono-Core fails.'")
-        type_text("'Restore balance. Begin your journey...'")
-        
-        input("\nPress Enter to begin...")
-        self.scene_1_entrance()
+    A game unused for ttl seconds expires, and when there are more than
+    capacity games the least recently used one goes first. Sessions are
+    kept in use order, so both checks only ever look at the oldest.
     
-    def scene_1_entrance(self):
-        """Scene 1: Entrance Chamber."""
-        while self.game_state == "playing" and self.current_chapter == 1:
-            clear_screen()
-            print_scene_banner("THE AWAKENING CHAMBER")
-            
-            type_text("\nYou stand in a circular chamber with three glowing archways:")
-            type_text("1. 🔵 BLUE ARCHWAY - Mechanical humming sounds")
-            type_text("2. 🟢 GREEN ARCHWAY - Smells of earth and growth")
-            type_text("3. 🔴 RED ARCHWAY - Flickers with unstable energy")
-            type_text("\nIn the center, a CRYSTAL CHRONICLE glows on a pedestal.")
-            
-            self.show_stats()
-            print("\n" + "─" * 50)
-            print("What will you do?")
-            print("1. Take the Crystal Chronicle")
-            print("2. Enter BLUE archway (Mechanical)")
-            print("3. Enter GREEN archway (Garden)")
-            print("4. Enter RED archway (Volcanic)")
-            print("5. Ready to proceed to Chapter 2")
-            
-            choice = self.get_choice(["1", "2", "3", "4", "5"])
-            
-            if choice == "1":
-                if not self.has_crystal_chronicle:
-                    type_text("\nYou take the CRYSTAL CHRONICLE.")
-                    type_text("It glows warmly, showing glimpses of past and future.")
-                    self.inventory.append("Crystal Chronicle")
-                    self.has_crystal_chronicle = True
-                    self.knowledge += 15
-                else:
-                    type_text("\nYou already have the Chronicle.")
-                input("\nPress Enter to continue...")
-            
-            elif choice == "2":
-                self.scene_1_mechanical()
-            
-            elif choice == "3":
-                self.scene_1_garden()
-            
-            elif choice == "4":
-                self.scene_1_volcanic()
-            
-            elif choice == "5":
-                if self.has_crystal_chronicle:
-                    self.complete_chapter_1()
-                else:
-                    type_text("\nYou should take the Crystal Chronicle first!")
-                    input("\nPress Enter to continue...")
+    Given hibernate_after, a game unused that long is written to a file in
+    hibernate_dir (a temporary directory by default) and dropped from
+    memory, as is one pushed out by capacity. The next request for it
+    brings it back as it was; only an expired game is gone for good.
     
-    def scene_1_mechanical(self):
-        """Mechanical Labyrinth scene."""
-        clear_screen()
-        print_scene_banner("MECHANICAL LABYRINTH")
-        
-        # FIXED: Add courage for entering dangerous area (first time only)
-        if not self.visited_mechanical:
-            type_text("\nYou bravely enter the dangerous mechanical area!")
-            type_text("+10 Courage for facing danger!")
-            self.courage += 10
-            self.visited_mechanical = True
-        else:
-            type_text("\nYou return to the mechanical labyrinth.")
-        
-        type_text("\nA mechanical owl is trapped under a fallen gear!")
-        
-        while True:
-            self.show_stats()
-            print("\n" + "─" * 50)
-            print("What will you do?")
-            print("1. Try to free the owl")
-            print("2. Search for tools")
-            print("3. Examine control panel")
-            print("4. Return to entrance")
-            
-            choice = self.get_choice(["1", "2", "3", "4"])
-            
-            if choice == "1":
-                if not self.saved_owl:
-                    type_text("\nYou try to lift the heavy gear...")
-                    if self.courage >= 20 or "Temporal Hammer" in self.inventory:
-                        type_text("\nSuccess! The owl is freed!")
-                        type_text("It gives you a GEAR KEY in gratitude.")
-                        self.inventory.append("Gear Key")
-                        self.saved_owl = True
-                        self.compassion += 20
-                        self.courage += 10  # Bonus for success
-                        type_text("+10 Courage bonus!")
-                    else:
-                        type_text("\nThe gear is too heavy. You need more courage.")
-                        type_text("Current courage: " + str(self.courage) + "/20 required")
-                        type_text("+5 Courage for trying!")
-                        self.courage += 5  # Always get some courage for trying
-                        self.health -= 5
-                else:
-                    type_text("\nThe owl is already free and happily hooting.")
-                input("\nPress Enter to continue...")
-            
-            elif choice == "2":
-                if "Oil Can" not in self.inventory:
-                    type_text("\nYou find an OIL CAN in a toolbox.")
-                    self.inventory.append("Oil Can")
-                    type_text("+5 Courage for finding useful tools!")
-                    self.courage += 5
-                else:
-                    type_text("\nYou've already searched here.")
-                input("\nPress Enter to continue...")
-            
-            elif choice == "3":
-                if self.has_crystal_chronicle:
-                    type_text("\nThe Chronicle activates the panel!")
-                    type_text("You learn about time mechanics. +10 Knowledge")
-                    self.knowledge += 10
-                else:
-                    type_text("\nThe panel shows complex symbols you don't understand.")
-                input("\nPress Enter to continue...")
-            
-            elif choice == "4":
-                return
+    Sessions share a fixed set of locks, picked by id, rather than each
+    owning one: a lock costs more than the rest of an idle session's
+    bookkeeping, and a game step holds it for microseconds. Hibernating
+    waits for a session's lock and writes its file after the store's own
+    lock is let go, so other sessions aren't held up meanwhile.
+    """
     
-    def scene_1_garden(self):
-        """Eternal Garden scene."""
-        clear_screen()
-        print_scene_banner("ETERNAL GARDEN")
+    def __init__(self, capacity=1000, ttl=1800, clock=time.monotonic,
+                 hibernate_after=None, hibernate_dir=None):
+        self.capacity = capacity
+        self.ttl = ttl or None
+        self.clock = clock
+        self.sessions = OrderedDict()
+        # Sessions on their way to disk, by id, until their files are written
+        self.leaving = {}
+        self.lock = threading.Lock()
+        self.session_locks = tuple(threading.Lock() for _ in range(SESSION_LOCKS))
         
-        # FIXED: Add courage for exploring new area
-        if not self.visited_garden:
-            type_text("\nYou explore the mysterious garden.")
-            type_text("+5 Courage for venturing into the unknown!")
-            self.courage += 5
-            self.visited_garden = True
-        else:
-            type_text("\nYou return to the peaceful garden.")
-        
-        type_text("\nA beautiful garden frozen in time.")
-        type_text("A crystal tree with a dying branch stands at the center.")
+        self.hibernate_after = hibernate_after or None
+        self.hibernate_dir = None
+        self.temporary_dir = None
+        # Games on disk, and when next to delete the expired ones
+        self.asleep = 0
+        self.next_sweep = 0
+        if self.hibernate_after is not None:
+            if hibernate_dir is None:
+                hibernate_dir = self.temporary_dir = tempfile.mkdtemp(prefix="timekeeper-sessions-")
+            else:
+                os.makedirs(hibernate_dir, exist_ok=True)
+            self.hibernate_dir = hibernate_dir
+            # A directory kept from an earlier run still holds its games.
+            self.asleep = sum(1 for entry in os.scandir(hibernate_dir)
+                              if _SESSION_ID.fullmatch(entry.name))
+    
+    def __len__(self):
+        return len(self.sessions)
+    
+    def add(self, game):
+        """Store a new game and return its id."""
+        key = secrets.token_urlsafe(12)
+        with self.lock:
+            now = self.clock()
+            self.sessions[key] = _WebSession(game, self._session_lock(key), now)
+            leaving = self._evict(now)
+        self._hibernate(leaving, now)
+        return key
+    
+    def get(self, key):
+        """The session with this id, or None if there is none (or it expired)."""
+        with self.lock:
+            now = self.clock()
+            leaving = self._evict(now)
+            session = self.sessions.get(key)
+            if session is None and key in self.leaving:
+                # Asked for while its file is written: take it back.
+                session = self.sessions[key] = self.leaving.pop(key)[1]
+            if session is None and self.hibernate_dir is not None:
+                session = self._wake(key, now)
+            if session is not None:
+                session.used = now
+                self.sessions.move_to_end(key)
+        self._hibernate(leaving, now)
+        return session
+    
+    def remove(self, key):
+        """Forget a session; False if there was none."""
+        with self.lock:
+            if self.sessions.pop(key, None) is not None or self.leaving.pop(key, None) is not None:
+                return True
+            if self.hibernate_dir is None or not _SESSION_ID.fullmatch(key):
+                return False
+            try:
+                os.remove(os.path.join(self.hibernate_dir, key))
+            except OSError:
+                return False
+            self.asleep -= 1
+            return True
+    
+    def tidy(self):
+        """Expire and hibernate sessions no request has touched lately.
         
-        while True:
-            self.show_stats()
-            print("\n" + "─" * 50)
-            print("What will you do?")
-            print("1. Examine the crystal tree")
-            print("2. Collect glowing flowers")
-            print("3. Look for the garden keeper")
-            print("4. Return to entrance")
-            
-            choice = self.get_choice(["1", "2", "3", "4"])
-            
-            if choice == "1":
-                type_text("\nThe tree's sap is liquid time.")
-                if "Oil Can" in self.inventory:
-                    type_text("\nYou use oil to heal the branch. It produces TIME SAP.")
-                    self.inventory.append("Time Sap")
-                    self.has_time_sap = True
-                    self.compassion += 15
-                    type_text("+5 Courage for healing nature!")
-                    self.courage += 5
-                else:
-                    type_text("\nThe branch needs healing, but you lack tools.")
-                input("\nPress Enter to continue...")
-            
-            elif choice == "2":
-                if "Lumina Blossom" not in self.inventory:
-                    type_text("\nYou collect a LUMINA BLOSSOM.")
-                    self.inventory.append("Lumina Blossom")
-                    self.has_lumina_blossom = True
-                    type_text("+3 Courage for finding magical items!")
-                    self.courage += 3
-                else:
-                    type_text("\nYou already have the blossom.")
-                input("\nPress Enter to continue...")
-            
-            elif choice == "3":
-                type_text("\nA gentle voice whispers: 'Heal the tree with care...'")
-                type_text("The garden appreciates your presence. +5 Compassion")
-                self.compassion += 5
-                input("\nPress Enter to continue...")
-            
-            elif choice == "4":
-                return
+        Requests do this as they come; call it every so often as well, so
+        that sessions are hibernated even when no requests arrive.
+        """
+        with self.lock:
+            now = self.clock()
+            leaving = self._evict(now)
+            sweep = self.hibernate_dir is not None and self.ttl is not None and now >= self.next_sweep
+            if sweep:
+                self.next_sweep = now + min(self.ttl, HIBERNATION_SWEEP)
+        self._hibernate(leaving, now)
+        if sweep:
+            self._sweep()
     
-    def scene_1_volcanic(self):
-        """Volcanic Forge scene."""
-        clear_screen()
-        print_scene_banner("VOLCANIC FORGE")
+    def close(self):
+        """Hibernate every game in memory, or delete the store's temporary directory.
         
-        # FIXED: MAJOR BUG FIX - Courage added immediately upon entering
-        if not self.visited_volcanic:
-            type_text("\n🔥 You bravely enter the intensely hot volcanic forge!")
-            type_text("🛡️  +15 COURAGE for facing extreme danger!")
-            self.courage += 15  # FIXED: Now courage increases immediately
-            self.visited_volcanic = True
-        else:
-            type_text("\nYou return to the scorching volcanic forge.")
+        A server restarted with the same hibernate_dir carries on with them.
+        """
+        if self.temporary_dir is not None:
+            shutil.rmtree(self.temporary_dir, ignore_errors=True)
+        elif self.hibernate_dir is not None:
+            with self.lock:
+                now = self.clock()
+                leaving = [self._leave(*self.sessions.popitem(last=False))
+                           for _ in range(len(self.sessions))]
+            self._hibernate(leaving, now)
+    
+    def _evict(self, now):
+        """Make room past capacity, drop expired sessions, then pick idle ones to hibernate.
         
-        type_text("\nIntense heat hits you! A forge holds an unfinished hammer.")
-        type_text("The heat is dangerous! (-15 health)")
-        self.health -= 15
+        Returns the sessions to hibernate, already out of sessions, for the
+        caller to pass to _hibernate() once it has let go of the lock.
+        """
+        sessions = self.sessions
+        leaving = []
+        while len(sessions) > self.capacity:
+            key, session = sessions.popitem(last=False)
+            if self.hibernate_dir is not None:
+                leaving.append(self._leave(key, session))
+        if self.ttl is not None:
+            while sessions and now - next(iter(sessions.values())).used > self.ttl:
+                sessions.popitem(last=False)
+        if self.hibernate_after is not None:
+            while sessions and now - next(iter(sessions.values())).used > self.hibernate_after:
+                leaving.append(self._leave(*sessions.popitem(last=False)))
+        return leaving
+    
+    def _leave(self, key, session):
+        """Note a session as on its way to disk; returns its place in leaving."""
+        self.leaving[key] = entry = (key, session)
+        return entry
+    
+    def _session_lock(self, key):
+        """The shared lock a session uses."""
+        return self.session_locks[hash(key) % SESSION_LOCKS]
+    
+    def _hibernate(self, leaving, now):
+        """Write sessions _evict() took out to their files, without the store's lock.
         
-        while True:
-            self.show_stats()
-            if self.health <= 0:
-                type_text("\n❌ You succumb to the heat...")
-                self.game_over("Heat Exhaustion")
-                return
-                
-            print("\n" + "─" * 50)
-            print("What will you do?")
-            print("1. Try to complete the hammer (requires 30 courage)")
-            print("2. Search for protective gear")
-            print("3. Study the forge's patterns")
-            print("4. Retreat to entrance")
-            
-            choice = self.get_choice(["1", "2", "3", "4"])
-            
-            if choice == "1":
-                type_text("\nYou approach the blazing forge...")
-                type_text(f"Your courage: {self.courage}/30 needed")
-                if self.courage >= 30:
-                    type_text("\n✅ Your courage lets you withstand the heat!")
-                    type_text("You complete the TEMPORAL HAMMER!")
-                    self.inventory.append("Temporal Hammer")
-                    self.has_temporal_hammer = True
-                    self.courage += 25  # Big bonus for success
-                    type_text("+25 Courage for incredible bravery!")
-                else:
-                    type_text("\n🔥 The heat is too intense! But you learn from the attempt.")
-                    type_text("+10 Courage for facing your fears!")
-                    self.courage += 10  # Good courage gain even if fail
-                    self.health -= 10   # Reduced penalty
-                input("\nPress Enter to continue...")
-            
-            elif choice == "2":
-                if "Heat Gloves" not in self.inventory:
-                    type_text("\nYou find HEAT-RESISTANT GLOVES.")
-                    self.inventory.append("Heat Gloves")
-                    type_text("+8 Courage for finding protective gear!")
-                    self.courage += 8
-                    type_text("These will help with hot objects.")
+        One asked for again meanwhile is back in memory, so its file goes.
+        One that can't be written goes back in memory, to be tried again later.
+        """
+        for entry in leaving:
+            key, session = entry
+            # A request that fetched the session before it left may still be
+            # playing it; wait for that move to finish.
+            with session.lock:
+                data = session.game.hibernate()
+            last_used = time.time() - (now - session.used)
+            path = os.path.join(self.hibernate_dir, key)
+            try:
+                with open(path, "wb") as file:
+                    file.write(_LAST_USED.pack(last_used) + data)
+                written = True
+            except OSError as error:
+                print(f"\n⚠️  Could not hibernate a session ({error.strerror})", file=sys.stderr)
+                written = False
+            with self.lock:
+                if self.leaving.get(key) is not entry:
+                    if written:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    continue
+                del self.leaving[key]
+                if written:
+                    self.asleep += 1
                 else:
-                    type_text("\nYou already have the heat gloves.")
-                input("\nPress Enter to continue...")
-            
-            elif choice == "3":
-                type_text("\nYou study the forge's ancient runes.")
-                type_text("+15 Knowledge about elemental time.")
-                self.knowledge += 15
-                type_text("+5 Courage for learning in dangerous conditions!")
-                self.courage += 5
-                input("\nPress Enter to continue...")
-            
-            elif choice == "4":
-                return
+                    self.sessions[key] = session
+                    self.sessions.move_to_end(key, last=False)
+            if written and METRICS is not None:
+                METRICS.hibernated()
     
-    def complete_chapter_1(self):
-        """Complete Chapter 1."""
-        clear_screen()
-        print_banner("CHAPTER 1 COMPLETE!")
-        
-        type_text(f"\n{self.player_name}, you have gathered what you need.")
-        type_text("A portal opens before you, leading to the Chrono-Core...")
-        
-        # Chapter completion bonus - FIXED: Now gives courage
-        self.health = min(100, self.health + 20)
-        self.courage += 20  # FIXED: Big courage bonus for completing chapter
-        self.knowledge += 10
-        self.compassion += 10
-        
-        type_text("\n🎁 CHAPTER COMPLETION BONUS:")
-        type_text("+20 Health, +20 Courage, +10 Knowledge, +10 Compassion")
-        
-        input("\nPress Enter to continue to Chapter 2...")
-        self.current_chapter = 2
-        self.chapter_2()
+    def _wake(self, key, now):
+        """Bring a hibernated session back into sessions, or None if it has none."""
+        if not _SESSION_ID.fullmatch(key):
+            return None
+        started = time.perf_counter()
+        path = os.path.join(self.hibernate_dir, key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.remove(path)
+        except OSError:
+            return None
+        self.asleep -= 1
+        try:
+            (last_used,) = _LAST_USED.unpack_from(data)
+            game = TimekeeperChronicles.wake(data[_LAST_USED.size:], SessionConsole())
+        except (struct.error, ValueError):
+            return None
+        if self.ttl is not None and time.time() - last_used > self.ttl:
+            return None
+        session = self.sessions[key] = _WebSession(game, self._session_lock(key), now)
+        if METRICS is not None:
+            METRICS.woke(time.perf_counter() - started)
+        return session
     
-    # ==================== CHAPTER 2 ====================
+    def _sweep(self):
+        """Delete hibernated sessions that have expired without being asked for."""
+        # A file is written after its session was last used, so this errs
+        # on the side of keeping it; waking checks the exact time.
+        oldest = time.time() - self.ttl
+        removed = 0
+        for entry in os.scandir(self.hibernate_dir):
+            try:
+                if _SESSION_ID.fullmatch(entry.name) and entry.stat().st_mtime < oldest:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        with self.lock:
+            self.asleep -= removed
+
+def measure_session_memory(sessions=20000):
+    """Bytes a SessionStore holds per idle browser session, on average.
     
-    def chapter_2(self):
-        """Chapter 2: Heart of Time."""
-        clear_screen()
-        print_banner("CHAPTER 2: HEART OF TIME")
-        time.sleep(1)
-        
-        type_text("\nYou arrive at the CHRONO-CORE chamber.")
-        type_text("A massive crystal sphere floats in the center, with three fractures.")
-        type_text("Each fracture threatens to unravel time itself!")
-        
-        # FIXED: Courage for reaching Chapter 2
-        type_text("\n🛡️  +10 Courage for reaching the Chrono-Core!")
-        self.courage += 10
-        
-        input("\nPress Enter to continue...")
-        self.scene_2_core_chamber()
+    Each session is started the way the API starts one (a named player
+    waiting at the first menu, with the page already sent) and measured
+    with tracemalloc, story and all other shared data excluded.
+    """
+    def start(number):
+        game = TimekeeperChronicles(SessionConsole())
+        game.enter("start")
+        game.give_name(f"Player {number}")
+        game.console.take_pages()
+        return game
     
-    def scene_2_core_chamber(self):
-        """Core Chamber scene."""
-        while self.game_state == "playing" and self.current_chapter == 2:
-            clear_screen()
-            print_scene_banner("CHRONO-CORE CHAMBER")
-            
-            fixed_count = sum([self.mechanical_fixed, self.organic_fixed, self.elemental_fixed])
-            stability = 40 + (fixed_count * 20)
-            
-            type_text(f"\nCore Stability: {stability}%")
-            type_text("\nThree fractures need healing:")
-            status = []
-            if self.mechanical_fixed: status.append("🔵 Mechanical: HEALED")
-            else: status.append("🔵 Mechanical: BROKEN")
-            if self.organic_fixed: status.append("🟢 Organic: HEALED")
-            else: status.append("🟢 Organic: BROKEN")
-            if self.elemental_fixed: status.append("🔴 Elemental: HEALED")
-            else: status.append("🔴 Elemental: BROKEN")
-            
-            for s in status:
-                type_text(s)
-            
-            self.show_stats()
-            print("\n" + "─" * 50)
-            print("What will you do?")
-            print("1. Heal MECHANICAL fracture (Blue)")
-            print("2. Heal ORGANIC fracture (Green)")
-            print("3. Heal ELEMENTAL fracture (Red)")
-            print("4. Check damaged robot assistant")
-            
-            if fixed_count == 3:
-                print("5. ACTIVATE CORE RESTORATION")
-            
-            options = ["1", "2", "3", "4"]
-            if fixed_count == 3:
-                options.append("5")
-            
-            choice = self.get_choice(options)
-            
-            if choice == "1":
-                self.heal_mechanical_fracture()
-            
-            elif choice == "2":
-                self.heal_organic_fracture()
-            
-            elif choice == "3":
-                self.heal_elemental_fracture()
-            
-            elif choice == "4":
-                self.check_robot()
-            
-            elif choice == "5" and fixed_count == 3:
-                self.complete_chapter_2()
-    
-    def heal_mechanical_fracture(self):
-        """Heal the mechanical fracture."""
-        clear_screen()
-        print_scene_banner("MECHANICAL FRACTURE")
-        
-        if self.mechanical_fixed:
-            type_text("\nThis fracture is already healed.")
-            input("\nPress Enter to continue...")
-            return
-        
-        type_text("\nGears grind painfully. A mainspring is overwound.")
-        
-        print("\n" + "─" * 50)
-        print("How will you heal it?")
-        print("1. Use Temporal Hammer (if you have it)")
-        print("2. Use Gear Key (if you have it)")
-        print("3. Try manual repair (dangerous - requires courage)")
-        print("4. Return to core chamber")
-        
-        choice = self.get_choice(["1", "2", "3", "4"])
-        
-        if choice == "1":
-            if "Temporal Hammer" in self.inventory:
-                type_text("\nYou use the hammer to safely release tension!")
-                type_text("✅ MECHANICAL FRACTURE HEALED!")
-                self.mechanical_fixed = True
-                self.courage += 15
-                type_text("+15 Courage for precise repair!")
-            else:
-                type_text("\nYou don't have the Temporal Hammer.")
-            input("\nPress Enter to continue...")
-        
-        elif choice == "2":
-            if "Gear Key" in self.inventory:
-                type_text("\nThe Gear Key perfectly aligns the mechanisms!")
-                type_text("✅ MECHANICAL FRACTURE HEALED!")
-                self.mechanical_fixed = True
-                self.knowledge += 10
-                self.courage += 10
-                type_text("+10 Courage for clever solution!")
-            else:
-                type_text("\nYou don't have the Gear Key.")
-            input("\nPress Enter to continue...")
-        
-        elif choice == "3":
-            type_text("\nYou attempt manual repair...")
-            type_text(f"Your courage: {self.courage}/40 needed")
-            if self.courage >= 40:
-                type_text("\n✅ Success through sheer bravery!")
-                type_text("✅ MECHANICAL FRACTURE HEALED!")
-                self.mechanical_fixed = True
-                self.courage += 25  # Big bonus for brave success
-                self.health -= 15
-                type_text("+25 Courage for incredible bravery!")
-            else:
-                type_text("\n❌ Too dangerous! You get injured.")
-                type_text("But +5 Courage for trying something dangerous!")
-                self.courage += 5  # Still get courage for trying
-                self.health -= 25
-            input("\nPress Enter to continue...")
-        
-        elif choice == "4":
-            return
+    store = SessionStore(capacity=sessions, ttl=0)
+    # Warm up first so caches filled by the first games aren't counted.
+    for number in range(100):
+        store.remove(store.add(start(number)))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for number in range(sessions):
+            store.add(start(number))
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / sessions
+
+def session_view(key, game):
+    """What a browser needs to draw a session: new text, the menu and the stats."""
+    state = game.state
+    over = state.scene == EXIT
+    scene = None if over else STORY.scenes[state.scene]
+    options = []
+    if scene is not None and not scene.ask_name:
+        offered = STORY.options(state)
+        options = [{"key": option.key, "label": option.label}
+                   for option in scene.options if option.key in offered]
+    return {
+        "session": key,
+        "pages": game.console.take_pages(),
+        "scene": state.scene,
+        "asks_name": bool(scene and scene.ask_name),
+        "options": options,
+        "over": over,
+        "player": {
+            "name": state.player_name,
+            "chapter": state.chapter,
+            "health": state.health,
+            "knowledge": state.knowledge,
+            "courage": state.courage,
+            "compassion": state.compassion,
+            "inventory": state.inventory,
+            "ending": state.ending,
+        },
+    }
+
+class _HTTPError(Exception):
+    """An error to send back as a JSON response with this status."""
     
-    def heal_organic_fracture(self):
-        """Heal the organic fracture."""
-        clear_screen()
-        print_scene_banner("ORGANIC FRACTURE")
-        
-        if self.organic_fixed:
-            type_text("\nThis fracture is already healed.")
-            input("\nPress Enter to continue...")
-            return
-        
-        type_text("\nCrystalline vines are withering. Life energy fades.")
-        
-        print("\n" + "─" * 50)
-        print("How will you heal it?")
-        print("1. Use Time Sap (if you have it)")
-        print("2. Use Lumina Blossom (if you have it)")
-        print("3. Try compassionate healing (requires compassion)")
-        print("4. Return to core chamber")
-        
-        choice = self.get_choice(["1", "2", "3", "4"])
-        
-        if choice == "1":
-            if "Time Sap" in self.inventory:
-                type_text("\nThe Time Sap revitalizes the vines!")
-                type_text("✅ ORGANIC FRACTURE HEALED!")
-                self.organic_fixed = True
-                self.compassion += 20
-                self.courage += 5  # Courage for success
-                type_text("+5 Courage for healing nature!")
-            else:
-                type_text("\nYou don't have Time Sap.")
-            input("\nPress Enter to continue...")
-        
-        elif choice == "2":
-            if "Lumina Blossom" in self.inventory:
-                type_text("\nThe blossom's light heals the crystalline growth!")
-                type_text("✅ ORGANIC FRACTURE HEALED!")
-                self.organic_fixed = True
-                self.compassion += 15
-                self.courage += 5  # Courage for success
-                type_text("+5 Courage for using magical items!")
-            else:
-                type_text("\nYou don't have the Lumina Blossom.")
-            input("\nPress Enter to continue...")
-        
-        elif choice == "3":
-            type_text("\nYou try to heal with compassion...")
-            type_text(f"Your compassion: {self.compassion}/50 needed")
-            if self.compassion >= 50:
-                type_text("\n✅ Your kindness resonates with the life force!")
-                type_text("✅ ORGANIC FRACTURE HEALED!")
-                self.organic_fixed = True
-                self.compassion += 10
-                self.courage += 15  # Big courage for emotional bravery
-                type_text("+15 Courage for emotional strength!")
-            else:
-                type_text("\n❌ You lack the compassion needed.")
-            input("\nPress Enter to continue...")
-        
-        elif choice == "4":
-            return
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class PlayAPIHandler(BaseHTTPRequestHandler):
+    """JSON API for playing in a browser.
     
-    def heal_elemental_fracture(self):
-        """Heal the elemental fracture."""
-        clear_screen()
-        print_scene_banner("ELEMENTAL FRACTURE")
-        
-        if self.elemental_fixed:
-            type_text("\nThis fracture is already healed.")
-            input("\nPress Enter to continue...")
-            return
-        
-        type_text("\nRaw temporal energy arcs dangerously. Reality is unstable.")
-        
-        print("\n" + "─" * 50)
-        print("How will you heal it?")
-        print("1. Use Crystal Chronicle (if you have it)")
-        print("2. Use Heat Gloves (if you have them)")
-        print("3. Try to contain energy (requires knowledge)")
-        print("4. Return to core chamber")
-        
-        choice = self.get_choice(["1", "2", "3", "4"])
-        
-        if choice == "1":
-            if "Crystal Chronicle" in self.inventory:
-                type_text("\nThe Chronicle stabilizes the temporal energy!")
-                type_text("✅ ELEMENTAL FRACTURE HEALED!")
-                self.elemental_fixed = True
-                self.knowledge += 25
-                self.courage += 20  # Courage for facing raw energy
-                type_text("+20 Courage for facing temporal chaos!")
-            else:
-                type_text("\nYou don't have the Crystal Chronicle.")
-            input("\nPress Enter to continue...")
-        
-        elif choice == "2":
-            if "Heat Gloves" in self.inventory:
-                type_text("\nThe gloves protect you as you channel the energy!")
-                type_text("✅ ELEMENTAL FRACTURE HEALED!")
-                self.elemental_fixed = True
-                self.courage += 25  # Big courage bonus
-                type_text("+25 Courage for channeling dangerous energy!")
-            else:
-                type_text("\nYou don't have Heat Gloves.")
-            input("\nPress Enter to continue...")
-        
-        elif choice == "3":
-            type_text("\nYou attempt to contain the energy...")
-            type_text(f"Your knowledge: {self.knowledge}/60 needed")
-            if self.knowledge >= 60:
-                type_text("\n✅ Your knowledge lets you stabilize the fracture!")
-                type_text("✅ ELEMENTAL FRACTURE HEALED!")
-                self.elemental_fixed = True
-                self.knowledge += 15
-                self.courage += 20  # Courage for intellectual bravery
-                self.health -= 10
-                type_text("+20 Courage for intellectual bravery!")
-            else:
-                type_text("\n❌ The energy is too complex for your understanding.")
-                type_text("But +5 Courage for trying!")
-                self.courage += 5
-                self.health -= 20
-            input("\nPress Enter to continue...")
-        
-        elif choice == "4":
-            return
+        POST   /api/sessions                {"name": "Ann"}  start a game
+        GET    /api/sessions/ID                              its current view
+        POST   /api/sessions/ID/name        {"name": "Ann"}  answer the name prompt
+        POST   /api/sessions/ID/choice      {"choice": "2"}  take a menu option
+        DELETE /api/sessions/ID                              end it
     
-    def check_robot(self):
-        """Check the damaged robot."""
-        clear_screen()
-        print_scene_banner("DAMAGED ASSISTANT")
-        
-        if not self.helped_robot:
-            type_text("\nA damaged robot sparks weakly.")
-            type_text("It beeps: 'Core... failing... help...'")
-            
-            print("\n" + "─" * 50)
-            print("Will you help the robot?")
-            print("1. Yes, try to repair it (requires Oil Can)")
-            print("2. No, focus on the core")
-            
-            choice = self.get_choice(["1", "2"])
-            
-            if choice == "1":
-                if "Oil Can" in self.inventory:
-                    type_text("\nYou use oil to repair the robot's joints!")
-                    type_text("It thanks you and gives you a REPAIR MANUAL.")
-                    self.inventory.append("Repair Manual")
-                    self.helped_robot = True
-                    self.compassion += 25
-                    self.courage += 15  # Courage for helping
-                    type_text("+25 Compassion, +15 Courage!")
-                else:
-                    type_text("\nYou lack the tools to repair it properly.")
-            else:
-                type_text("\nYou leave the robot as it is.")
-        else:
-            type_text("\nThe repaired robot hums happily.")
-            type_text("'Thank you for your help, Timekeeper!'")
-        
-        input("\nPress Enter to continue...")
+    Every game response is a session_view(). GET / serves index.html and
+    GET /metrics the counters in Prometheus' text format.
+    """
     
-    def complete_chapter_2(self):
-        """Complete Chapter 2."""
-        clear_screen()
-        print_banner("CHAPTER 2 COMPLETE!")
-        
-        type_text("\nAll three fractures are healed!")
-        type_text("The Chrono-Core stabilizes at 100%!")
-        type_text("Brilliant light fills the chamber...")
-        
-        # FIXED: Big courage bonus for completing Chapter 2
-        type_text("\n🛡️  +30 COURAGE for restoring the Chrono-Core!")
-        self.courage += 30
-        
-        input("\nPress Enter for the final choice...")
-        self.current_chapter = 3
-        self.final_choice()
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    server_version = "TimekeeperChronicles"
+    # Send headers and body in one segment instead of waiting on Nagle.
+    wbufsize = -1
+    disable_nagle_algorithm = True
     
-    # ==================== FINAL CHAPTER ====================
+    def log_message(self, format, *args):
+        pass
     
-    def final_choice(self):
-        """Final choice that determines ending."""
-        clear_screen()
-        print_banner("FINAL CONVERGENCE")
-        
-        type_text("\nThe Chrono-Core is stable. Time itself asks for guidance.")
-        type_text("How will you shape the future of time?")
-        
-        self.show_stats()
-        print("\n" + "─" * 50)
-        print("Choose the future:")
-        print("1. ORDER - Perfect stability, no surprises")
-        print("2. BALANCE - Harmony between change and stability")
-        print("3. EVOLUTION - Constant change and growth")
-        
-        # Special ending if all stats are high
-        if self.knowledge >= 70 and self.courage >= 70 and self.compassion >= 70:
-            print("4. ENLIGHTENMENT - Become one with time (Secret Ending)")
-            options = ["1", "2", "3", "4"]
+    def do_OPTIONS(self):
+        self.send_body(204, b"", None)
+    
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path in ("/", "/index.html"):
+            self.send_page()
+        elif path == "/metrics" and METRICS is not None:
+            self.send_body(200, METRICS.prometheus().encode(), "text/plain; version=0.0.4")
         else:
-            options = ["1", "2", "3"]
-        
-        choice = self.get_choice(options)
-        
-        if choice == "1":
-            self.ending_order()
-        elif choice == "2":
-            self.ending_balance()
-        elif choice == "3":
-            self.ending_evolution()
-        elif choice == "4":
-            self.ending_enlightenment()
+            self.handle_api("GET")
     
-    # ==================== ENDINGS ====================
+    def do_POST(self):
+        self.handle_api("POST")
     
-    def ending_order(self):
-        """Order ending."""
-        clear_screen()
-        print_banner("ENDING: THE PERFECT CLOCK")
-        
-        type_text(f"\n{self.player_name}, you choose ORDER.")
-        type_text("\nTime becomes a perfect, predictable mechanism.")
-        type_text("Every second ticks with mathematical precision.")
-        type_text("No surprises, no changes, no growth.")
-        type_text("\nThe world is safe... but frozen.")
-        type_text("You become the Keeper of the Eternal Clock.")
-        
-        self.ending = "ORDER ENDING: The Perfect Clock"
-        self.show_ending_stats()
+    def do_DELETE(self):
+        self.handle_api("DELETE")
     
-    def ending_balance(self):
-        """Balance ending."""
-        clear_screen()
-        print_banner("ENDING: HARMONY RESTORED")
-        
-        type_text(f"\n{self.player_name}, you choose BALANCE.")
-        type_text("\nTime flows naturally between order and change.")
-        type_text("Seasons come and go, civilizations rise and fall.")
-        type_text("Life finds its rhythm in the great dance of time.")
-        
-        if self.compassion >= 60 and self.helped_robot and self.saved_owl:
-            type_text("\n✨ Because of your great compassion,")
-            type_text("you achieve PERFECT HARMONY!")
-            type_text("All beings thrive in your balanced time.")
-            self.ending = "PERFECT ENDING: Master of Balance"
-        else:
-            type_text("\nBalance is restored. The world continues.")
-            type_text("You have done well, Timekeeper.")
-            self.ending = "GOOD ENDING: Harmony Restored"
-        
-        self.show_ending_stats()
+    def handle_api(self, method):
+        """Route an API request and send back its JSON."""
+        try:
+            body = self.read_json() if method == "POST" else {}
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if parts[:2] != ["api", "sessions"] or len(parts) > 4:
+                raise _HTTPError(404, "Not found")
+            if len(parts) == 2 and method == "POST":
+                status, reply = 201, self.start(body)
+            elif len(parts) == 3 and method == "GET":
+                status, reply = 200, self.view(parts[2])
+            elif len(parts) == 3 and method == "DELETE":
+                if not self.server.store.remove(parts[2]):
+                    raise _HTTPError(404, "No such session")
+                status, reply = 200, {"session": parts[2], "over": True}
+            elif len(parts) == 4 and method == "POST" and parts[3] in ("name", "choice"):
+                status, reply = 200, self.answer(parts[2], parts[3], body)
+            else:
+                raise _HTTPError(405, "Method not allowed")
+        except _HTTPError as error:
+            status, reply = error.status, {"error": str(error)}
+        self.send_body(status, json.dumps(reply).encode(), "application/json")
     
-    def ending_evolution(self):
-        """Evolution ending."""
-        clear_screen()
-        print_banner("ENDING: RIVER OF CHANGE")
-        
-        type_text(f"\n{self.player_name}, you choose EVOLUTION.")
-        type_text("\nTime becomes a rushing river of constant change.")
-        type_text("Innovation accelerates, discoveries multiply!")
-        
-        if self.knowledge >= 70 and self.has_crystal_chronicle:
-            type_text("\n🧠 Your wisdom guides the rapid changes.")
-            type_text("A golden age of discovery begins under your watch!")
-            self.ending = "EVOLUTION ENDING: Guided Progress"
-        else:
-            type_text("\nChange comes rapidly, sometimes chaotically.")
-            type_text("The future is exciting but unpredictable...")
-            self.ending = "CHAOTIC ENDING: Unchecked Evolution"
-        
-        self.show_ending_stats()
+    def read_json(self):
+        """The request's JSON object body ({} if it has none)."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > 4096:
+            raise _HTTPError(413, "Request too large")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise _HTTPError(400, "Body is not JSON") from None
+        if not isinstance(body, dict):
+            raise _HTTPError(400, "Body must be a JSON object")
+        return body
     
-    def ending_enlightenment(self):
-        """Secret enlightenment ending."""
-        clear_screen()
-        print_banner("ENDING: THE ENLIGHTENED")
-        
-        type_text(f"\n{self.player_name}, you achieve ENLIGHTENMENT.")
-        type_text("\nYou understand: Time is not to be controlled.")
-        type_text("It simply IS. You become one with time itself.")
-        type_text("\nYou exist in every moment, everywhere.")
-        type_text("Not controlling, but understanding. Not ruling, but being.")
-        type_text("\nThis is the true purpose of a Timekeeper.")
-        
-        self.ending = "SECRET ENDING: The Enlightened"
-        self.show_ending_stats()
+    def start(self, body):
+        """Start a game, giving the player's name straight away if the body has one."""
+        game = TimekeeperChronicles(SessionConsole())
+        game.enter("start")
+        if isinstance(body.get("name"), str):
+            game.give_name(body["name"][:40])
+        key = self.server.store.add(game)
+        return session_view(key, game)
     
-    def game_over(self, reason):
-        """Game over screen."""
-        clear_screen()
-        print_banner("GAME OVER")
-        
-        type_text(f"\n{self.player_name}, your journey ends here.")
-        type_text(f"Reason: {reason}")
-        type_text("\nTime continues without a keeper...")
-        
-        self.ending = f"GAME OVER: {reason}"
-        self.show_ending_stats()
+    def view(self, key):
+        """The view of an existing session."""
+        session = self.find(key)
+        with session.lock:
+            return session_view(key, session.game)
     
-    def show_ending_stats(self):
-        """Show final statistics."""
-        time.sleep(2)
-        clear_screen()
-        print_banner("ADVENTURE COMPLETE")
-        
-        print("\n" + "=" * 60)
-        print(f"HERO: {self.player_name}")
-        print(f"ENDING: {self.ending}")
-        print("=" * 60)
-        
-        print("\n📊 FINAL STATISTICS:")
-        print(f"  ❤️  Health: {self.health}/100")
-        print(f"  🧠 Knowledge: {self.knowledge}")
-        print(f"  🛡️  Courage: {self.courage}")
-        print(f"  ❤️  Compassion: {self.compassion}")
-        
-        print("\n🎒 INVENTORY:")
-        if self.inventory:
-            for item in self.inventory:
-                print(f"  • {item}")
-        else:
-            print("  (Empty)")
-        
-        print("\n🌟 ACHIEVEMENTS:")
-        achievements = []
-        if self.saved_owl: achievements.append("✓ Saved the Mechanical Owl")
-        if self.has_time_sap: achievements.append("✓ Healed the Crystal Tree")
-        if self.has_temporal_hammer: achievements.append("✓ Forged Temporal Hammer")
-        if self.helped_robot: achievements.append("✓ Repaired the Assistant Robot")
-        if self.mechanical_fixed: achievements.append("✓ Healed Mechanical Fracture")
-        if self.organic_fixed: achievements.append("✓ Healed Organic Fracture")
-        if self.elemental_fixed: achievements.append("✓ Healed Elemental Fracture")
-        
-        if achievements:
-            for ach in achievements:
-                print(f"  {ach}")
-        else:
-            print("  (No achievements)")
-        
-        print("\n" + "=" * 60)
-        
-        # Play again option
-        print("\nWould you like to:")
-        print("1. Play Again")
-        print("2. Exit Game")
-        
-        choice = self.get_choice(["1", "2"])
-        
-        if choice == "1":
-            self.__init__()
-            self.start_game()
-        else:
-            clear_screen()
-            print_banner("THANK YOU FOR PLAYING!")
-            type_text("\nCreated by Himanshu Choudhari")
-            type_text("For Python Project Presentation")
-            time.sleep(3)
-            exit()
+    def answer(self, key, kind, body):
+        """Give a session the player's name or menu choice."""
+        session = self.find(key)
+        value = body.get(kind)
+        if not isinstance(value, str):
+            raise _HTTPError(400, f"Body needs a {kind!r} string")
+        with session.lock:
+            game = session.game
+            if game.state.scene == EXIT:
+                raise _HTTPError(409, "This game is over")
+            scene = STORY.scenes[game.state.scene]
+            if kind == "name":
+                if not scene.ask_name:
+                    raise _HTTPError(409, "The game is not asking for a name")
+                game.give_name(value[:40])
+            else:
+                options = () if scene.ask_name else STORY.options(game.state)
+                if value.strip() not in options:
+                    if game.meter is not None:
+                        game.meter.retried(game.state.scene)
+                    raise _HTTPError(400, f"Choose one of: {', '.join(options) or '(none)'}")
+                try:
+                    game.choose(value.strip())
+                except SessionEnded:
+                    pass
+            return session_view(key, game)
+    
+    def find(self, key):
+        """The session with this id, or a 404."""
+        session = self.server.store.get(key)
+        if session is None:
+            raise _HTTPError(404, "No such session (it may have expired)")
+        return session
+    
+    def send_page(self):
+        """Serve index.html from beside the script."""
+        try:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.html"), "rb") as page:
+                body = page.read()
+        except OSError:
+            self.send_body(404, b"index.html not found\n", "text/plain")
+            return
+        self.send_body(200, body, "text/html; charset=utf-8")
+    
+    def send_body(self, status, body, content_type):
+        """Send a complete response; the connection stays open for the next."""
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        # The page may be served from elsewhere (GitHub Pages) and call a local API.
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, DELETE, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+        self.wfile.write(body)
 
-def main():
-    """Main game launcher."""
+class PlayAPIServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the games its handlers play."""
+    
+    daemon_threads = True
+    # Hundreds of browsers may connect at once; the default backlog is 5.
+    request_queue_size = 1024
+    
+    def __init__(self, address, max_sessions=1000, idle_timeout=1800,
+                 hibernate_after=None, hibernate_dir=None):
+        super().__init__(address, PlayAPIHandler)
+        self.store = SessionStore(max_sessions, idle_timeout,
+                                  hibernate_after=hibernate_after, hibernate_dir=hibernate_dir)
+    
+    def service_actions(self):
+        # Called by serve_forever() between requests and at least every half second.
+        self.store.tidy()
+    
+    def server_close(self):
+        super().server_close()
+        self.store.close()
+
+def run_http(host, port, idle_timeout, max_sessions, hibernate_after=None, hibernate_dir=None):
+    """Serve the web page and its play API until interrupted."""
+    server = PlayAPIServer((host, port), max_sessions, idle_timeout, hibernate_after, hibernate_dir)
+    print(f"Play in your browser at http://{host}:{server.server_port}/ (Ctrl+C to stop)")
+    # Stop on SIGTERM as on Ctrl+C, so metrics and events get written out.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    asleep = f" ({server.store.asleep} more hibernated)" if server.store.asleep else ""
+    print(f"\nStopped with {len(server.store)} games in play{asleep}")
+
+def run_session_memory(sessions):
+    """Print what idle browser sessions cost in memory."""
+    size = measure_session_memory(sessions)
+    print(f"{size:,.0f} bytes per idle session, measured over {sessions:,} sessions")
+    print(f"100,000 idle sessions: {size * 100_000 / 2**20:,.1f} MiB")
+
+def play_menu(fps=15, instant=False, save_path=DEFAULT_SAVE_PATH,
+              journal_path=DEFAULT_JOURNAL_PATH, load_path=None, state=None, timeout=None):
+    """Interactive main menu, after carrying on a saved or replayed game if given one.
+    
+    Every prompt gives up after timeout seconds, if given, ending the
+    session with InputTimeout; the end of input ends it with SessionEnded.
+    """
+    if load_path or state is not None:
+        if not continue_game(fps, instant, save_path, journal_path, load_path, state, timeout):
+            ask_player("\nPress Enter to go to the menu...", timeout)
     while True:
         clear_screen()
         print_banner("TIMEKEEPER CHRONICLES")
         print("\n" + "=" * 60)
         print("1. 🎮 Start New Game")
-        print("2. 📖 How to Play")
-        print("3. 🚪 Exit")
+        print("2. 💾 Continue Saved Game")
+        print("3. 📖 How to Play")
+        print("4. 🚪 Exit")
         print("=" * 60)
         
-        choice = input("\nEnter choice (1-3): ").strip()
+        choice = ask_player("\nEnter choice (1-4): ", timeout).strip()
         
         if choice == "1":
-            game = TimekeeperChronicles()
-            game.start_game()
+            game = interactive_game(fps, instant, save_path, journal_path, timeout)
+            try:
+                game.start_game()
+            finally:
+                game.close()
         elif choice == "2":
+            if not continue_game(fps, instant, save_path, journal_path, timeout=timeout):
+                ask_player("\nPress Enter to return to menu...", timeout)
+        elif choice == "3":
             clear_screen()
             print_banner("HOW TO PLAY")
             print("\n🎯 OBJECTIVE:")
             print("  Restore the Chrono-Core and choose time's future")
             print("\n🎮 CONTROLS:")
             print("  • Type numbers to make choices")
+            print("  • Type r to rewind your last choice (r 3 for the last three)")
             print("  • Collect items to solve puzzles")
             print("  • Manage your stats (Health, Knowledge, Courage, Compassion)")
             print("\n🌟 TIPS:")
@@ -920,14 +6281,180 @@ def main():
             print("  • Enter Mechanical area: +10 Courage")
             print("  • Try dangerous actions: +5-25 Courage")
             print("  • Complete chapters: +20-30 Courage")
-            input("\nPress Enter to return to menu...")
-        elif choice == "3":
+            print("\n💾 SAVING:")
+            print("  • The game autosaves every time you change scene")
+            print("  • Choose Continue Saved Game to pick up where you left off")
+            ask_player("\nPress Enter to return to menu...", timeout)
+        elif choice == "4":
             clear_screen()
             print_banner("GOODBYE!")
             type_text("\nMay your time be well spent!")
             time.sleep(2)
             break
 
+def main(argv=None):
+    """Main game launcher."""
+    parser = argparse.ArgumentParser(description="Timekeeper Chronicles")
+    parser.add_argument("--headless", metavar="FILE",
+                        help="play choices from FILE ('-' for stdin) with no delays")
+    parser.add_argument("--name", default="Hero", help="player name for headless play")
+    parser.add_argument("--quiet", action="store_true", help="only print the ending")
+    parser.add_argument("--explore", action="store_true",
+                        help="search every reachable state and report the endings")
+    parser.add_argument("--fps", type=int, default=15,
+                        help="frames per second for the typing effect")
+    parser.add_argument("--instant", action="store_true", help="turn off the typing effect")
+    parser.add_argument("--render-stats", action="store_true",
+                        help="with --headless, report write syscalls per screen instead of playing")
+    parser.add_argument("--input-timeout", type=float, metavar="SECONDS",
+                        help="end an interactive session when a prompt goes unanswered this long")
+    parser.add_argument("--save", metavar="FILE",
+                        help="autosave to FILE (interactive play defaults to "
+                             f"{DEFAULT_SAVE_PATH})")
+    parser.add_argument("--no-save", action="store_true", help="don't autosave interactive play")
+    parser.add_argument("--load", metavar="FILE", help="carry on the game saved in FILE")
+    parser.add_argument("--journal", metavar="FILE",
+                        help="record names and choices to FILE (interactive play defaults to "
+                             f"{DEFAULT_JOURNAL_PATH})")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="don't keep a journal of interactive play")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="rebuild the session recorded in journal FILE and report its state")
+    parser.add_argument("--stop-at", type=int, metavar="N",
+                        help="with --replay, stop after N choices and carry on playing from there")
+    parser.add_argument("--solve", nargs="?", const="", metavar="ENDING",
+                        help="find the fewest choices to every ending whose name contains "
+                             "ENDING (all by default), from a new game or --load FILE")
+    parser.add_argument("--round-trips", action="store_true",
+                        help="count the answers the fastest path to each ending waits for, "
+                             "with and without chained lines")
+    parser.add_argument("--build-index", action="store_true",
+                        help="map every reachable state to the endings it can still reach, "
+                             "for in-game hints")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, metavar="FILE",
+                        help=f"reachability index to build or show hints from (default {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--simulate", type=int, metavar="N",
+                        help="play N games with a random policy and report how they end")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random",
+                        help="with --simulate or --sweep, how the simulated players choose")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="with --simulate, --sweep or --batch, seed for reproducible runs")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="with --simulate or --analyze, processes to use (default: one per core)")
+    parser.add_argument("--sweep", action="append", metavar="NAME=LOW:HIGH:STEP",
+                        help="sweep a stat threshold over a range (repeatable; "
+                             f"names: {', '.join(THRESHOLDS)}) and write ending shares as CSV")
+    parser.add_argument("--sweep-games", type=int, default=1000, metavar="N",
+                        help="with --sweep, random games played for each combination")
+    parser.add_argument("--batch", type=int, metavar="N",
+                        help="play N random games at once on the NumPy batch engine")
+    parser.add_argument("--graph", default=DEFAULT_GRAPH_PATH, metavar="FILE",
+                        help="with --batch, --solve, --round-trips or --build-index, state graph to "
+                             f"use, built on first use (default {DEFAULT_GRAPH_PATH})")
+    parser.add_argument("--bench", action="store_true",
+                        help="time rendering, input, playthroughs and startup")
+    parser.add_argument("--bench-out", metavar="FILE", help="with --bench, save the results as JSON")
+    parser.add_argument("--bench-baseline", metavar="FILE",
+                        help="with --bench, fail if anything is slower than in this saved run")
+    parser.add_argument("--bench-threshold", type=float, default=DEFAULT_BENCH_THRESHOLD,
+                        metavar="PERCENT",
+                        help="with --bench-baseline, slowdown allowed before failing "
+                             f"(default {DEFAULT_BENCH_THRESHOLD})")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="count scene times, choices, retries, chapter stats and endings, "
+                             f"writing them to FILE in Prometheus format every {METRICS_INTERVAL} s")
+    parser.add_argument("--events", metavar="FILE",
+                        help="write every scene, choice, retry, chapter and ending to FILE as JSON lines")
+    parser.add_argument("--events-max-bytes", type=int, default=16 * 1024 * 1024, metavar="N",
+                        help="with --events, start a new file past N bytes, keeping 3 old ones")
+    parser.add_argument("--analyze", nargs="+", metavar="LOG",
+                        help="report funnels and distributions from --events logs (gzipped or not)")
+    parser.add_argument("--serve", action="store_true",
+                        help="host games for network players until Ctrl+C")
+    parser.add_argument("--host", default="127.0.0.1", help="address to serve on or connect to")
+    parser.add_argument("--port", type=int, default=4000, help="port to serve on or connect to")
+    parser.add_argument("--http", action="store_true",
+                        help="serve index.html and a JSON play API for browsers until Ctrl+C")
+    parser.add_argument("--idle-timeout", type=float, default=600, metavar="SECONDS",
+                        help="with --serve or --http, drop players idle this long (0 never drops them)")
+    parser.add_argument("--max-sessions", type=int, default=1000, metavar="N",
+                        help="with --http, keep at most N games in memory, dropping "
+                             "(or hibernating) the least recently used")
+    parser.add_argument("--hibernate-after", type=float, metavar="SECONDS",
+                        help="with --http, move games idle this long to disk until their player is back")
+    parser.add_argument("--hibernate-dir", metavar="DIR",
+                        help="with --hibernate-after, keep hibernated games in DIR "
+                             "(default: a temporary directory, deleted on exit)")
+    parser.add_argument("--session-memory", type=int, nargs="?", const=20000, metavar="N",
+                        help="measure the memory N idle --http sessions take (default 20000)")
+    parser.add_argument("--spectate", type=int, metavar="PORT",
+                        help="let spectators watch the game from PORT on --host (with nc or telnet)")
+    parser.add_argument("--spectator-latency", action="store_true",
+                        help="measure the player's write latency with 0 to 1000 spectators watching")
+    parser.add_argument("--bots", type=int, metavar="N",
+                        help="load-test the server at --host/--port with N random players")
+    parser.add_argument("--bot-replies", type=int, default=100, metavar="N",
+                        help="with --bots, lines each bot sends before it stops")
+    args = parser.parse_args(argv)
+    HINTS.path = args.index
+    global METRICS
+    if args.metrics or args.events:
+        events = EventLog(args.events, args.events_max_bytes) if args.events else None
+        METRICS = Metrics(events)
+        METRICS.start_flushing(args.metrics)
+        atexit.register(METRICS.close, args.metrics)
+    
+    if args.build_index:
+        run_build_index(args.index, args.graph)
+    elif args.explore:
+        run_explorer()
+    elif args.solve is not None:
+        run_solver(args.solve, args.load, args.graph)
+    elif args.round_trips:
+        run_round_trips(args.graph)
+    elif args.simulate:
+        run_simulator(args.simulate, args.policy, args.seed, args.workers)
+    elif args.sweep:
+        run_sweep(args.sweep, args.sweep_games, args.seed, args.policy)
+    elif args.batch:
+        run_batch(args.batch, args.seed, args.graph)
+    elif args.analyze:
+        run_analytics(args.analyze, args.workers)
+    elif args.bench:
+        run_benchmarks(args.bench_out, args.bench_baseline, args.bench_threshold)
+    elif args.serve:
+        run_server(args.host, args.port, args.idle_timeout)
+    elif args.http:
+        run_http(args.host, args.port, args.idle_timeout, args.max_sessions,
+                 args.hibernate_after, args.hibernate_dir)
+    elif args.session_memory:
+        run_session_memory(args.session_memory)
+    elif args.spectator_latency:
+        run_spectator_latency()
+    elif args.bots:
+        run_bots(args.host, args.port, args.bots, args.bot_replies)
+    elif args.replay and args.stop_at is None:
+        run_replay(args.replay)
+    elif args.headless and args.render_stats:
+        run_render_stats(args.headless, args.name, args.fps, args.instant)
+    elif args.headless:
+        run_headless(args.headless, args.name, args.quiet, args.save, args.load, args.journal)
+    else:
+        state = None
+        if args.replay:
+            state, _ = replay(read_journal(args.replay), args.stop_at)
+        try:
+            if args.spectate is not None:
+                start_spectating(args.host, args.spectate)
+            play_menu(args.fps, args.instant,
+                      None if args.no_save else args.save or DEFAULT_SAVE_PATH,
+                      None if args.no_journal else args.journal or DEFAULT_JOURNAL_PATH,
+                      args.load, state, args.input_timeout)
+        except InputTimeout as timeout:
+            print(f"\n\n{timeout}. Goodbye!")
+        except SessionEnded:
+            print()
+
 # Start the game
 if __name__ == "__main__":
     main()
\ No newline at end of file